@@ -0,0 +1,112 @@
+"""答案缓存：按题目内容哈希保存 parse_ai_answer 解析后的答案（SQLite）"""
+import json
+import re
+import threading
+import time
+
+# 题号前缀（与界面清洗题目时使用的规则一致）
+_QUESTION_NUMBER_RE = re.compile(r"^\d+\.\s*")
+
+
+def normalize_text(text):
+    """规范化文本：合并连续空白并去掉首尾空白"""
+    return " ".join(str(text).split())
+
+
+def make_cache_key(instruction, questions, options, blank_counts, model_id):
+    """根据规范化后的题目内容和模型生成缓存键"""
+    payload = {
+        "instruction": normalize_text(instruction),
+        "questions": [normalize_text(_QUESTION_NUMBER_RE.sub("", q)) for q in questions],
+        "options": [normalize_text(o) for o in options],
+        "blank_counts": list(blank_counts or []),
+        "model": model_id,
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    import hashlib
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """磁盘答案缓存，支持按条数和时间淘汰"""
+
+    def __init__(self, path, max_entries=500, max_age_days=30):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # sqlite3 在创建缓存时才导入，不计入 main 的导入耗时
+        import sqlite3
+        # 答题在工作线程中执行，连接需要跨线程使用
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT,"
+                " answers TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+        self.evict()
+
+    def get(self, key):
+        """读取缓存答案，未命中或已过期时返回 None"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT answers, created FROM answers WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] > self.max_age:
+                self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, key, answers, model_id=""):
+        """写入答案（覆盖同键旧值），并按上限淘汰"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (key, model, answers, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, model_id, json.dumps(answers, ensure_ascii=False), now, now),
+            )
+        self.evict()
+
+    def invalidate(self, key):
+        """删除单条缓存，返回是否删除成功"""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM answers WHERE key = ?", (key,)).rowcount > 0
+
+    def clear(self):
+        """清空全部缓存"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM answers")
+
+    def evict(self):
+        """淘汰过期条目和超出条数上限的最久未使用条目"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM answers WHERE created < ?", (time.time() - self.max_age,))
+            self._conn.execute(
+                "DELETE FROM answers WHERE key NOT IN"
+                " (SELECT key FROM answers ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    def stats_text(self):
+        """命中统计，用于日志输出"""
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"命中 {self.hits} 次 / 未命中 {self.misses} 次（命中率 {rate:.0f}%），缓存条目 {len(self)} 条"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,1653 @@
+"""答题流水线（不依赖 Tk）：页面快照、题型判断、Prompt 构造、模型调用与解析、答案填写
+
+界面（main.py）、命令行（headless_cli.py）和离线基准测试都从这里导入同一套流程；
+进度通过事件回调报告，不直接操作任何界面组件。
+"""
+import time
+import json
+import threading
+import re
+import logging
+from dataclasses import asdict, dataclass, field
+from answer_cache import make_cache_key
+from answer_validation import merge_reasked, validate_answers
+from locators import LOCATE_JS, LocatorResolver
+from token_estimate import PromptSizeStats, estimate_tokens
+from model_stats import RoutingDecision
+from hedging import HedgeStats, hedged_call, log_hedge
+from jobs import JobCancelled, check_cancelled, run_abortable
+from page_watcher import PageWatcher
+from question_types import UNKNOWN_TYPE, QuestionTypeRegistry
+from tracing import Span
+from contextlib import contextmanager, nullcontext
+from settings import DASHSCOPE_URL, load_settings
+
+# selenium / requests / tenacity 导入较慢，均在用到的函数内延迟导入
+
+# ================== 配置参数 ==================
+# 只读取一次配置文件；配置问题记录在 SETTINGS.errors / warnings 中，由界面在窗口创建后提示
+SETTINGS = load_settings()
+
+# 支持流式调用的模型列表
+STREAMING_MODELS = [
+    "qwen3-235b-a22b"
+]
+
+# 模型选项（显示名称 → 实际 model name）
+MODEL_OPTIONS = {
+    "推理模型 Qwen3": "qwen3-235b-a22b",
+    "通义千问 Qwen-Max": "qwen-max",
+    "通义千问 Qwen-Plus": "qwen-plus",
+    "自动选择（按历史耗时）": "auto"
+}
+
+# 自动选择：按模型调用统计在下面这些模型中选择
+AUTO_MODEL = "auto"
+ROUTABLE_MODELS = [model for model in MODEL_OPTIONS.values() if model != AUTO_MODEL]
+
+# 默认使用第一个模型
+DEFAULT_MODEL = list(MODEL_OPTIONS.values())[0]
+
+# ================== 答题流水线（与界面无关） ==================
+@dataclass
+class PipelineResult:
+    """一次答题流水线运行的结果与各阶段耗时（秒）"""
+    model_id: str
+    status: str = "pending"  # filled / prepared / unknown_type / no_answers / model_error / failed
+    # 界面上选择的模型（可能为 "auto"）
+    requested_model: str = ""
+    snapshot: object = None
+    # 整页题型；多部分页面各部分题型不同时为 "mixed"，section_types 为各部分的题型
+    question_type: str = ""
+    section_types: list = field(default_factory=list)
+    # 实际询问的题目下标（多部分页面跳过未知题型的部分时使用，None 为全部）
+    asked: list = None
+    prompt: str = ""
+    answers: list = field(default_factory=list)
+    # 模型响应直接解析出的答案（校验和重新询问之前）
+    parsed_answers: list = field(default_factory=list)
+    response: object = None
+    # 流式响应片段 [[相对请求开始的秒数, "content"/"reasoning", 文本], ...]（仅录制时收集）
+    stream_chunks: list = field(default_factory=list)
+    cache_hit: bool = False
+    # 选择"自动"时的选择结果（RoutingDecision），model_id 为实际使用的模型
+    route: object = None
+    # 答案校验与重新询问的结果（AnswerValidation）
+    validation: object = None
+    fill_report: dict = None
+    error: object = None
+    timings: dict = field(default_factory=dict)
+    # 本次运行的模型调用次数（含重新询问）
+    model_calls: int = 0
+    # 是否沿用了页面监视预取的答案，以及因此省去的时间（秒）
+    speculated: bool = False
+    speculation_saved: float = 0.0
+
+    @property
+    def total_seconds(self):
+        return sum(self.timings.values())
+
+    def to_dict(self):
+        """可序列化为 JSON 的摘要"""
+        fill = None
+        if self.fill_report is not None:
+            fill = dict(self.fill_report, failed=len(self.fill_report["failed"]))
+        return {
+            "status": self.status,
+            "model": self.model_id,
+            "question_type": self.question_type,
+            "questions": len(self.snapshot.questions) if self.snapshot else 0,
+            "sections": self.section_types,
+            "model_calls": self.model_calls,
+            "prompt_chars": len(self.prompt),
+            "answers": self.answers,
+            "cache_hit": self.cache_hit,
+            "route": self.route.reason if self.route else None,
+            "invalid_answers": len(self.validation.issues) if self.validation else None,
+            "reasked": self.validation.reasked if self.validation else 0,
+            "speculated": self.speculated,
+            "fill": fill,
+            "error": f"{type(self.error).__name__}: {self.error}" if self.error else None,
+            "timings_ms": {stage: round(seconds * 1000, 2) for stage, seconds in self.timings.items()},
+        }
+
+def default_pipeline_stages():
+    """流水线各阶段的默认实现（可在创建 AnswerPipeline 时按名称替换）
+
+    snapshot(driver) → PageSnapshot
+    classify(instruction) → 题型
+    prompt(instruction, questions, options, blank_counts=..., numbers=...) → Prompt（numbers 为原题号，重新询问时使用）
+    sections_prompt(sections, questions, blank_counts, indices=...) → 多部分页面的合并 Prompt
+    model(prompt, model_id, on_event=..., client=..., cancel=...) → 响应 JSON 文本
+    parse(AIResponse) → 答案列表
+    fill(driver, answers, question_type=..., snapshot=...) → 填写报告
+    """
+    return {
+        "snapshot": take_page_snapshot,
+        "classify": determine_question_type,
+        "prompt": get_prompt_builder(SETTINGS.prompt_template),
+        "sections_prompt": build_sections_prompt,
+        "model": call_ai_hedged,
+        "parse": parse_ai_answer,
+        "fill": fill_answers_to_webpage,
+    }
+
+class AnswerPipeline:
+    """答题流水线：页面快照 → 题型判断 → 构造 Prompt → 缓存/模型 → 解析 → 填写
+
+    不依赖界面，进度通过 on_event(kind, payload) 通知订阅者：
+    snapshot / sections / question_type / prompt / route / cache_invalidated / cache / model_start / model_error /
+    prompt_size / parsed / validated / reask / repaired / speculation / fill_start / recorded / finished，
+    以及模型事件 content / reasoning / answer / attempt / done / hedge。
+    传入 model_stats（ModelStatsStore）时记录每次模型调用，并支持 model_id 为 "auto" 的自动选择；
+    传入 recorder（RunRecorder）时每次填写运行结束后保存回放用的归档。
+    """
+
+    def __init__(self, client_provider=None, tracer=None, answer_cache=None, stages=None, on_event=None,
+                 model_stats=None, recorder=None):
+        self.client_provider = client_provider or get_default_ai_client
+        self.tracer = tracer
+        self.answer_cache = answer_cache
+        self.model_stats = model_stats
+        self.recorder = recorder
+        self.prompt_sizes = PromptSizeStats()
+        self.stages = default_pipeline_stages()
+        unknown = set(stages or {}) - set(self.stages)
+        if unknown:
+            raise ValueError(f"未知的流水线阶段：{', '.join(sorted(unknown))}")
+        self.stages.update(stages or {})
+        self.on_event = on_event
+
+    def emit(self, kind, payload=None):
+        if self.on_event is not None:
+            self.on_event(kind, payload)
+
+    @contextmanager
+    def stage(self, result, name, driver=None, **attrs):
+        """记录阶段耗时到 result.timings（有 tracer 时同时写入追踪文件）"""
+        start = time.perf_counter()
+        try:
+            with self.tracer.span(name, driver=driver, **attrs) if self.tracer else nullcontext(Span(name, attrs)) as span:
+                yield span
+        finally:
+            result.timings[name] = time.perf_counter() - start
+
+    def run(self, driver, model_id, cancel=None, bypass_cache=False, fill=True, speculation=None):
+        """对当前页面运行一次完整流程，返回 PipelineResult；被取消时抛出 JobCancelled
+
+        fill 为 False 时只准备答案不填写（status 为 "prepared"，供页面监视预取）；
+        speculation 为之前预取的结果，页面内容和模型都没变时直接沿用它的答案。
+        """
+        result = PipelineResult(model_id=model_id, requested_model=model_id)
+        try:
+            self._run(driver, result, cancel, bypass_cache, fill, speculation)
+        except JobCancelled:
+            raise
+        except Exception as e:
+            result.status = "failed"
+            result.error = e
+            logging.error(f"[ERROR] 答题流程执行失败: {e}", exc_info=True)
+        if fill and self.recorder is not None:
+            self.record_run(result)
+        self.emit("finished", result)
+        return result
+
+    def _run(self, driver, result, cancel, bypass_cache, fill=True, speculation=None):
+        stages = self.stages
+        
+        # 提取题目数据（单次脚本调用完成题目、选项、空格数采集）
+        with self.stage(result, "snapshot", driver=driver) as span:
+            snapshot = stages["snapshot"](driver)
+            span.set(questions=len(snapshot.questions), blanks=sum(snapshot.blank_counts),
+                     roundtrips=snapshot.roundtrips, profile=snapshot.profile)
+        result.snapshot = snapshot
+        self.emit("snapshot", snapshot)
+        check_cancelled(cancel)
+        
+        # 页面与预取时相同则跳过题型判断到模型调用的全部阶段
+        if speculation is not None and self.reuse_speculation(result, speculation, bypass_cache):
+            answers = result.answers
+        else:
+            answers = self.prepare_answers(result, cancel, bypass_cache)
+        if fill and speculation is not None:
+            self.emit("speculation", {"hit": result.speculated, "saved": result.speculation_saved})
+        if not answers:
+            return
+        if not fill:
+            result.status = "prepared"
+            return
+        
+        # 填写答案到网页
+        check_cancelled(cancel)
+        self.emit("fill_start", answers)
+        with self.stage(result, "fill_answers", driver=driver) as span:
+            report = stages["fill"](driver, answers, question_type=self.fill_question_types(result), snapshot=snapshot)
+            span.set(inputs=report["total"], fallback=report["fallback"], failed=len(report["failed"]))
+        result.fill_report = report
+        result.status = "filled"
+
+    def prepare_answers(self, result, cancel=None, bypass_cache=False):
+        """题型判断 → 构造 Prompt → 缓存/模型 → 校验，返回答案（失败时返回空列表并设置 result.status）"""
+        stages = self.stages
+        snapshot = result.snapshot
+        
+        # 判断题型（多部分页面逐部分判断，跳过题型未知的部分）
+        with self.stage(result, "classify") as span:
+            result.section_types = [stages["classify"](section.instruction) for section in snapshot.sections]
+            span.set(sections=len(snapshot.sections))
+        known = {question_type for question_type in result.section_types if question_type != "unknown"}
+        result.question_type = known.pop() if len(known) == 1 else ("mixed" if known else "unknown")
+        if snapshot.multi_section:
+            self.emit("sections", {"sections": snapshot.sections, "types": result.section_types})
+        self.emit("question_type", result.question_type)
+        if result.question_type == "unknown":
+            result.status = "unknown_type"
+            return []
+        if "unknown" in result.section_types:
+            result.asked = [index for section, question_type in zip(snapshot.sections, result.section_types)
+                            if question_type != "unknown" for index in section.indices]
+        
+        # 构造Prompt（多部分页面合并为一个带分段标记的 Prompt）
+        with self.stage(result, "build_prompt") as span:
+            result.prompt = self.build_question_prompt(snapshot, result.asked)
+            span.set(prompt_chars=len(result.prompt), sections=len(snapshot.sections))
+        self.emit("prompt", result.prompt)
+        
+        # 自动选择模型（按 Prompt 长度和历史调用统计）
+        if result.model_id == AUTO_MODEL:
+            with self.stage(result, "route") as span:
+                result.route = self.route_model(len(result.prompt))
+                result.model_id = result.route.model
+                span.set(model=result.model_id)
+            self.emit("route", result.route)
+        
+        # 发送前估算 Prompt 的 token 数，超出预算时提示
+        self.emit("prompt_size", self.check_prompt_size(result))
+        
+        # 查询答案缓存，命中则跳过模型调用直接填写
+        with self.stage(result, "cache_lookup") as span:
+            instruction, options = snapshot.cache_fields()
+            cache_key = make_cache_key(instruction, snapshot.cleaned_questions(), options,
+                                       snapshot.blank_counts, result.model_id)
+            answers = self.lookup_cached_answers(cache_key, bypass_cache)
+            span.set(hit=answers is not None)
+        result.cache_hit = answers is not None
+        
+        if answers is None:
+            answers = self.request_answers(result, cancel)
+            if not answers:
+                if result.status != "model_error":
+                    result.status = "no_answers"
+                return []
+            # 按题号校验，缺失或格式不符的题单独重新询问后合并
+            answers = self.check_answers(result, answers, cancel)
+            if self.answer_cache is not None and result.validation.valid:
+                self.answer_cache.put(cache_key, answers, result.model_id)
+        result.answers = answers
+        return answers
+
+    def build_question_prompt(self, snapshot, indices=None):
+        """构造 Prompt：单部分页面使用所选模板，多部分页面使用合并 Prompt；indices 为只询问的题目下标（保留原题号）"""
+        questions = snapshot.cleaned_questions()
+        if snapshot.multi_section:
+            return self.stages["sections_prompt"](snapshot.sections, questions, snapshot.blank_counts, indices=indices)
+        if indices is None:
+            return self.stages["prompt"](snapshot.instruction, questions, snapshot.options,
+                                         blank_counts=snapshot.blank_counts)
+        return self.stages["prompt"](snapshot.instruction, [questions[i] for i in indices], snapshot.options,
+                                     blank_counts=[snapshot.blank_counts[i] for i in indices],
+                                     numbers=[i + 1 for i in indices])
+
+    def prompt_template(self, snapshot):
+        """Prompt 模板名称（用于统计）：多部分页面为 sections"""
+        return "sections" if snapshot.multi_section else prompt_template_name(self.stages["prompt"])
+
+    def fill_question_types(self, result):
+        """填写时使用的题型：单部分页面为整页题型，多部分页面为逐题题型列表"""
+        if not result.snapshot.multi_section:
+            return result.question_type
+        types = ["unknown"] * len(result.snapshot.questions)
+        for section, question_type in zip(result.snapshot.sections, result.section_types):
+            for index in section.indices:
+                types[index] = question_type
+        return types
+
+    def reuse_speculation(self, result, speculation, bypass_cache=False):
+        """页面内容和所选模型与之前的结果相同时沿用其答案（忽略缓存时不沿用来自缓存的答案），返回是否沿用"""
+        if (speculation.status not in ("prepared", "filled")
+                or speculation.requested_model != result.requested_model
+                or speculation.snapshot.content_key() != result.snapshot.content_key()
+                or (bypass_cache and speculation.cache_hit)):
+            return False
+        for name in ("model_id", "question_type", "section_types", "asked", "prompt", "answers", "parsed_answers",
+                     "response", "stream_chunks", "cache_hit", "route", "validation"):
+            setattr(result, name, getattr(speculation, name))
+        result.speculated = True
+        # 省去的是快照之后、填写之前的各阶段
+        result.speculation_saved = sum(seconds for stage, seconds in speculation.timings.items()
+                                       if stage not in ("snapshot", "fill_answers"))
+        return True
+
+    def lookup_cached_answers(self, cache_key, bypass_cache=False):
+        """查询答案缓存；忽略缓存时删除旧条目并返回 None"""
+        if self.answer_cache is None:
+            return None
+        if bypass_cache:
+            if self.answer_cache.invalidate(cache_key):
+                self.emit("cache_invalidated")
+            return None
+        answers = self.answer_cache.get(cache_key)
+        self.emit("cache", {"answers": answers, "stats": self.answer_cache.stats_text()})
+        return answers
+
+    def check_answers(self, result, answers, cancel=None):
+        """校验答案的题数和空格数（不在可选单词中的答案只作提示）；有问题的题按 [Validation] 配置重新询问，返回按题目对齐的答案"""
+        snapshot = result.snapshot
+        options = snapshot.question_options() if SETTINGS.validation_check_options else None
+        with self.stage(result, "validate") as span:
+            numbered = parse_numbered_answers(result.response.content)
+            if not numbered:
+                asked = result.asked if result.asked is not None else range(len(snapshot.questions))
+                numbered = {index + 1: answer for index, answer in zip(asked, answers)}
+            validation = validate_answers(numbered, snapshot.blank_counts, question_options=options,
+                                          indices=result.asked)
+            span.set(issues=len(validation.issues), warnings=len(validation.warnings))
+        validation.full_prompt_chars = len(result.prompt)
+        validation.full_prompt_tokens = result.response.input_tokens
+        result.validation = validation
+        self.emit("validated", validation)
+        # 全部无效时重新询问与完整重试无异，只对部分有效的结果做定向修复
+        while (SETTINGS.validation_reask and validation.issues and validation.valid_count
+               and validation.reask_rounds < SETTINGS.validation_max_reask_rounds):
+            check_cancelled(cancel)
+            if not self.reask(result, validation, options, cancel):
+                break
+        return validation.answers
+
+    def reask(self, result, validation, options=None, cancel=None):
+        """只就有问题的题构造 Prompt 重新询问，并合并答案；options 为逐题的可选单词，请求失败时返回 False"""
+        snapshot = result.snapshot
+        indices = sorted(validation.issues)
+        prompt = self.build_question_prompt(snapshot, indices)
+        result.model_calls += 1
+        validation.reask_rounds += 1
+        validation.reasked += len(indices)
+        self.emit("reask", {"questions": [i + 1 for i in indices], "prompt_chars": len(prompt),
+                            "full_prompt_chars": validation.full_prompt_chars})
+        try:
+            with self.stage(result, "reask", model=result.model_id, questions=len(indices),
+                            prompt_chars=len(prompt)) as span:
+                ai_response = self.stages["model"](prompt, result.model_id, client=self.client_provider(),
+                                                   cancel=cancel)
+                span.set(response_chars=len(ai_response))
+        except AIRequestError as e:
+            logging.warning(f"[WARNING] 重新询问失败（{e.kind}）：{e}")
+            return False
+        response = AIResponse(ai_response)
+        validation.reask_prompt_chars.append(len(prompt))
+        validation.reask_prompt_tokens.append(response.input_tokens)
+        fixed = merge_reasked(validation, parse_numbered_answers(response.content), snapshot.blank_counts,
+                              question_options=options)
+        self.emit("repaired", {"fixed": fixed, "validation": validation})
+        return True
+
+    def route_model(self, prompt_chars):
+        """选出历史耗时最短且成功率达标的模型；没有统计数据时使用默认模型"""
+        if self.model_stats is None:
+            return RoutingDecision(ROUTABLE_MODELS[0], "未启用模型调用统计，使用默认模型")
+        return self.model_stats.choose(ROUTABLE_MODELS, prompt_chars,
+                                       min_success_rate=SETTINGS.routing_min_success_rate,
+                                       min_samples=SETTINGS.routing_min_samples,
+                                       window=SETTINGS.routing_window,
+                                       explore_rate=SETTINGS.routing_explore_rate)
+
+    def check_prompt_size(self, result):
+        """估算当前 Prompt 的 token 数（按该模型的实际用量校准），返回 {template, model, chars, tokens, budget, over}"""
+        tokens = self.prompt_sizes.calibrate(result.model_id, estimate_tokens(result.prompt))
+        budget = SETTINGS.prompt_token_budget
+        return {
+            "template": self.prompt_template(result.snapshot),
+            "model": result.model_id,
+            "chars": len(result.prompt),
+            "tokens": tokens,
+            "budget": budget,
+            "over": bool(budget) and tokens > budget,
+        }
+
+    def record_model_call(self, result, ok, response_chars=0, error=None, hedge=None):
+        """记录一次模型调用；对冲请求由备用模型胜出时记到备用模型（耗时从备用请求发出算起），落败的主模型不记录"""
+        if self.model_stats is None:
+            return
+        model_id, seconds = result.model_id, result.timings.get("call_ai", 0.0)
+        if hedge and hedge.get("winner") == "backup":
+            model_id, seconds = hedge["model"], max(0.0, hedge["elapsed"] - hedge["backup_started_at"])
+        self.model_stats.record(model_id, seconds, ok, len(result.prompt), response_chars, error)
+
+    def request_answers(self, result, cancel=None):
+        """调用AI模型并解析答案（响应 JSON 只解析一次，界面显示与答案提取共用）"""
+        prompt, model_id = result.prompt, result.model_id
+        result.model_calls += 1
+        self.emit("model_start", model_id)
+        forward = self.capture_stream(result) if self.recorder is not None else self.emit
+        # 对冲请求的结果（哪个模型胜出），模型调用统计和 token 校准记到实际给出响应的模型
+        hedge = {}
+
+        def on_event(kind, payload):
+            if kind == "hedge":
+                hedge.update(payload)
+            forward(kind, payload)
+
+        try:
+            with self.stage(result, "call_ai", model=model_id, prompt_chars=len(prompt)) as span:
+                ai_response = self.stages["model"](prompt, model_id, on_event=on_event,
+                                                   client=self.client_provider(), cancel=cancel)
+                span.set(response_chars=len(ai_response))
+        except AIRequestError as e:
+            result.status = "model_error"
+            result.error = e
+            # 熔断拒绝在本地发生、取消由用户发起，都不是模型的失败，不计入统计
+            if e.sent and not (cancel is not None and cancel.cancelled):
+                self.record_model_call(result, False, error=e.kind, hedge=hedge)
+            self.emit("model_error", e)
+            return []
+
+        with self.stage(result, "parse_ai_answer") as span:
+            response = AIResponse(ai_response)
+            answers = self.stages["parse"](response)
+            span.set(answers=len(answers))
+        result.response = response
+        result.parsed_answers = answers
+        if not answers and response.error is not None:
+            # 状态码正常但响应体是接口错误（如 API Key 无效），与请求失败同样报告
+            result.status = "model_error"
+            result.error = response.error
+            self.record_model_call(result, False, error=result.error.kind, hedge=hedge)
+            self.emit("model_error", result.error)
+            return []
+        self.prompt_sizes.record(self.prompt_template(result.snapshot), hedge.get("model") or model_id, len(prompt),
+                                 estimate_tokens(prompt), response.input_tokens)
+        self.record_model_call(result, bool(answers), len(ai_response), error=None if answers else "no_answers",
+                               hedge=hedge)
+        self.emit("parsed", {"answers": answers, "response": response})
+        return answers
+
+    def capture_stream(self, result):
+        """转发模型事件，同时把流式片段及其相对请求开始的时间记到 result.stream_chunks
+
+        失败重试时重新记录；对冲请求由备用模型胜出时丢弃（片段来自主模型，与最终响应不符）。
+        """
+        start = time.perf_counter()
+        chunks = result.stream_chunks = []
+
+        def on_event(kind, payload):
+            if kind in ("content", "reasoning"):
+                chunks.append([round(time.perf_counter() - start, 4), kind, payload])
+            elif kind == "attempt" and payload.get("error") is not None:
+                chunks.clear()
+            elif kind == "hedge" and payload.get("winner") == "backup":
+                chunks.clear()
+            self.emit(kind, payload)
+        return on_event
+
+    def build_archive(self, result):
+        """本次运行的回放归档：快照、Prompt、原始响应与流式片段、解析出的答案、逐个输入框的填写结果"""
+        snapshot = result.snapshot
+        fill_types = self.fill_question_types(result)
+        fills = []
+        if result.fill_report is not None:
+            failed = {r["id"]: r["reason"] for r in result.fill_report["failed"]}
+            fills = [[input_id, value, input_id not in failed, failed.get(input_id, "")]
+                     for input_id, value in build_fill_entries(result.answers, snapshot, fill_types)]
+        response = result.response.raw if result.response is not None else None
+        return {
+            "status": result.status,
+            "model": result.model_id,
+            "requested_model": result.requested_model,
+            "question_type": result.question_type,
+            "section_types": result.section_types,
+            "asked": result.asked,
+            "template": self.prompt_template(snapshot),
+            "snapshot": asdict(snapshot),
+            "prompt": result.prompt,
+            "response": response if isinstance(response, str) else json.dumps(response, ensure_ascii=False),
+            "stream": result.stream_chunks,
+            "parsed_answers": result.parsed_answers,
+            "answers": result.answers,
+            "cache_hit": result.cache_hit,
+            "speculated": result.speculated,
+            "model_calls": result.model_calls,
+            "fill_types": fill_types,
+            "fill": fills,
+            "fill_report": {key: value for key, value in (result.fill_report or {}).items() if key != "failed"},
+            "timings": {stage: round(seconds, 6) for stage, seconds in result.timings.items()},
+            "error": f"{type(result.error).__name__}: {result.error}" if result.error else None,
+        }
+
+    def record_run(self, result):
+        """保存本次运行的归档（没有快照时跳过，写入失败只记日志）"""
+        if result.snapshot is None:
+            return
+        try:
+            path = self.recorder.save(self.build_archive(result))
+        except Exception as e:
+            logging.warning(f"[WARNING] 保存运行录制失败: {e}")
+            return
+        self.emit("recorded", path)
+
+class AnswerSession:
+    """把答题流水线和页面监视接到同一个任务调度器上（界面和离线基准测试共用）
+
+    watched_driver() 返回页面监视使用的 driver（不检查存活也不重连，未连接时为 None），
+    selected_model() 返回当前选择的模型（在工作线程中调用，不能访问界面组件），
+    log(message) 输出进度；watch_interval 为 None 时不启用页面监视。
+    """
+
+    def __init__(self, pipeline, scheduler, watched_driver, selected_model, log=logging.info, watch_interval=None):
+        self.pipeline = pipeline
+        self.watched_driver = watched_driver
+        self.selected_model = selected_model
+        self.log = log
+        self.watcher = None
+        if watch_interval is not None:
+            self.watcher = PageWatcher(scheduler, self.probe_page, self.speculate_answers, watch_interval).start()
+
+    def answer(self, driver, model_id, cancel=None, bypass_cache=False):
+        """点击答题：页面与预取时相同则沿用预取的答案，否则完整运行一次流水线，返回 PipelineResult"""
+        # 页面监视已预取的结果（点击时页面内容不变才会沿用）
+        speculation = self.watcher.take() if self.watcher is not None else None
+        result = self.pipeline.run(driver, model_id, cancel=cancel, bypass_cache=bypass_cache,
+                                   speculation=speculation)
+        if self.watcher is not None:
+            self.watcher.record(result, speculation)
+            self.log(f"页面监视：{self.watcher.stats_text()}")
+        return result
+
+    def probe_page(self, cancel=None):
+        """页面监视的探测任务（工作线程中调用）"""
+        from selenium.common.exceptions import WebDriverException
+        driver = self.watched_driver()
+        if driver is None:
+            return None
+        try:
+            return probe_page_state(driver)
+        except WebDriverException:
+            # 浏览器已关闭或正在跳转，等下次点击时再重连
+            return None
+
+    def speculate_answers(self, cancel, previous):
+        """页面变化并稳定后预取答案（工作线程中调用），返回 fill=False 的流水线结果"""
+        self.log("检测到页面变化，正在预取答案...")
+        tracer = self.pipeline.tracer
+        if tracer is not None:
+            tracer.new_run()
+        with tracer.span("speculate") if tracer is not None else nullcontext():
+            result = self.pipeline.run(self.watched_driver(), self.selected_model(), cancel=cancel,
+                                       fill=False, speculation=previous)
+        if result.speculated:
+            self.log("页面题目未变化，沿用已有答案")
+        elif result.status == "prepared":
+            self.log(f"预取完成：{len(result.answers)} 题，耗时 {result.total_seconds:.2f} s，点击【自动答题】时直接填写")
+        return result
+
+    def stop(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+
+# ================== 提取题目内容 ==================
+# 题目段落的绝对 XPath，仅没有快照时的逐题填写路径使用；
+# 快照、批量填写和清除通过定位方案（locators.py，可在 config.ini 中配置）查找题目容器
+QUESTIONS_XPATH = '/html/body/div[3]/div[1]/div[1]/section/section/main/div/div/div/div[3]/div/div[2]/div/div/p'
+
+# 当前页面匹配的定位方案与题目容器句柄（同一页面的后续脚本直接复用）
+LOCATORS = LocatorResolver(SETTINGS.locator_profiles)
+
+# 题型注册表（内置题型 + config.ini 中声明的题型）
+QUESTION_TYPES = QuestionTypeRegistry(SETTINGS.question_types, fuzzy_threshold=SETTINGS.question_type_fuzzy_threshold)
+
+# 题目开头的题号（如 "3. "）
+QUESTION_NUMBER_RE = re.compile(r"^\d+\.\s*")
+
+# 给输入框打上的稳定标识属性
+INPUT_ID_ATTR = "data-uai-id"
+
+# 一次性完成定位并采集指令、题目、选项、空格数和输入框标识的脚本
+# 页面有多个题目部分时，题目按部分依次排成整页列表（输入框标识按整页题目下标编号），
+# sections 记录每部分的指令、可选单词（部分内没有选项时使用整页的选项）和题目范围
+SNAPSHOT_SCRIPT = LOCATE_JS + """
+const idAttr = arguments[3];
+const located = locate(arguments[0], arguments[1], arguments[2]);
+const snapshot = {ready: false, instruction: "", questions: [], options: [], sections: [], located: locatedInfo(located)};
+const profile = located.profile;
+const textOf = el => (el.innerText || el.textContent || "").trim();
+function optionTexts(root) {
+    const texts = [];
+    for (const el of root.querySelectorAll(profile ? profile.options : 'div.option')) {
+        let text = el.textContent.trim();
+        if (!text) text = el.innerText.trim();
+        if (text) texts.push(text);
+    }
+    return texts;
+}
+snapshot.options = optionTexts(document);
+if (profile) {
+    const sections = locateSections(profile, located.container);
+    const primary = sections.find(s => s.root === located.container);
+    snapshot.ready = !!(primary && primary.instruction);
+    let index = 0;
+    for (const section of sections) {
+        const options = sections.length > 1 ? optionTexts(section.root) : [];
+        const info = {instruction: section.instruction ? textOf(section.instruction) : "", start: index,
+                      count: section.questions.length, options: options.length ? options : snapshot.options};
+        for (const p of section.questions) {
+            const i = index++;
+            const ids = [];
+            p.querySelectorAll('input').forEach((input, j) => {
+                const id = i + '-' + j;
+                input.setAttribute(idAttr, id);
+                ids.push(id);
+            });
+            snapshot.questions.push({text: textOf(p), inputs: ids});
+        }
+        snapshot.sections.push(info);
+    }
+    if (snapshot.sections.length) snapshot.instruction = snapshot.sections[0].instruction;
+}
+return snapshot;
+"""
+
+@dataclass
+class PageSection:
+    """页面上的一个题目部分：指令、可选单词，以及它的题目在整页题目列表中的范围"""
+    instruction: str = ""
+    options: list = field(default_factory=list)
+    start: int = 0
+    count: int = 0
+
+    @property
+    def indices(self):
+        return range(self.start, self.start + self.count)
+
+@dataclass
+class PageSnapshot:
+    """页面快照：一次脚本调用取回的题目结构"""
+    instruction: str = ""
+    questions: list = field(default_factory=list)
+    options: list = field(default_factory=list)
+    blank_counts: list = field(default_factory=list)
+    input_ids: list = field(default_factory=list)
+    roundtrips: int = 0
+    elapsed: float = 0.0
+    # 匹配的定位方案；locator_attempts 为重新定位时各方案的尝试结果与耗时
+    profile: str = None
+    locator_attempts: list = field(default_factory=list)
+    # 题目部分（PageSection）；只有一个部分时与 instruction / questions / options 相同
+    sections: list = field(default_factory=list)
+
+    @property
+    def multi_section(self):
+        return len(self.sections) > 1
+
+    def cleaned_questions(self):
+        """去掉题号后的题目文本"""
+        return [clean_question(q) for q in self.questions]
+
+    def question_options(self):
+        """逐题的可选单词（按题目所在部分）"""
+        options = [self.options] * len(self.questions)
+        for section in self.sections:
+            for index in section.indices:
+                options[index] = section.options
+        return options
+
+    def cache_fields(self):
+        """缓存键使用的 (指令, 可选单词)：多部分页面把各部分的指令和可选单词依次拼接"""
+        if not self.multi_section:
+            return self.instruction, self.options
+        return ("\n".join(section.instruction for section in self.sections),
+                [option for section in self.sections for option in section.options])
+
+    def content_key(self):
+        """题目内容（指令、题目、选项、空格数）的摘要，用于判断页面是否变化"""
+        instruction, options = self.cache_fields()
+        return make_cache_key(instruction, self.questions, options, self.blank_counts, "")
+
+def clean_question(question):
+    """去掉题目开头的题号"""
+    return QUESTION_NUMBER_RE.sub("", question).strip()
+
+def take_page_snapshot(driver, timeout=10, poll_interval=0.2, locators=None):
+    """用单次 execute_script 定位并采集整页题目（指令未出现时按间隔轮询）"""
+    from selenium.common.exceptions import WebDriverException
+    locators = locators or LOCATORS
+    snapshot = PageSnapshot()
+    start = time.perf_counter()
+    deadline = start + timeout
+    while True:
+        snapshot.roundtrips += 1
+        try:
+            raw = locators.run(driver, SNAPSHOT_SCRIPT, INPUT_ID_ATTR) or {}
+        except WebDriverException as e:
+            logging.warning(f"[WARNING] 页面快照失败: {e}")
+            raw = {}
+        located = raw.get("located") or {}
+        locators.update(located)
+        if located.get("attempts"):
+            snapshot.locator_attempts = located["attempts"]
+        if raw.get("ready") or time.perf_counter() >= deadline:
+            break
+        time.sleep(poll_interval)
+
+    snapshot.profile = located.get("profile")
+    snapshot.instruction = raw.get("instruction", "")
+    for question in raw.get("questions", []):
+        snapshot.questions.append(question.get("text", ""))
+        snapshot.input_ids.append(list(question.get("inputs", [])))
+    snapshot.blank_counts = [len(ids) for ids in snapshot.input_ids]
+    snapshot.options = list(raw.get("options", []))
+    snapshot.sections = [PageSection(s.get("instruction", ""), list(s.get("options", [])), s.get("start", 0), s.get("count", 0))
+                         for s in raw.get("sections", [])]
+    if not snapshot.sections:
+        snapshot.sections = [PageSection(snapshot.instruction, snapshot.options, 0, len(snapshot.questions))]
+    snapshot.elapsed = time.perf_counter() - start
+    return snapshot
+
+# 页面就绪判断：答题页以定位方案找到题目指令为准，其他页面以文档解析完成为准
+PAGE_READY_SCRIPT = LOCATE_JS + """
+const located = locate(arguments[0], arguments[1], arguments[2]);
+return {exercise: located.matched, state: document.readyState, located: locatedInfo(located)};
+"""
+
+def wait_for_page_ready(driver, timeout=10, poll_interval=0.1, locators=None):
+    """轮询直到题目指令出现或文档不再处于 loading 状态（替代固定等待），返回就绪信息"""
+    from selenium.common.exceptions import WebDriverException
+    locators = locators or LOCATORS
+    start = time.perf_counter()
+    deadline = start + timeout
+    polls = 0
+    status = {}
+    while True:
+        polls += 1
+        try:
+            status = locators.run(driver, PAGE_READY_SCRIPT) or {}
+        except WebDriverException as e:
+            logging.warning(f"[WARNING] 检查页面就绪状态失败: {e}")
+            status = {}
+        locators.update(status.get("located"))
+        ready = status.get("exercise") or status.get("state") in ("interactive", "complete")
+        if ready or time.perf_counter() >= deadline:
+            break
+        time.sleep(poll_interval)
+    return {
+        "ready": bool(ready),
+        "exercise": bool(status.get("exercise")),
+        "state": status.get("state", ""),
+        "polls": polls,
+        "elapsed": time.perf_counter() - start,
+    }
+
+# 页面监视：在题目容器上挂 MutationObserver 记录变化次数，返回 {url, exercise, page}（page 为 "观察器标识:变化次数"）
+PAGE_WATCH_SCRIPT = LOCATE_JS + """
+const located = locate(arguments[0], arguments[1], arguments[2]);
+const state = {url: location.href, exercise: located.matched, page: "", located: locatedInfo(located)};
+if (located.matched) {
+    const container = located.container;
+    if (!container.__uaiWatch) {
+        const watch = {id: Math.random().toString(36).slice(2), version: 0};
+        new MutationObserver(() => { watch.version++; }).observe(container, {childList: true, subtree: true, characterData: true});
+        container.__uaiWatch = watch;
+    }
+    state.page = container.__uaiWatch.id + ":" + container.__uaiWatch.version;
+}
+return state;
+"""
+
+def probe_page_state(driver, locators=None):
+    """页面监视的单次探测（一次往返），返回 (url, page)；不是练习页面时返回 None"""
+    locators = locators or LOCATORS
+    status = locators.run(driver, PAGE_WATCH_SCRIPT) or {}
+    locators.update(status.get("located"))
+    if not status.get("exercise"):
+        return None
+    return (status.get("url"), status.get("page"))
+
+# ================== 题型判断与处理 ==================
+def determine_question_type(instruction):
+    """判断题目类型：按说明文字在题型注册表中查找（措辞略有差异时模糊匹配），无法判断时返回 unknown"""
+    return QUESTION_TYPES.classify(instruction)
+
+# ================== AI 交互处理 ==================
+class AIRequestError(Exception):
+    """AI 接口请求失败
+
+    kind 取值：connect（连接失败）、read_timeout（读取超时）、rate_limit（429 限流）、
+    server（5xx）、auth（鉴权失败）、client（其他 4xx）、circuit_open（熔断中）、
+    invalid_stream（流式响应中有无法解析的数据，多为连接中途被截断）。
+    """
+    RETRYABLE_KINDS = ("connect", "read_timeout", "rate_limit", "server", "invalid_stream")
+    # 请求没有发出（本地拒绝）的类型，不计入模型调用统计
+    LOCAL_KINDS = ("circuit_open",)
+
+    def __init__(self, kind, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.kind = kind
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self):
+        return self.kind in self.RETRYABLE_KINDS
+
+    @property
+    def sent(self):
+        """请求是否已发往接口（熔断拒绝时为 False）"""
+        return self.kind not in self.LOCAL_KINDS
+
+def parse_retry_after(value):
+    """解析 Retry-After 响应头（秒数或 HTTP 日期），返回秒数"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def classify_error_code(code):
+    """把 DashScope 错误码映射为失败类型"""
+    if code == "InvalidApiKey":
+        return "auth"
+    if code.startswith("Throttling"):
+        return "rate_limit"
+    if code.startswith(("InternalError", "ServiceUnavailable", "RequestTimeOut")):
+        return "server"
+    return "client"
+
+def check_ai_response_status(response):
+    """检查 HTTP 状态码，失败时抛出带类型的 AIRequestError"""
+    status = response.status_code
+    if status == 200:
+        return
+    body = response.text
+    try:
+        code = json.loads(body).get("code", "") or ""
+    except (ValueError, AttributeError):
+        code = ""
+    if status in (401, 403) or code == "InvalidApiKey":
+        kind = "auth"
+    elif status == 429:
+        kind = "rate_limit"
+    elif status >= 500:
+        kind = "server"
+    else:
+        kind = classify_error_code(code) if code else "client"
+    response.close()
+    raise AIRequestError(kind, f"HTTP {status}: {body[:200]}", status=status,
+                         retry_after=parse_retry_after(response.headers.get("Retry-After")))
+
+class CircuitBreaker:
+    """熔断器：连续失败达到阈值后，在冷却时间内直接拒绝请求，冷却后放行一次试探"""
+
+    def __init__(self, failure_threshold=5, cooldown=60):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """请求前检查，熔断中则抛出 AIRequestError"""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            remaining = self.cooldown - (time.monotonic() - self.opened_at)
+            if remaining > 0:
+                raise AIRequestError("circuit_open",
+                    f"AI 接口连续失败 {self.failures} 次，已熔断，{remaining:.0f} 秒后重试")
+            # 冷却结束：半开状态，放行这一次，失败则重新计时
+            self.opened_at = None
+            self.failures = self.failure_threshold - 1
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+def is_retryable_error(error):
+    return isinstance(error, AIRequestError) and error.retryable
+
+def wait_for_retry(retry_state):
+    """重试等待：优先遵循 Retry-After，否则指数退避 + 抖动"""
+    from tenacity import wait_exponential_jitter
+    error = retry_state.outcome.exception()
+    if isinstance(error, AIRequestError) and error.retry_after is not None:
+        return min(error.retry_after, SETTINGS.ai_retry_max_wait)
+    return wait_exponential_jitter(initial=1, max=SETTINGS.ai_retry_max_wait, jitter=1)(retry_state)
+
+def call_ai_with_retry(prompt, selected_model_id, on_event=None, client=None, cancel=None):
+    """带重试的AI调用，最终失败时抛出 AIRequestError
+
+    每次尝试结束都会以 on_event("attempt", {...}) 报告次数、耗时和错误。
+    传入 cancel 时，取消会中断进行中的请求和重试等待，并抛出 JobCancelled。
+    """
+    from tenacity import Retrying, stop_after_attempt, stop_after_delay, retry_if_exception
+    client = client or get_default_ai_client()
+    emit = on_event or (lambda kind, payload: None)
+    retrying = Retrying(
+        stop=stop_after_attempt(SETTINGS.ai_max_attempts) | stop_after_delay(SETTINGS.ai_retry_budget),
+        wait=wait_for_retry,
+        retry=retry_if_exception(is_retryable_error),
+        reraise=True,
+        **({"sleep": cancel.sleep} if cancel is not None else {})
+    )
+    for attempt in retrying:
+        with attempt:
+            check_cancelled(cancel)
+            number = attempt.retry_state.attempt_number
+            start = time.perf_counter()
+            try:
+                result = call_ai(prompt, selected_model_id, on_event=on_event, client=client, cancel=cancel)
+            except AIRequestError as e:
+                elapsed = time.perf_counter() - start
+                logging.warning(f"[WARNING] AI 调用第 {number} 次失败（{e.kind}，{elapsed:.2f} s）：{e}")
+                emit("attempt", {"attempt": number, "elapsed": elapsed, "error": e})
+                raise
+            elapsed = time.perf_counter() - start
+            logging.info(f"AI 调用第 {number} 次成功，耗时 {elapsed:.2f} s")
+            emit("attempt", {"attempt": number, "elapsed": elapsed, "error": None})
+            return result
+
+# 对冲请求统计（整个程序生命周期内累计）
+HEDGE_STATS = HedgeStats()
+
+def is_parseable_response(ai_response):
+    """响应能否解析出答案（对冲请求以此判断胜出）"""
+    return bool(parse_ai_answer(AIResponse(ai_response)))
+
+def call_ai_hedged(prompt, selected_model_id, on_event=None, client=None, cancel=None):
+    """按 [Hedge] 配置对冲的 AI 调用：主模型 delay 秒内没有可解析的答案时，同时请求备用模型
+
+    先返回可解析答案的一方胜出，另一方被取消；只转发主模型的流式事件，结束后以 on_event("hedge", {...})
+    报告是否触发、胜出模型和估计节省的时间。未启用或备用模型与主模型相同时等同于 call_ai_with_retry。
+    """
+    backup_model_id = SETTINGS.hedge_backup_model
+    if not SETTINGS.hedge_enabled or not backup_model_id or backup_model_id == selected_model_id:
+        return call_ai_with_retry(prompt, selected_model_id, on_event=on_event, client=client, cancel=cancel)
+    client = client or get_default_ai_client()
+    emit = on_event or (lambda kind, payload: None)
+
+    def primary(token):
+        # 主请求被取消后不再转发它的事件
+        forward = lambda kind, payload: None if token.cancelled else emit(kind, payload)
+        return call_ai_with_retry(prompt, selected_model_id, on_event=forward, client=client, cancel=token)
+
+    def backup(token):
+        return call_ai_with_retry(prompt, backup_model_id, client=client, cancel=token)
+
+    def report(info):
+        saved = HEDGE_STATS.record(info)
+        log_hedge(info, selected_model_id, backup_model_id, saved)
+        winner = {"primary": selected_model_id, "backup": backup_model_id}.get(info["winner"])
+        emit("hedge", dict(info, model=winner, saved=saved, stats=HEDGE_STATS.stats_text()))
+
+    info = {}
+    try:
+        result, _ = hedged_call(primary, backup, SETTINGS.hedge_delay, is_parseable_response, cancel=cancel,
+                                info=info)
+    except AIRequestError:
+        # 两个请求都失败：同样记录并报告对冲的触发情况，再抛出主请求的异常
+        report(info)
+        raise
+    report(info)
+    return result
+
+class DashScopeClient:
+    """DashScope 接口客户端：长连接 Session + 连接池，请求头只构建一次"""
+
+    def __init__(self, api_key, endpoint=DASHSCOPE_URL, connect_timeout=5, read_timeout=30, pool_size=4):
+        import requests
+        import requests.adapters
+        self.endpoint = endpoint
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)  # 本地替身服务器
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "User-Agent": "AnswerBot/1.0",
+            "Connection": "keep-alive"
+        })
+        # 流式请求额外需要的请求头
+        self.stream_headers = {"Accept": "text/event-stream", "X-DashScope-SSE": "enable"}
+        self.breaker = CircuitBreaker(SETTINGS.ai_breaker_threshold, SETTINGS.ai_breaker_cooldown)
+
+    def build_payload(self, prompt, selected_model_id, stream=False):
+        """构造请求体（已编码为 UTF-8 字节）"""
+        parameters = {"enable_thinking": False, "result_format": "text"}
+        if stream:
+            parameters["stream"] = True
+            parameters["incremental_output"] = True
+        payload = {"model": selected_model_id, "input": {"prompt": prompt}, "parameters": parameters}
+        return json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+    def post(self, prompt, selected_model_id, on_event=None, cancel=None):
+        """发送推理请求，返回响应 JSON 文本（流式响应会被合并为同样的格式）
+
+        失败时抛出按类型区分的 AIRequestError，并计入熔断器；被取消时抛出 JobCancelled（不计入熔断器）。
+        """
+        self.breaker.before_call()
+        try:
+            result = self._post(prompt, selected_model_id, on_event=on_event, cancel=cancel)
+        except AIRequestError as e:
+            if e.retryable:
+                self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def _post(self, prompt, selected_model_id, on_event=None, cancel=None):
+        try:
+            return self._send(prompt, selected_model_id, on_event=on_event, cancel=cancel)
+        except Exception as e:
+            # 取消时关闭响应会让读取中途出错，统一报告为取消
+            if cancel is not None and cancel.cancelled and not isinstance(e, JobCancelled):
+                raise JobCancelled() from e
+            raise
+
+    def _send(self, prompt, selected_model_id, on_event=None, cancel=None):
+        import requests
+        stream = selected_model_id in STREAMING_MODELS
+        try:
+            # 等待响应头期间可被取消；被放弃的请求返回后直接关闭响应
+            response = run_abortable(lambda: self.session.post(
+                url=self.endpoint,
+                headers=self.stream_headers if stream else None,
+                data=self.build_payload(prompt, selected_model_id, stream=stream),
+                timeout=self.timeout,
+                stream=stream
+            ), cancel, on_abandoned=lambda abandoned: abandoned.close())
+            if cancel is not None:
+                # 读取流式响应期间取消：关闭响应，中断读取
+                cancel.on_cancel(response.close)
+            check_ai_response_status(response)
+            if stream:
+                return read_ai_stream(response, on_event=on_event)
+            return response.text
+        except requests.exceptions.ConnectTimeout as e:
+            raise AIRequestError("connect", f"连接超时：{e}") from e
+        except requests.exceptions.ReadTimeout as e:
+            raise AIRequestError("read_timeout", f"读取超时：{e}") from e
+        except requests.exceptions.RequestException as e:
+            raise AIRequestError("connect", f"网络异常：{e}") from e
+
+    def warm(self):
+        """预先建立 DNS/TCP/TLS 连接并放入连接池，返回耗时（秒）"""
+        import requests
+        start = time.perf_counter()
+        try:
+            self.session.head(self.endpoint, timeout=self.timeout).close()
+        except requests.exceptions.RequestException as e:
+            logging.warning(f"[WARNING] 预热 AI 接口连接失败: {e}")
+            return None
+        return time.perf_counter() - start
+
+    def warm_async(self, callback=None):
+        """后台线程预热连接，完成后以耗时调用 callback"""
+        def worker():
+            elapsed = self.warm()
+            if callback:
+                callback(elapsed)
+        threading.Thread(target=worker, daemon=True).start()
+
+    def close(self):
+        self.session.close()
+
+_default_ai_client = None
+
+def get_default_ai_client():
+    """未显式传入客户端时使用的全局客户端"""
+    global _default_ai_client
+    if _default_ai_client is None:
+        _default_ai_client = create_ai_client()
+    return _default_ai_client
+
+def create_ai_client():
+    """按 config.ini 创建 AI 接口客户端"""
+    return DashScopeClient(
+        SETTINGS.dashscope_api_key,
+        endpoint=SETTINGS.ai_endpoint,
+        connect_timeout=SETTINGS.ai_connect_timeout,
+        read_timeout=SETTINGS.ai_read_timeout,
+        pool_size=SETTINGS.ai_pool_size
+    )
+
+def call_ai(prompt, selected_model_id, on_event=None, client=None, cancel=None):
+    """调用AI接口进行推理
+
+    on_event(kind, payload) 用于接收流式进度：
+    "content"/"reasoning" 为文本增量，"answer" 为刚完成的一行答案，"done" 为耗时统计。
+    失败时抛出 AIRequestError，被 cancel 取消时抛出 JobCancelled。
+    """
+    client = client or get_default_ai_client()
+    return client.post(prompt, selected_model_id, on_event=on_event, cancel=cancel)
+
+def parse_sse_data(data):
+    """解析一个 SSE 事件的 data 字段，不是合法 JSON 时抛出可重试的 AIRequestError"""
+    try:
+        return json.loads(data)
+    except json.JSONDecodeError as e:
+        raise AIRequestError("invalid_stream", f"invalid stream payload: {e}: {data[:200]}") from e
+
+def iter_sse_events(response):
+    """逐条读取 SSE 事件，产出每个 data 字段解析后的 JSON"""
+    data_lines = []
+    for raw_line in response.iter_lines(decode_unicode=False):
+        line = raw_line.decode('utf-8', errors='replace') if isinstance(raw_line, bytes) else raw_line
+        if not line:
+            # 空行表示一个事件结束
+            if data_lines:
+                yield parse_sse_data("\n".join(data_lines))
+                data_lines = []
+            continue
+        if line.startswith("data:"):
+            data_lines.append(line[5:].lstrip())
+    if data_lines:
+        yield parse_sse_data("\n".join(data_lines))
+
+def read_ai_stream(response, on_event=None):
+    """增量消费流式响应，返回与非流式接口格式一致的 JSON 文本"""
+    emit = on_event or (lambda kind, payload: None)
+    start = time.perf_counter()
+    timing = {"first_token": None, "first_answer": None, "total": None}
+
+    parser = IncrementalAnswerParser()
+    content_parts, reasoning_parts = [], []
+    last_event = {}
+    try:
+        for event in iter_sse_events(response):
+            last_event = event
+            if event.get("code") and "output" not in event:
+                code = event["code"]
+                raise AIRequestError(classify_error_code(code), f"{code}: {event.get('message', '')}")
+            output = event.get("output", {})
+            content, reasoning = output.get("text") or "", output.get("reasoning_content") or ""
+            if "choices" in output:
+                message = output["choices"][0].get("message", {})
+                content = message.get("content") or ""
+                reasoning = message.get("reasoning_content") or ""
+            if (content or reasoning) and timing["first_token"] is None:
+                timing["first_token"] = time.perf_counter() - start
+            if reasoning:
+                reasoning_parts.append(reasoning)
+                emit("reasoning", reasoning)
+            if content:
+                content_parts.append(content)
+                emit("content", content)
+                for answer in parser.feed(content):
+                    if timing["first_answer"] is None:
+                        timing["first_answer"] = time.perf_counter() - start
+                    emit("answer", answer)
+        for answer in parser.finish():
+            if timing["first_answer"] is None:
+                timing["first_answer"] = time.perf_counter() - start
+            emit("answer", answer)
+    finally:
+        response.close()
+        timing["total"] = time.perf_counter() - start
+        emit("done", timing)
+
+    result = {"output": {"text": "".join(content_parts), "reasoning_content": "".join(reasoning_parts)}}
+    for key in ("usage", "request_id"):
+        if key in last_event:
+            result[key] = last_event[key]
+    return json.dumps(result, ensure_ascii=False)
+
+PROMPT_HEADER = """
+你是一个英语填空题解答助手。我会给你一段题目内容，请你根据提供的可选单词，填写每个空格中最合适的词。
+题目内容如下：
+"""
+PROMPT_ANSWER_FORMAT = """
+请严格按照以下格式输出答案，不要添加任何额外解释或内容：
+答案：
+"""
+
+def build_prompt(instruction, questions, options, blank_counts=None, numbers=None):
+    """构建发送给AI的提示词（各段收集到列表后一次性拼接）
+
+    numbers 为各题的题号，默认从 1 开始连续编号；只询问部分题目时传入原题号，答案可按题号合并。
+    """
+    cleaned_questions = [clean_question(q) for q in questions]
+    numbers = list(numbers) if numbers is not None else list(range(1, len(questions) + 1))
+    parts = [
+        PROMPT_HEADER,
+        "\n".join([f"{n}. {q}" for n, q in zip(numbers, cleaned_questions)]),
+        "\n可选单词如下：\n",
+        ", ".join(options),
+        "\n"
+    ]
+    if blank_counts:
+        parts.append("\n请根据以下空格数量填写答案：\n")
+        parts.extend([f"第 {n} 题有 {count} 个空格\n" for n, count in zip(numbers, blank_counts)])
+    parts.append(PROMPT_ANSWER_FORMAT)
+    for i, n in enumerate(numbers):
+        if blank_counts and blank_counts[i] > 0:
+            parts.append(f"{n}. {'|'.join(['word/phrase'] * blank_counts[i])}\n")
+        else:
+            parts.append(f"{n}. word\n")
+    return "".join(parts)
+
+COMPACT_PROMPT_HEADER = "英语填空：用可选单词填空（可按需变形）。题号后 [n] 为该题空格数。\n"
+COMPACT_PROMPT_ANSWER_FORMAT = "\n只输出答案，每题一行，写成“题号. 答案”，多个空用 | 分隔：\n答案：\n"
+
+def build_compact_prompt(instruction, questions, options, blank_counts=None, numbers=None):
+    """紧凑模板：空格数写在题号后（如 "3.[2] ..."），不再逐题列出空格数和答案占位行"""
+    numbers = list(numbers) if numbers is not None else list(range(1, len(questions) + 1))
+    parts = [COMPACT_PROMPT_HEADER]
+    for i, (n, question) in enumerate(zip(numbers, questions)):
+        count = blank_counts[i] if blank_counts and blank_counts[i] > 0 else 1
+        parts.append(f"{n}.[{count}] {clean_question(question)}\n")
+    parts.append("可选单词：" + ", ".join(options) + "\n")
+    parts.append(COMPACT_PROMPT_ANSWER_FORMAT)
+    return "".join(parts)
+
+SECTIONS_PROMPT_HEADER = """
+你是一个英语填空题解答助手。下面的题目分为几个部分，每部分有各自的说明和可选单词，请只用该部分的可选单词（可按需变形）填写每个空格中最合适的词。
+题号在各部分之间连续编号，题号后 [n] 为该题空格数。
+"""
+SECTIONS_PROMPT_ANSWER_FORMAT = """
+请严格按照以下格式输出全部答案，每题一行，写成“题号. 答案”，多个空用 | 分隔，不要添加任何额外解释或内容：
+答案：
+"""
+
+def build_sections_prompt(sections, questions, blank_counts, indices=None):
+    """多部分页面的合并 Prompt：各部分依次列出说明、题目和可选单词，题号为整页题目下标 + 1
+
+    indices 为要询问的题目下标（默认全部）；某部分没有要询问的题时整段省略。
+    """
+    wanted = set(range(len(questions))) if indices is None else set(indices)
+    parts = [SECTIONS_PROMPT_HEADER]
+    for number, section in enumerate(sections, 1):
+        items = [i for i in section.indices if i in wanted]
+        if not items:
+            continue
+        parts.append(f"\n=== 第 {number} 部分 ===\n说明：{section.instruction}\n")
+        for i in items:
+            count = blank_counts[i] if blank_counts[i] > 0 else 1
+            parts.append(f"{i + 1}.[{count}] {clean_question(questions[i])}\n")
+        parts.append("可选单词：" + ", ".join(section.options) + "\n")
+    parts.append(SECTIONS_PROMPT_ANSWER_FORMAT)
+    return "".join(parts)
+
+# Prompt 模板（[Prompt] template 选择）
+PROMPT_TEMPLATES = {
+    "verbose": build_prompt,
+    "compact": build_compact_prompt,
+}
+
+def get_prompt_builder(name):
+    """按名称取 Prompt 模板，未知名称时使用默认模板"""
+    builder = PROMPT_TEMPLATES.get(name)
+    if builder is None:
+        logging.warning(f"[WARNING] 未知的 Prompt 模板: {name}，使用 verbose")
+        return build_prompt
+    return builder
+
+def prompt_template_name(builder):
+    for name, template in PROMPT_TEMPLATES.items():
+        if template is builder:
+            return name
+    return getattr(builder, "__name__", "custom")
+
+class AIResponse:
+    """AI 响应：只解析一次 JSON，供界面显示和答案提取共用"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.data = None
+        if isinstance(raw, dict):
+            self.data = raw
+        elif isinstance(raw, str):
+            text = raw.strip()
+            if text.startswith("{"):
+                try:
+                    self.data = json.loads(text)
+                except json.JSONDecodeError:
+                    self.data = None
+
+    @property
+    def output(self):
+        return (self.data or {}).get('output', {})
+
+    @property
+    def content(self):
+        return self.output.get('text', '')
+
+    @property
+    def reasoning(self):
+        return self.output.get('reasoning_content', '')
+
+    @property
+    def error(self):
+        """响应体中的接口错误（如 InvalidApiKey），以 AIRequestError 返回；没有时为 None"""
+        data = self.data or {}
+        code = data.get('code')
+        if not code or 'output' in data:
+            return None
+        return AIRequestError(classify_error_code(code), f"{code}: {data.get('message', '')}")
+
+    @property
+    def input_tokens(self):
+        """接口返回的输入 token 数（响应中没有 usage 时为 None）"""
+        return ((self.data or {}).get('usage') or {}).get('input_tokens')
+
+def parse_ai_answer(ai_response):
+    """解析AI返回的JSON格式答案"""
+    try:
+        # 统一处理各种响应格式
+        result = None
+        
+        if isinstance(ai_response, AIResponse):
+            result = ai_response.data  # 已解析过的响应，直接复用
+        elif isinstance(ai_response, dict):
+            result = ai_response  # 已是字典格式，直接使用
+        elif isinstance(ai_response, str):
+            ai_response = ai_response.strip()
+            if ai_response.startswith("{"):
+                try:
+                    result = json.loads(ai_response)  # 尝试解析为 JSON
+                except json.JSONDecodeError:
+                    result = None
+            else:
+                result = None
+        else:
+            result = None
+
+        # 检查是否是 API Key 错误（可能在工作线程或对冲线程中调用，错误由调用方经 AIResponse.error 报告）
+        if result and 'code' in result and result['code'] == 'InvalidApiKey':
+            logging.error("[ERROR] API Key 无效，请检查 DashScope 配置")
+            return []
+
+        # 后续正常解析流程
+        answer_text = ""
+        if result:
+            if 'output' in result:
+                answer_text = result['output'].get('text', '').strip()
+            elif 'choices' in result:
+                answer_text = result['choices'][0]['message'].get('content', '').strip()
+
+        if not answer_text:
+            return []
+
+        if ANSWER_MARKER in answer_text:
+            answer_text = answer_text.split(ANSWER_MARKER, 1)[1].strip()
+
+        lines = answer_text.splitlines()
+        answers = []
+        for line in lines:
+            answer = parse_answer_line(line)
+            if answer is not None:
+                answers.append(answer)
+
+        return answers
+
+    except Exception as e:
+        logging.error(f"[ERROR] 解析 AI 回答失败: {e}", exc_info=True)
+        return []
+
+ANSWER_MARKER = "答案："
+ANSWER_LINE_RE = re.compile(r'^\s*(\d+)\.\s*(.+)$')
+
+def parse_answer_line(line):
+    """解析单行答案，如 "3. word|phrase"；空行或无法解析时返回 None"""
+    line = line.strip()
+    if not line:
+        return None
+    match = ANSWER_LINE_RE.match(line)
+    if match:
+        index, content = match.groups()
+        return [ans.strip() for ans in content.split("|")]
+    logging.warning(f"[WARNING] 无法解析行: {line}")
+    return None
+
+def parse_numbered_answers(text):
+    """按题号解析答案文本，返回 {题号: 答案列表}（同一题号只保留第一次出现的答案）"""
+    if ANSWER_MARKER in text:
+        text = text.split(ANSWER_MARKER, 1)[1]
+    numbered = {}
+    for line in text.splitlines():
+        match = ANSWER_LINE_RE.match(line.strip())
+        if match:
+            number, content = match.groups()
+            numbered.setdefault(int(number), [ans.strip() for ans in content.split("|")])
+    return numbered
+
+class IncrementalAnswerParser:
+    """增量答案解析器：流式文本每完成一行答案就立即产出
+
+    解析规则与 parse_ai_answer 一致：出现“答案：”时只解析其后的内容；
+    若整段输出都没有“答案：”，则在 finish() 时按全文解析。
+    """
+
+    def __init__(self):
+        self.answers = []
+        self._text = ""
+        self._cursor = None
+
+    def feed(self, delta):
+        """追加一段文本，返回新完成的答案行"""
+        self._text += delta
+        if self._cursor is None:
+            marker_pos = self._text.find(ANSWER_MARKER)
+            if marker_pos < 0:
+                return []
+            self._cursor = marker_pos + len(ANSWER_MARKER)
+        new_answers = []
+        while True:
+            newline = self._text.find("\n", self._cursor)
+            if newline < 0:
+                break
+            answer = parse_answer_line(self._text[self._cursor:newline])
+            self._cursor = newline + 1
+            if answer is not None:
+                new_answers.append(answer)
+        self.answers.extend(new_answers)
+        return new_answers
+
+    def finish(self):
+        """流结束时解析剩余内容，返回新完成的答案行"""
+        if self._cursor is None:
+            self._cursor = 0
+        tail = self._text[self._cursor:]
+        self._cursor = len(self._text)
+        new_answers = [a for a in map(parse_answer_line, tail.splitlines()) if a is not None]
+        self.answers.extend(new_answers)
+        return new_answers
+
+# ================== 答案填写逻辑 ==================
+# 写值并触发前端框架监听的 input/change 事件（绕过框架对 value 属性的劫持）
+SET_VALUE_JS = """
+function setValue(el, value) {
+    if (!el) return 'missing';
+    if (el.disabled || el.readOnly) return 'readonly';
+    const proto = Object.getPrototypeOf(el);
+    const desc = Object.getOwnPropertyDescriptor(proto, 'value')
+        || Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value');
+    desc.set.call(el, value);
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+    return el.value === value ? '' : 'mismatch';
+}
+"""
+
+# 按输入框标识批量写值（在题目容器内查找），返回每个输入框的结果
+BULK_FILL_SCRIPT = SET_VALUE_JS + LOCATE_JS + """
+const idAttr = arguments[3];
+const entries = arguments[4];
+const located = locate(arguments[0], arguments[1], arguments[2]);
+const root = located.container || document;
+const report = [];
+for (const [id, value] of entries) {
+    const selector = '[' + idAttr + '="' + id + '"]';
+    const el = root.querySelector(selector) || document.querySelector(selector);
+    const reason = setValue(el, value);
+    report.push({id: id, ok: reason === '', reason: reason});
+}
+return {report: report, located: locatedInfo(located)};
+"""
+
+# 清空所有题目部分内的输入框（同时补打输入框标识，供回退路径使用）
+BULK_CLEAR_SCRIPT = SET_VALUE_JS + LOCATE_JS + """
+const idAttr = arguments[3];
+const located = locate(arguments[0], arguments[1], arguments[2]);
+const report = [];
+if (located.profile) {
+    let i = 0;
+    for (const section of locateSections(located.profile, located.container)) {
+        for (const p of section.questions) {
+            p.querySelectorAll('input').forEach((input, j) => {
+                const id = i + '-' + j;
+                input.setAttribute(idAttr, id);
+                const reason = setValue(input, '');
+                report.push({id: id, ok: reason === '', reason: reason});
+            });
+            i++;
+        }
+    }
+}
+return {report: report, located: locatedInfo(located)};
+"""
+
+def find_input_by_id(driver, input_id):
+    """按快照标识定位输入框"""
+    from selenium.webdriver.common.by import By
+    return driver.find_element(By.CSS_SELECTOR, f'[{INPUT_ID_ATTR}="{input_id}"]')
+
+def fill_inputs_bulk(driver, entries, locators=None):
+    """单次脚本调用批量写入输入框，entries 为 [(输入框标识, 值), ...]"""
+    from selenium.common.exceptions import WebDriverException
+    if not entries:
+        return []
+    locators = locators or LOCATORS
+    try:
+        result = locators.run(driver, BULK_FILL_SCRIPT, INPUT_ID_ATTR, [list(e) for e in entries]) or {}
+        locators.update(result.get("located"))
+        return result.get("report", [])
+    except WebDriverException as e:
+        logging.warning(f"[WARNING] 批量填写脚本执行失败: {e}")
+        return [{"id": input_id, "ok": False, "reason": "script_error"} for input_id, _ in entries]
+
+def fill_inputs_with_keys(driver, entries):
+    """逐个 clear + send_keys 写入输入框（批量写入失败时的回退路径）"""
+    report = []
+    for input_id, value in entries:
+        try:
+            input_box = find_input_by_id(driver, input_id)
+            input_box.clear()
+            if value:
+                input_box.send_keys(value)
+            report.append({"id": input_id, "ok": True, "reason": ""})
+        except Exception as e:
+            report.append({"id": input_id, "ok": False, "reason": str(e)})
+    return report
+
+def fill_inputs(driver, entries, bulk=True):
+    """写入输入框：先走批量脚本，失败的输入框再用 send_keys 回退"""
+    entries = list(entries)
+    if not bulk:
+        report = fill_inputs_with_keys(driver, entries)
+        return {"total": len(entries), "bulk": 0, "fallback": sum(r["ok"] for r in report),
+                "failed": [r for r in report if not r["ok"]]}
+
+    bulk_report = fill_inputs_bulk(driver, entries)
+    ok_ids = {r["id"] for r in bulk_report if r.get("ok")}
+    retry_entries = [(input_id, value) for input_id, value in entries if input_id not in ok_ids]
+    fallback_report = fill_inputs_with_keys(driver, retry_entries)
+    return {"total": len(entries), "bulk": len(ok_ids), "fallback": sum(r["ok"] for r in fallback_report),
+            "failed": [r for r in fallback_report if not r["ok"]]}
+
+def clear_inputs_bulk(driver, locators=None):
+    """单次脚本调用清空题目区域的所有输入框，失败的再逐个 clear"""
+    from selenium.common.exceptions import WebDriverException
+    locators = locators or LOCATORS
+    try:
+        result = locators.run(driver, BULK_CLEAR_SCRIPT, INPUT_ID_ATTR) or {}
+        locators.update(result.get("located"))
+        bulk_report = result.get("report", [])
+    except WebDriverException as e:
+        logging.warning(f"[WARNING] 批量清除脚本执行失败: {e}")
+        bulk_report = []
+    ok_count = sum(1 for r in bulk_report if r.get("ok"))
+    retry_entries = [(r["id"], "") for r in bulk_report if not r.get("ok")]
+    fallback_report = fill_inputs_with_keys(driver, retry_entries)
+    return {"total": len(bulk_report), "bulk": ok_count, "fallback": sum(r["ok"] for r in fallback_report),
+            "failed": [r for r in fallback_report if not r["ok"]]}
+
+def format_fill_report(report):
+    """格式化填写结果，用于日志输出"""
+    message = f"共 {report['total']} 个输入框，批量写入 {report['bulk']} 个，send_keys 回退 {report['fallback']} 个"
+    if report["failed"]:
+        failed = ", ".join(f"{r['id']}({r['reason']})" for r in report["failed"])
+        message += f"，失败 {len(report['failed'])} 个：{failed}"
+    return message
+
+def fill_answers_to_webpage(driver, answers, question_type="single_blank_per_question", snapshot=None, bulk=True):
+    """将答案填写到网页对应输入框，返回填写结果（格式同 fill_inputs；没有答案时为空结果）"""
+    if not answers:
+        logging.info("没有可填写的答案")
+        return {"total": 0, "bulk": 0, "fallback": 0, "failed": []}
+
+    # 有快照时直接按输入框标识定位，不再从根节点逐题查找
+    if snapshot is not None:
+        return fill_answers_by_snapshot(driver, answers, snapshot, question_type, bulk=bulk)
+
+    # 没有快照时按题目段落的 XPath 逐题查找输入框，由题型处理器决定填写哪些（均为 send_keys 写入）
+    handler = QUESTION_TYPES.handler(question_type)
+    report = {"total": 0, "bulk": 0, "fallback": 0, "failed": []}
+    for index, answer in enumerate(answers):
+        if not answer:
+            continue
+        question_xpath = f'{QUESTIONS_XPATH}[{index + 1}]'
+        try:
+            input_boxes = handler.select_inputs(handler.find_inputs(driver, question_xpath))
+        except Exception as e:
+            logging.warning(f"[WARNING] 第 {index + 1} 题未找到输入框：{e} | XPath: {question_xpath}")
+            report["total"] += 1
+            report["failed"].append({"id": f"{index}-*", "ok": False, "reason": str(e)})
+            continue
+        for i, input_box in enumerate(input_boxes):
+            report["total"] += 1
+            try:
+                input_box.clear()
+                if i < len(answer):
+                    input_box.send_keys(answer[i])
+                report["fallback"] += 1
+            except Exception as e:
+                logging.warning(f"[WARNING] 第 {index + 1} 题第 {i + 1} 空填写失败：{e}")
+                report["failed"].append({"id": f"{index}-{i}", "ok": False, "reason": str(e)})
+    return report
+
+def build_fill_entries(answers, snapshot, question_type="single_blank_per_question"):
+    """把答案结构展开为 [(输入框标识, 值), ...]；question_type 可以是逐题的题型列表（多部分页面）"""
+    types = question_type if isinstance(question_type, list) else [question_type] * len(answers)
+    entries = []
+    for index, answer in enumerate(answers):
+        if index >= len(snapshot.input_ids) or not answer:
+            continue
+        handler = QUESTION_TYPES.handler(types[index] if index < len(types) else UNKNOWN_TYPE)
+        entries.extend(handler.fill_entries(answer, snapshot.input_ids[index]))
+    return entries
+
+def fill_answers_by_snapshot(driver, answers, snapshot, question_type="single_blank_per_question", bulk=True):
+    """按快照中的输入框标识填写答案，返回填写结果"""
+    return fill_inputs(driver, build_fill_entries(answers, snapshot, question_type), bulk=bulk)
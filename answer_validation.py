@@ -0,0 +1,144 @@
+"""答案校验：按题号对齐模型答案，检查缺题、空格数和可选单词，找出需要重新询问的题目
+
+答案不在可选单词中只作提示：题目允许变形（took / take、looked forward to / look forward to），
+按前缀判断的词形变化并不可靠，这类题不重新询问，也不妨碍写入答案缓存。
+"""
+from dataclasses import dataclass, field
+
+# 问题类型（用于日志输出）
+ISSUE_LABELS = {
+    "missing": "缺失",
+    "blank_count": "空格数不符",
+    "empty": "含空答案",
+    "not_in_options": "不在可选单词中",
+}
+# 只作提示、不需要重新询问的问题类型
+WARNING_ISSUES = frozenset({"not_in_options"})
+
+
+def normalize_word(text):
+    return " ".join(str(text).lower().split())
+
+
+def matches_option(item, options):
+    """答案是否来自可选单词；允许规则的词形变化（如 abandon → abandoned），不规则变化无法识别"""
+    word = normalize_word(item)
+    for option in options:
+        option = normalize_word(option)
+        if word == option:
+            return True
+        # 词形变化只改变词尾：共享除最后两个字母外的前缀（至少 4 个字母）
+        stem = option[:max(4, len(option) - 2)]
+        if len(option) >= 4 and word.startswith(stem):
+            return True
+    return False
+
+
+@dataclass
+class AnswerValidation:
+    """校验结果：answers 按题目顺序对齐（缺失的题为空列表），issues 为需要重新询问的 {题目下标: 问题类型}，
+    warnings 为只作提示的 {题目下标: 问题类型}"""
+    answers: list
+    issues: dict = field(default_factory=dict)
+    warnings: dict = field(default_factory=dict)
+    # 重新询问的轮数与题数；完整 Prompt 和每轮重新询问 Prompt 的字符数、输入 token（响应没有 usage 时为 None）
+    reask_rounds: int = 0
+    reasked: int = 0
+    full_prompt_chars: int = 0
+    full_prompt_tokens: int = None
+    reask_prompt_chars: list = field(default_factory=list)
+    reask_prompt_tokens: list = field(default_factory=list)
+    # 实际询问的题数（多部分页面跳过未知题型的部分时少于 answers 的长度）
+    asked: int = None
+
+    @property
+    def valid(self):
+        return not self.issues
+
+    @property
+    def total(self):
+        return len(self.answers) if self.asked is None else self.asked
+
+    @property
+    def valid_count(self):
+        return self.total - len(self.issues)
+
+    def issue_summary(self):
+        return _summarize(self.issues)
+
+    def warning_summary(self):
+        return _summarize(self.warnings)
+
+    def chars_saved(self):
+        """与每轮都重新发送完整 Prompt 相比少发送的字符数"""
+        return self.full_prompt_chars * len(self.reask_prompt_chars) - sum(self.reask_prompt_chars)
+
+    def tokens_saved(self):
+        """与每轮都重新发送完整 Prompt 相比节省的输入 token（缺少 usage 时返回 None）"""
+        tokens = self.reask_prompt_tokens
+        if self.full_prompt_tokens is None or not tokens or None in tokens:
+            return None
+        return self.full_prompt_tokens * len(tokens) - sum(tokens)
+
+
+def _summarize(issues):
+    counts = {}
+    for issue in issues.values():
+        counts[issue] = counts.get(issue, 0) + 1
+    return "，".join(f"{ISSUE_LABELS.get(issue, issue)} {count} 题" for issue, count in counts.items())
+
+
+def check_answer(answer, blank_count, options=None):
+    """检查单题答案，返回问题类型，没有问题时返回 None"""
+    if not answer:
+        return "missing"
+    if blank_count and len(answer) != blank_count:
+        return "blank_count"
+    if any(not item.strip() for item in answer):
+        return "empty"
+    if options and not all(matches_option(item, options) for item in answer):
+        return "not_in_options"
+    return None
+
+
+def _options_for(index, options, question_options):
+    return question_options[index] if question_options is not None else options
+
+
+def validate_answers(numbered, blank_counts, options=None, question_options=None, indices=None):
+    """按题号校验答案；numbered 为 {题号(从 1 开始): 答案列表}
+
+    question_options 为逐题的可选单词（多部分页面各部分不同），给出时代替 options；
+    indices 为实际询问的题目下标（默认全部），其余题目答案为空且不算问题。
+    """
+    asked = set(range(len(blank_counts))) if indices is None else set(indices)
+    answers, issues, warnings = [], {}, {}
+    for index, blank_count in enumerate(blank_counts):
+        if index not in asked:
+            answers.append([])
+            continue
+        answer = numbered.get(index + 1) or []
+        issue = check_answer(answer, blank_count, _options_for(index, options, question_options))
+        if issue in WARNING_ISSUES:
+            warnings[index] = issue
+        elif issue is not None:
+            issues[index] = issue
+        answers.append(answer)
+    return AnswerValidation(answers, issues, warnings, asked=None if indices is None else len(asked))
+
+
+def merge_reasked(validation, numbered, blank_counts, options=None, question_options=None):
+    """把重新询问得到的答案合并进校验结果，返回本轮修复的题数"""
+    fixed = 0
+    for index in list(validation.issues):
+        answer = numbered.get(index + 1) or []
+        issue = check_answer(answer, blank_counts[index], _options_for(index, options, question_options))
+        if issue is None or issue in WARNING_ISSUES:
+            validation.answers[index] = answer
+            del validation.issues[index]
+            if issue is not None:
+                validation.warnings[index] = issue
+            fixed += 1
+        elif answer:
+            validation.issues[index] = issue
+    return fixed
@@ -0,0 +1,30 @@
+"""文件日志：日志记录先放入队列，由后台线程写入按大小轮转的日志文件，不阻塞界面和工作线程"""
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+def setup_logging(path, max_bytes=1_000_000, backup_count=3, level=logging.INFO):
+    """给根 logger 配置 QueueHandler + 轮转文件日志；已配置过时不做任何事（同 logging.basicConfig）"""
+    root = logging.getLogger()
+    if root.handlers:
+        return None
+    file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                       encoding='utf-8', delay=True)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+    listener.start()
+    atexit.register(stop_listener, listener)
+    return listener
+
+
+def stop_listener(listener):
+    """写完队列中剩余的日志并停止后台线程（可重复调用）"""
+    if listener._thread is not None:
+        listener.stop()
@@ -0,0 +1 @@
+"""离线性能基准：假 WebDriver、本地模型替身服务器和基准脚本"""
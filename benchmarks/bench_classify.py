@@ -0,0 +1,113 @@
+"""题型判断微基准：题型注册表（签名索引 + 模糊匹配缓存）对比原来的逐条字符串比较
+
+先校验两者对已知说明的判断完全一致，并列出原实现判为 unknown、注册表能识别的改写说明，
+再分别计时：签名命中、首次模糊匹配（未缓存）、之后同一说明的缓存命中，以及无法识别的说明。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.bench_classify
+    python -m benchmarks.bench_classify --repeat 7 --number 20000
+"""
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+
+# ---------- 原实现（作为正确性与性能基线，逐行保留） ----------
+def legacy_determine_question_type(instruction):
+    single_blank_keywords = [
+        "Fill in the blanks with the words given below. Change the form where necessary. Each word can be used only once.",
+        "Fill in the blanks with the expressions given below. Change the form where necessary. Each expression can be used only once."
+    ]
+    multi_blanks_keyword = "Fill in the blanks by selecting suitable words from the word bank. You may not use any of the words more than once."
+    if any(keyword == instruction for keyword in single_blank_keywords):
+        return "single_blank_per_question"
+    elif multi_blanks_keyword == instruction:
+        return "multiple_blanks_per_question"
+    else:
+        return "unknown"
+
+
+# 改写的说明：(说明, 期望题型)
+VARIANTS = [
+    ("Fill in the blanks with the words given below.  Change the form where necessary. Each word can be used only once",
+     "single_blank_per_question"),
+    ("fill in the blanks with the words given below. change the form where necessary. each word can be used only once.",
+     "single_blank_per_question"),
+    ("Fill in the blanks with the word given below. Change the forms where necessary. Each word can only be used once.",
+     "single_blank_per_question"),
+    ("Fill in the blanks by selecting suitable words from the word bank. You may not use any of the words more than once!",
+     "multiple_blanks_per_question"),
+    ("Fill in the blanks by selecting the suitable words from the word bank. You may not use any word more than once.",
+     "multiple_blanks_per_question"),
+    ("Translate the following sentences into English.", "unknown"),
+]
+
+
+def best_of(func, repeat, number):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+def run(args):
+    from question_types import BUILTIN_HANDLERS, QuestionTypeRegistry
+
+    logging.disable(logging.INFO)
+    known = [instruction for handler in BUILTIN_HANDLERS for instruction in handler.instructions]
+    registry = QuestionTypeRegistry(fuzzy_threshold=args.threshold)
+    for instruction in known:
+        assert registry.classify(instruction) == legacy_determine_question_type(instruction), "已知说明的判断与原实现不一致"
+    print(f"known instructions={len(known)} fuzzy_threshold={args.threshold}")
+    print("known instructions identical: yes")
+    print(f"{'variant':<60}{'legacy':>30}{'registry':>30}{'how':>7}{'score':>7}")
+    for instruction, expected in VARIANTS:
+        match = QuestionTypeRegistry(fuzzy_threshold=args.threshold).match(instruction)
+        mark = "" if match.name == expected else "  ✗"
+        print(f"{instruction[:57] + '...':<60}{legacy_determine_question_type(instruction):>30}{match.name:>30}"
+              f"{match.how:>7}{match.score:>7.2f}{mark}")
+
+    near_miss = VARIANTS[2][0]
+    unknown = VARIANTS[-1][0]
+
+    def first_fuzzy():
+        # 每次新建注册表，测量未缓存时的模糊匹配
+        QuestionTypeRegistry(fuzzy_threshold=args.threshold).classify(near_miss)
+
+    build_time = best_of(lambda: QuestionTypeRegistry(fuzzy_threshold=args.threshold), args.repeat, args.number // 10)
+    cases = [
+        ("exact", lambda: legacy_determine_question_type(known[-1]), lambda: registry.classify(known[-1])),
+        ("near miss (first)", None, first_fuzzy),
+        ("near miss (cached)", None, lambda: registry.classify(near_miss)),
+        ("unknown (cached)", lambda: legacy_determine_question_type(unknown), lambda: registry.classify(unknown)),
+    ]
+    results = []
+    print(f"{'case':<22}{'legacy':>12}{'registry':>12}")
+    for name, legacy, optimized in cases:
+        number = args.number // 10 if legacy is None else args.number
+        legacy_time = best_of(legacy, args.repeat, number) if legacy else None
+        optimized_time = best_of(optimized, args.repeat, number)
+        if name == "near miss (first)":
+            optimized_time -= build_time
+        results.append((name, legacy_time, optimized_time))
+        legacy_text = f"{legacy_time * 1e6:>10.2f}us" if legacy_time is not None else f"{'-':>12}"
+        print(f"{name:<22}{legacy_text}{optimized_time * 1e6:>10.2f}us")
+    print(registry.stats_text())
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="题型判断微基准")
+    parser.add_argument("--threshold", type=float, default=0.9, help="模糊匹配的最低相似度")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=10000)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""离线端到端基准：假 WebDriver + 本地 DashScope 替身，无需浏览器、网络和 API Key
+
+用法（在项目根目录执行）：
+    python -m benchmarks.bench_pipeline --runs 20 --questions 10 --blanks 2
+    python -m benchmarks.bench_pipeline --stream --model-latency 0.3 --rate-limit-rate 0.2
+    python -m benchmarks.bench_pipeline --page benchmarks/fixtures/multi_blank_sample.json
+    python -m benchmarks.bench_pipeline --slow-rate 0.2 --slow-latency 1 --hedge-delay 0.2
+    python -m benchmarks.bench_pipeline --drop-rate 0.1 [--no-reask]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.mock_dashscope import MockDashScopeServer
+
+BENCH_CONFIG = """[Settings]
+chrome_driver_path = chromedriver
+dashscope_api_key = sk-offline-benchmark
+
+[AI]
+endpoint = {endpoint}
+
+[Cache]
+enabled = false
+
+[Hedge]
+enabled = {hedge_enabled}
+delay = {hedge_delay}
+backup_model = {backup_model}
+
+[Validation]
+reask = {reask}
+"""
+
+
+def prepare_environment(workdir, endpoint, args):
+    """写入基准专用 config.ini 并切换工作目录（日志和追踪文件写在这里），须在导入 answer_pipeline 之前调用"""
+    config_path = os.path.join(workdir, "config.ini")
+    with open(config_path, "w", encoding="utf-8") as f:
+        f.write(BENCH_CONFIG.format(endpoint=endpoint, hedge_enabled=args.hedge_delay is not None,
+                                    hedge_delay=args.hedge_delay or 0, backup_model=args.backup_model,
+                                    reask=not args.no_reask))
+    os.environ["UAI_TOOL_CONFIG"] = config_path
+    os.chdir(workdir)
+
+
+def summarize(values):
+    from tracing import percentile
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else 0.0,
+    }
+
+
+def run_benchmark(args, server, workdir):
+    # 这些模块在导入时读取配置，必须在 prepare_environment 之后导入
+    import answer_pipeline
+    from answer_cache import AnswerCache
+    from benchmarks.fake_driver import FakeDriver, FakePage
+    from headless_cli import print_event
+    from tracing import Tracer, instrument_driver
+
+    if args.page:
+        page = FakePage.load(args.page)
+    else:
+        page = FakePage.synthetic(args.questions, args.blanks, seed=args.seed)
+    driver = instrument_driver(FakeDriver(page, latency=args.driver_latency))
+
+    model_id = args.model or (answer_pipeline.STREAMING_MODELS[0] if args.stream else "qwen-max")
+    client = answer_pipeline.DashScopeClient("sk-offline-benchmark", endpoint=server.url,
+                                  connect_timeout=2, read_timeout=args.read_timeout)
+    client.session.trust_env = False  # 不走系统代理，保证纯本地
+    answer_cache = AnswerCache(os.path.join(workdir, "answer_cache.db")) if args.cache else None
+    tracer = Tracer(os.path.join(workdir, "bench.trace.jsonl"))
+    pipeline = answer_pipeline.AnswerPipeline(client_provider=lambda: client, tracer=tracer, answer_cache=answer_cache,
+                                              on_event=print_event if args.verbose else None)
+
+    latencies, roundtrips, model_requests, filled = [], [], [], []
+    total_inputs = len(driver.all_input_ids())
+    bench_start = time.perf_counter()
+    for _ in range(args.runs):
+        driver.values.clear()
+        commands_before, requests_before = driver.commands, server.requests
+        start = time.perf_counter()
+        tracer.new_run()
+        with tracer.span("run_auto_answer", driver=driver):
+            pipeline.run(driver, model_id)
+        latencies.append((time.perf_counter() - start) * 1000)
+        roundtrips.append(driver.commands - commands_before)
+        model_requests.append(server.requests - requests_before)
+        filled.append(sum(1 for value in driver.values.values() if value))
+    elapsed = time.perf_counter() - bench_start
+    tracer.close()
+
+    return {
+        "runs": args.runs,
+        "questions": len(page.questions),
+        "inputs": total_inputs,
+        "model": model_id,
+        "stream": model_id in answer_pipeline.STREAMING_MODELS,
+        "throughput_runs_per_s": args.runs / elapsed if elapsed else 0.0,
+        "latency_ms": summarize(latencies),
+        "webdriver_roundtrips_per_run": sum(roundtrips) / len(roundtrips),
+        "model_requests_per_run": sum(model_requests) / len(model_requests),
+        "injected_5xx": server.errors_injected,
+        "injected_429": server.rate_limited,
+        "filled_inputs_per_run": sum(filled) / len(filled),
+        "injected_slow": server.slow_injected,
+        "dropped_lines": server.dropped,
+        "requests_by_model": dict(server.requests_by_model),
+        "hedge": {
+            "requests": answer_pipeline.HEDGE_STATS.requests,
+            "triggered": answer_pipeline.HEDGE_STATS.triggered,
+            "wins": dict(answer_pipeline.HEDGE_STATS.wins),
+            "saved_s": answer_pipeline.HEDGE_STATS.saved_seconds,
+        } if answer_pipeline.SETTINGS.hedge_enabled else None,
+        "stages_ms": {stage: {"n": n, "p50": p50, "p95": p95}
+                      for stage, (n, p50, p95) in tracer.summary().items()},
+    }
+
+
+def print_report(result):
+    latency = result["latency_ms"]
+    print(f"runs={result['runs']} questions={result['questions']} inputs={result['inputs']} "
+          f"model={result['model']} stream={result['stream']}")
+    print(f"throughput: {result['throughput_runs_per_s']:.2f} runs/s")
+    print(f"latency: p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms, "
+          f"p99 {latency['p99']:.1f} ms, max {latency['max']:.1f} ms")
+    print(f"webdriver roundtrips/run: {result['webdriver_roundtrips_per_run']:.1f}")
+    print(f"model requests/run: {result['model_requests_per_run']:.2f} "
+          f"(injected 5xx: {result['injected_5xx']}, 429: {result['injected_429']})")
+    print(f"filled inputs/run: {result['filled_inputs_per_run']:.1f} / {result['inputs']}")
+    if result["dropped_lines"]:
+        print(f"dropped answer lines: {result['dropped_lines']}")
+    if result["injected_slow"]:
+        print(f"injected slow responses: {result['injected_slow']}")
+    hedge = result["hedge"]
+    if hedge is not None:
+        print(f"hedge: triggered {hedge['triggered']}/{hedge['requests']}, wins primary {hedge['wins']['primary']} "
+              f"backup {hedge['wins']['backup']}, saved ~{hedge['saved_s']:.2f} s "
+              f"(requests by model: {result['requests_by_model']})")
+    print("stages:")
+    for stage, stats in result["stages_ms"].items():
+        print(f"  {stage:<16} n={stats['n']:<4} p50={stats['p50']:8.1f} ms  p95={stats['p95']:8.1f} ms")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="离线端到端答题流程基准测试")
+    parser.add_argument("--runs", type=int, default=20, help="运行次数")
+    parser.add_argument("--questions", type=int, default=10, help="合成页面的题目数")
+    parser.add_argument("--blanks", type=int, default=1, help="每题空格数（>1 为多空题）")
+    parser.add_argument("--page", help="录制页面 JSON（指定后忽略 --questions/--blanks）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--driver-latency", type=float, default=0.002, help="每条 WebDriver 命令的模拟往返延迟（秒）")
+    parser.add_argument("--model", help="模型 ID（默认 qwen-max，--stream 时为流式模型）")
+    parser.add_argument("--stream", action="store_true", help="使用流式模型")
+    parser.add_argument("--model-latency", type=float, default=0.05, help="模型首字节延迟（秒）")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="流式输出每行之间的延迟（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="注入 500 的概率")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="注入 429 的概率")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="长尾响应（额外延迟）的概率")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="长尾响应的额外延迟（秒）")
+    parser.add_argument("--hedge-delay", type=float, help="启用对冲请求：主模型超过该时间（秒）后请求备用模型")
+    parser.add_argument("--backup-model", default="qwen-plus", help="对冲请求的备用模型")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="每题答案行被漏掉的概率")
+    parser.add_argument("--no-reask", action="store_true", help="关闭有问题题目的重新询问")
+    parser.add_argument("--read-timeout", type=float, default=30)
+    parser.add_argument("--cache", action="store_true", help="启用答案缓存")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    parser.add_argument("--verbose", action="store_true", help="输出流水线事件")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.page:
+        args.page = os.path.abspath(args.page)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    server = MockDashScopeServer(latency=args.model_latency, chunk_delay=args.chunk_delay,
+                                 error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                                 seed=args.seed, slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+                                 drop_rate=args.drop_rate)
+    with server, tempfile.TemporaryDirectory(prefix="uai-bench-") as workdir:
+        cwd = os.getcwd()
+        prepare_environment(workdir, server.url, args)
+        try:
+            result = run_benchmark(args, server, workdir)
+        finally:
+            os.chdir(cwd)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        print_report(result)
+    return result
+
+
+if __name__ == "__main__":
+    main()
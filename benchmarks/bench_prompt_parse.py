@@ -0,0 +1,207 @@
+"""纯函数微基准：build_prompt 与 parse_ai_answer 的优化实现对比原实现
+
+使用大规模合成输入（数百道题、多空行、长推理文本），先校验新旧实现输出完全一致
+（Prompt 逐字节相同、答案结构相同），再分别计时。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.bench_prompt_parse
+    python -m benchmarks.bench_prompt_parse --questions 500 --repeat 20
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import timeit
+
+BENCH_CONFIG = """[Settings]
+chrome_driver_path = chromedriver
+dashscope_api_key = sk-offline-benchmark
+
+[Cache]
+enabled = false
+"""
+
+
+# ---------- 原实现（作为正确性与性能基线，逐行保留） ----------
+def legacy_build_prompt(instruction, questions, options, blank_counts=None):
+    cleaned_questions = [re.sub(r"^\d+\.\s*", "", q).strip() for q in questions]
+    questions_block = "\n".join([f"{i+1}. {cleaned_questions[i]}" for i in range(len(cleaned_questions))])
+    options_block = ", ".join(options)
+    prompt = f"""
+你是一个英语填空题解答助手。我会给你一段题目内容，请你根据提供的可选单词，填写每个空格中最合适的词。
+题目内容如下：
+{questions_block}
+可选单词如下：
+{options_block}
+"""
+    if blank_counts:
+        prompt += "\n请根据以下空格数量填写答案：\n"
+        for i, count in enumerate(blank_counts):
+            prompt += f"第 {i+1} 题有 {count} 个空格\n"
+    prompt += """
+请严格按照以下格式输出答案，不要添加任何额外解释或内容：
+答案：
+"""
+    for i in range(len(questions)):
+        if blank_counts and blank_counts[i] > 0:
+            placeholder = "|".join(["word/phrase"] * blank_counts[i])
+            prompt += f"{i+1}. {placeholder}\n"
+        else:
+            prompt += f"{i+1}. word\n"
+    return prompt
+
+
+def legacy_parse_ai_answer(ai_response):
+    result = None
+    if isinstance(ai_response, dict):
+        result = ai_response
+    elif isinstance(ai_response, str):
+        ai_response = ai_response.strip()
+        if ai_response.startswith("{"):
+            try:
+                result = json.loads(ai_response)
+            except json.JSONDecodeError:
+                result = None
+    if result and 'code' in result and result['code'] == 'InvalidApiKey':
+        return []
+    answer_text = ""
+    if result:
+        if 'output' in result:
+            answer_text = result['output'].get('text', '').strip()
+        elif 'choices' in result:
+            answer_text = result['choices'][0]['message'].get('content', '').strip()
+    if not answer_text:
+        return []
+    if "答案：" in answer_text:
+        answer_text = answer_text.split("答案：", 1)[1].strip()
+    answers = []
+    for line in answer_text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = re.match(r'^\s*(\d+)\.\s*(.+)$', line)
+        if match:
+            index, content = match.groups()
+            answers.append([ans.strip() for ans in content.split("|")])
+        else:
+            logging.warning(f"[WARNING] 无法解析行: {line}")
+    return answers
+
+
+def legacy_display_and_parse(raw):
+    """原流程：界面显示时 json.loads 一次，parse_ai_answer 内部再解析一次"""
+    result_json = json.loads(raw) if isinstance(raw, str) and raw.startswith("{") else {}
+    content = result_json.get('output', {}).get('text', '')
+    return content, legacy_parse_ai_answer(raw)
+
+
+# ---------- 合成输入 ----------
+def make_inputs(question_count, max_blanks, reasoning_chars, seed=0):
+    rng = random.Random(seed)
+    words = [f"word{i}" for i in range(400)]
+    blank_counts = [rng.randint(1, max_blanks) for _ in range(question_count)]
+    questions = [
+        f"{i + 1}. " + " ____ ".join(" ".join(rng.choices(words, k=8)) for _ in range(count + 1))
+        for i, count in enumerate(blank_counts)
+    ]
+    options = rng.sample(words, min(len(words), sum(blank_counts)))
+    answer_lines = [f"{i + 1}. " + " | ".join(rng.choices(options, k=count)) for i, count in enumerate(blank_counts)]
+    preamble = "\n".join(f"思考 {i}: " + " ".join(rng.choices(words, k=12)) for i in range(question_count // 4))
+    reasoning = ("Let me think step by step. " * (reasoning_chars // 27 + 1))[:reasoning_chars]
+    raw = json.dumps({
+        "output": {"text": preamble + "\n答案：\n" + "\n\n".join(answer_lines), "reasoning_content": reasoning},
+        "usage": {"input_tokens": 1000, "output_tokens": 2000},
+        "request_id": "bench",
+    }, ensure_ascii=False)
+    return questions, options, blank_counts, raw
+
+
+def best_of(func, repeat, number):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+def run(args):
+    import answer_pipeline
+
+    logging.disable(logging.WARNING)
+    questions, options, blank_counts, raw = make_inputs(args.questions, args.max_blanks, args.reasoning_chars, args.seed)
+    instruction = "Fill in the blanks by selecting suitable words from the word bank."
+
+    # 正确性校验：原始题目与已清洗题目两种输入都要逐字节一致
+    cleaned = [answer_pipeline.clean_question(q) for q in questions]
+    for source in (questions, cleaned):
+        for counts in (blank_counts, None):
+            expected = legacy_build_prompt(instruction, source, options, blank_counts=counts)
+            actual = answer_pipeline.build_prompt(instruction, source, options, blank_counts=counts)
+            assert actual.encode("utf-8") == expected.encode("utf-8"), "build_prompt 输出与原实现不一致"
+    legacy_content, legacy_answers = legacy_display_and_parse(raw)
+    response = answer_pipeline.AIResponse(raw)
+    assert response.content == legacy_content, "AIResponse.content 与原实现不一致"
+    assert answer_pipeline.parse_ai_answer(response) == legacy_answers, "parse_ai_answer 结果与原实现不一致"
+    assert answer_pipeline.parse_ai_answer(raw) == legacy_answers, "parse_ai_answer(str) 结果与原实现不一致"
+
+    def new_display_and_parse():
+        parsed = answer_pipeline.AIResponse(raw)
+        return parsed.content, answer_pipeline.parse_ai_answer(parsed)
+
+    cases = [
+        ("build_prompt",
+         lambda: legacy_build_prompt(instruction, cleaned, options, blank_counts=blank_counts),
+         lambda: answer_pipeline.build_prompt(instruction, cleaned, options, blank_counts=blank_counts)),
+        ("parse_ai_answer(str)",
+         lambda: legacy_parse_ai_answer(raw),
+         lambda: answer_pipeline.parse_ai_answer(raw)),
+        ("display + parse",
+         lambda: legacy_display_and_parse(raw),
+         new_display_and_parse),
+    ]
+    results = []
+    for name, legacy, optimized in cases:
+        legacy_time = best_of(legacy, args.repeat, args.number)
+        optimized_time = best_of(optimized, args.repeat, args.number)
+        results.append((name, legacy_time, optimized_time))
+
+    print(f"questions={args.questions} max_blanks={args.max_blanks} "
+          f"prompt={len(answer_pipeline.build_prompt(instruction, cleaned, options, blank_counts))} chars "
+          f"response={len(raw)} chars answers={len(legacy_answers)}")
+    print("outputs identical: yes")
+    print(f"{'case':<22}{'legacy':>12}{'optimized':>12}{'speedup':>10}")
+    for name, legacy_time, optimized_time in results:
+        print(f"{name:<22}{legacy_time * 1e6:>10.1f}us{optimized_time * 1e6:>10.1f}us"
+              f"{legacy_time / optimized_time:>9.2f}x")
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="build_prompt / parse_ai_answer 微基准")
+    parser.add_argument("--questions", type=int, default=300, help="题目数")
+    parser.add_argument("--max-blanks", type=int, default=4, help="每题最多空格数")
+    parser.add_argument("--reasoning-chars", type=int, default=50000, help="推理文本长度")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--number", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="uai-bench-") as workdir:
+        config_path = os.path.join(workdir, "config.ini")
+        with open(config_path, "w", encoding="utf-8") as f:
+            f.write(BENCH_CONFIG)
+        os.environ.setdefault("UAI_TOOL_CONFIG", config_path)
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            return run(args)
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Prompt 模板对比：各模板在录制页面和合成页面上的 Prompt 大小（字符数 / 估算 token）
+
+每个页面用各模板构造 Prompt，校验 Prompt 中没有遗漏信息：每道题（去掉题号后）、该题的空格数
+和每个可选单词都出现在 Prompt 中；再交给本地替身模型按 Prompt 作答，确认 parse_ai_answer 解析出每道题的答案。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.bench_prompt_templates
+    python -m benchmarks.bench_prompt_templates --questions 50 --blanks 3
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks.mock_dashscope import answer_for_prompt
+
+BENCH_CONFIG = """[Settings]
+chrome_driver_path = chromedriver
+dashscope_api_key = sk-offline-benchmark
+
+[Cache]
+enabled = false
+"""
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_pages(args):
+    """录制页面 + 合成页面：[(名称, FakePage), ...]（多部分页面使用合并 Prompt，不参与模板对比）"""
+    from benchmarks.fake_driver import FakePage
+    pages = [(os.path.basename(path), FakePage.load(path))
+             for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.json")))]
+    pages = [(name, page) for name, page in pages if len(page.sections) == 1]
+    for blanks in sorted({1, args.blanks}):
+        pages.append((f"synthetic {args.questions}q x {blanks}", FakePage.synthetic(args.questions, blanks, seed=args.seed)))
+    return pages
+
+
+def missing_content(template, prompt, questions, blank_counts, options):
+    """Prompt 中缺少的题目、空格数和可选单词（空列表表示完整）"""
+    import answer_pipeline
+    missing = []
+    for n, (question, count) in enumerate(zip(questions, blank_counts), 1):
+        cleaned = answer_pipeline.clean_question(question)
+        if cleaned not in prompt:
+            missing.append(f"第 {n} 题题目")
+        count = max(count, 1)
+        blanks = f"{n}.[{count}] {cleaned}" if template == "compact" else f"第 {n} 题有 {count} 个空格"
+        if blanks not in prompt:
+            missing.append(f"第 {n} 题空格数")
+    missing.extend(f"可选单词 {option}" for option in options if option not in prompt)
+    return missing
+
+
+def run(args):
+    import answer_pipeline
+    from token_estimate import estimate_tokens
+
+    rows = []
+    for name, page in load_pages(args):
+        questions = [text for text, _ in page.questions]
+        blank_counts = [blanks for _, blanks in page.questions]
+        for template, builder in answer_pipeline.PROMPT_TEMPLATES.items():
+            prompt = builder(page.instruction, questions, page.options, blank_counts=blank_counts)
+            missing = missing_content(template, prompt, questions, blank_counts, page.options)
+            assert not missing, f"{name}: {template} 模板缺少 {', '.join(missing[:5])}"
+            raw = json.dumps({"output": {"text": answer_for_prompt(prompt)}}, ensure_ascii=False)
+            answers = answer_pipeline.parse_ai_answer(raw)
+            assert len(answers) == len(questions), f"{name}: {template} 模板答案题数不符"
+            rows.append((name, template, len(prompt), estimate_tokens(prompt)))
+
+    baseline = {name: (chars, tokens) for name, template, chars, tokens in rows if template == "verbose"}
+    print("questions, blank counts and options present in every template: yes")
+    print(f"{'page':<30}{'template':<10}{'chars':>8}{'tokens':>8}{'saved':>9}")
+    for name, template, chars, tokens in rows:
+        base_tokens = baseline[name][1]
+        saved = (base_tokens - tokens) / base_tokens * 100 if base_tokens else 0.0
+        print(f"{name:<30}{template:<10}{chars:>8}{tokens:>8}{saved:>8.1f}%")
+    return rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Prompt 模板大小对比")
+    parser.add_argument("--questions", type=int, default=30, help="合成页面的题目数")
+    parser.add_argument("--blanks", type=int, default=2, help="合成多空题页面每题空格数")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="uai-bench-") as workdir:
+        config_path = os.path.join(workdir, "config.ini")
+        with open(config_path, "w", encoding="utf-8") as f:
+            f.write(BENCH_CONFIG)
+        os.environ.setdefault("UAI_TOOL_CONFIG", config_path)
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            return run(args)
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
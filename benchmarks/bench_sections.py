@@ -0,0 +1,122 @@
+"""多部分页面基准：一次合并请求答完整页 vs 逐部分答题（每部分单独一次快照、请求和填写）
+
+逐部分答题用只含该部分的单部分页面模拟原来每次只能答第一个题目区域、需要多次手动答题的情况。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.bench_sections
+    python -m benchmarks.bench_sections --page benchmarks/fixtures/multi_section_sample.json --runs 10
+    python -m benchmarks.bench_sections --sections 4 --questions 8 --model-latency 0.5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_pipeline import summarize
+from benchmarks.mock_dashscope import MockDashScopeServer
+
+BENCH_CONFIG = """[Settings]
+chrome_driver_path = chromedriver
+dashscope_api_key = sk-offline-benchmark
+
+[AI]
+endpoint = {endpoint}
+
+[Cache]
+enabled = false
+"""
+
+
+def load_page(args):
+    from benchmarks.fake_driver import FakePage
+    if args.page:
+        return FakePage.load(args.page)
+    # 单空题和多空题部分交替
+    return FakePage.combine([FakePage.synthetic(args.questions, 1 + i % 2, seed=args.seed + i)
+                             for i in range(args.sections)])
+
+
+def section_pages(page):
+    """把多部分页面拆成各部分的单部分页面"""
+    from benchmarks.fake_driver import FakePage
+    return [FakePage(section["instruction"], page.questions[section["start"]:section["start"] + section["count"]],
+                     section["options"], page.url) for section in page.sections]
+
+
+def run_page(pipeline, pages, args):
+    """依次答完 pages（每页一次流水线运行），返回 (耗时秒, 模型调用次数, 已填写输入框数)"""
+    from benchmarks.fake_driver import FakeDriver
+    elapsed, calls, filled = 0.0, 0, 0
+    for page in pages:
+        driver = FakeDriver(page, latency=args.driver_latency)
+        start = time.perf_counter()
+        result = pipeline.run(driver, args.model)
+        elapsed += time.perf_counter() - start
+        calls += result.model_calls
+        filled += sum(1 for value in driver.values.values() if value)
+    return elapsed, calls, filled
+
+
+def run(args, server):
+    import answer_pipeline
+
+    client = answer_pipeline.DashScopeClient("sk-offline-benchmark", endpoint=server.url, connect_timeout=2, read_timeout=30)
+    client.session.trust_env = False
+    pipeline = answer_pipeline.AnswerPipeline(client_provider=lambda: client)
+    page = load_page(args)
+    modes = {"batched": [page], "per-section": section_pages(page)}
+    results = {}
+    for name, pages in modes.items():
+        times, calls, filled = [], 0, 0
+        for _ in range(args.runs):
+            elapsed, run_calls, run_filled = run_page(pipeline, pages, args)
+            times.append(elapsed * 1000)
+            calls += run_calls
+            filled += run_filled
+        results[name] = {"latency_ms": summarize(times), "model_calls_per_page": calls / args.runs,
+                         "filled_per_page": filled / args.runs}
+    inputs = sum(blanks for _, blanks in page.questions)
+    print(f"sections={len(page.sections)} questions={len(page.questions)} inputs={inputs} "
+          f"model={args.model} runs={args.runs}")
+    for name, result in results.items():
+        latency = result["latency_ms"]
+        print(f"{name:<12} page total p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms; "
+              f"model calls/page {result['model_calls_per_page']:.1f}; filled {result['filled_per_page']:.0f}/{inputs}")
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="多部分页面合并请求基准测试")
+    parser.add_argument("--page", help="录制的多部分页面 JSON（指定后忽略 --sections/--questions）")
+    parser.add_argument("--sections", type=int, default=3, help="合成页面的部分数")
+    parser.add_argument("--questions", type=int, default=8, help="合成页面每部分的题目数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=5, help="每种方式的运行次数")
+    parser.add_argument("--model", default="qwen-max", help="模型 ID")
+    parser.add_argument("--driver-latency", type=float, default=0.002, help="每条 WebDriver 命令的模拟往返延迟（秒）")
+    parser.add_argument("--model-latency", type=float, default=0.3, help="模型首字节延迟（秒）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.page:
+        args.page = os.path.abspath(args.page)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    server = MockDashScopeServer(latency=args.model_latency, seed=args.seed)
+    with server, tempfile.TemporaryDirectory(prefix="uai-bench-") as workdir:
+        cwd = os.getcwd()
+        config_path = os.path.join(workdir, "config.ini")
+        with open(config_path, "w", encoding="utf-8") as f:
+            f.write(BENCH_CONFIG.format(endpoint=server.url))
+        os.environ["UAI_TOOL_CONFIG"] = config_path
+        os.chdir(workdir)
+        try:
+            return run(args, server)
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
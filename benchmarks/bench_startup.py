@@ -0,0 +1,139 @@
+"""启动耗时预算检查：导入 main 的耗时、首个窗口显示耗时，以及导入时不应加载的重量级依赖
+
+每项都在独立子进程中测量多次取中位数；耗时在子进程内部计时（从导入开始），不受解释器启动时间的波动影响。
+超出 benchmarks/startup_budget.json 中的预算时以非零状态码退出。没有图形界面（无 DISPLAY）
+时跳过首个窗口的测量。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --budget my_budget.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_budget.json")
+
+BENCH_CONFIG = """[Settings]
+chrome_driver_path = chromedriver
+dashscope_api_key = sk-offline-benchmark
+
+[Cache]
+enabled = false
+"""
+
+# 子进程最后一行输出耗时（毫秒）
+IMPORT_CODE = "import time; start = time.perf_counter(); import main; print((time.perf_counter() - start) * 1000)"
+LOADED_MODULES_CODE = (
+    "import json, sys, main; "
+    "print(json.dumps(sorted({{m.split('.')[0] for m in sys.modules}} & set({modules!r}))))"
+)
+# 只做到窗口完成首次布局绘制，不进入主循环（避免启动检查弹窗阻塞测量）
+FIRST_WINDOW_CODE = (
+    "import time; start = time.perf_counter(); import tkinter as tk, main; "
+    "root = tk.Tk(); app = main.AutoAnswerGUI(root); root.update_idletasks(); "
+    "elapsed = (time.perf_counter() - start) * 1000; root.destroy(); print(elapsed)"
+)
+
+
+def time_subprocess(code, env, runs, cwd):
+    """在 cwd 中多次运行 python -c code，返回总耗时中位数（毫秒）"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def measure_in_subprocess(code, env, runs, cwd):
+    """在 cwd 中多次运行 python -c code，返回子进程自己输出的耗时（最后一行，毫秒）的中位数"""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, check=True,
+                                capture_output=True, text=True).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def has_display(env, cwd):
+    """能否创建 Tk 窗口"""
+    result = subprocess.run([sys.executable, "-c", "import tkinter; tkinter.Tk().destroy()"],
+                            cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return result.returncode == 0
+
+
+def measure(runs, budget, workdir):
+    config_path = os.path.join(workdir, "config.ini")
+    with open(config_path, "w", encoding="utf-8") as f:
+        f.write(BENCH_CONFIG)
+    # 子进程在临时目录中运行，日志和追踪文件不会写到项目目录
+    env = dict(os.environ, UAI_TOOL_CONFIG=config_path,
+               PYTHONPATH=os.pathsep.join(filter(None, [PROJECT_DIR, os.environ.get("PYTHONPATH")])))
+
+    results = {"interpreter_ms": time_subprocess("pass", env, runs, workdir)}
+    results["import_main_ms"] = measure_in_subprocess(IMPORT_CODE, env, runs, workdir)
+
+    forbidden = budget.get("modules_not_loaded_at_import", [])
+    output = subprocess.run([sys.executable, "-c", LOADED_MODULES_CODE.format(modules=forbidden)],
+                            cwd=workdir, env=env, check=True, capture_output=True, text=True).stdout
+    results["heavy_modules_at_import"] = json.loads(output.strip().splitlines()[-1])
+
+    if has_display(env, workdir):
+        results["first_window_ms"] = measure_in_subprocess(FIRST_WINDOW_CODE, env, runs, workdir)
+    else:
+        results["first_window_ms"] = None
+    return results
+
+
+def check(results, budget):
+    """与预算比较，返回超出预算的说明列表"""
+    regressions = []
+    for key in ("import_main_ms", "first_window_ms"):
+        value, limit = results.get(key), budget.get(key)
+        if value is not None and limit is not None and value > limit:
+            regressions.append(f"{key} = {value:.1f} ms 超出预算 {limit} ms")
+    if results["heavy_modules_at_import"]:
+        regressions.append(f"导入 main 时加载了重量级依赖：{', '.join(results['heavy_modules_at_import'])}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="启动耗时预算检查")
+    parser.add_argument("--runs", type=int, default=9, help="每项测量次数（取中位数）")
+    parser.add_argument("--budget", default=DEFAULT_BUDGET, help="预算文件（JSON）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args(argv)
+
+    with open(args.budget, encoding="utf-8") as f:
+        budget = json.load(f)
+    with tempfile.TemporaryDirectory(prefix="uai-startup-") as workdir:
+        results = measure(args.runs, budget, workdir)
+    regressions = check(results, budget)
+
+    if args.json:
+        print(json.dumps({"results": results, "budget": budget, "regressions": regressions},
+                         ensure_ascii=False, indent=2))
+    else:
+        print(f"interpreter startup: {results['interpreter_ms']:.1f} ms")
+        print(f"import main:         {results['import_main_ms']:.1f} ms (budget {budget.get('import_main_ms')} ms)")
+        if results["first_window_ms"] is None:
+            print("first window:        skipped (no display)")
+        else:
+            print(f"first window:        {results['first_window_ms']:.1f} ms (budget {budget.get('first_window_ms')} ms)")
+        print(f"heavy modules at import: {results['heavy_modules_at_import'] or 'none'}")
+        for line in regressions:
+            print(f"REGRESSION: {line}")
+        print("OK" if not regressions else "FAILED")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
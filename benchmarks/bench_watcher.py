@@ -0,0 +1,118 @@
+"""页面监视基准：连续换页后"思考"一段时间再点击答题，对比开启页面监视前后点击到填写完成的耗时
+
+每一页先用 FakeDriver.load_page 换到新的合成练习，等待 --think-time 秒后点击（经调度器提交答题任务）。
+开启监视时，页面稳定后在后台预取答案，点击只做快照和填写。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.bench_watcher
+    python -m benchmarks.bench_watcher --pages 10 --think-time 0.5 --model-latency 0.5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_pipeline import summarize
+from benchmarks.mock_dashscope import MockDashScopeServer
+
+BENCH_CONFIG = """[Settings]
+chrome_driver_path = chromedriver
+dashscope_api_key = sk-offline-benchmark
+
+[AI]
+endpoint = {endpoint}
+
+[Cache]
+enabled = false
+"""
+
+
+def run_mode(args, server, workdir, watch):
+    import answer_pipeline
+    from benchmarks.fake_driver import FakeDriver, FakePage
+    from jobs import JobScheduler
+    from tracing import Tracer
+
+    pages = [FakePage.synthetic(args.questions, args.blanks, seed=args.seed + i) for i in range(args.pages)]
+    driver = FakeDriver(pages[0], latency=args.driver_latency)
+    client = answer_pipeline.DashScopeClient("sk-offline-benchmark", endpoint=server.url, connect_timeout=2, read_timeout=30)
+    client.session.trust_env = False
+    model_id = "qwen-max"
+    tracer = Tracer(os.path.join(workdir, f"watch-{watch}.trace.jsonl"))
+    pipeline = answer_pipeline.AnswerPipeline(client_provider=lambda: client, tracer=tracer)
+    # 点击答题与页面监视经同一个调度器的工作线程执行（与界面版相同）
+    scheduler = JobScheduler()
+    session = answer_pipeline.AnswerSession(pipeline, scheduler, lambda: driver, lambda: model_id,
+                                            log=print if args.verbose else (lambda message: None),
+                                            watch_interval=args.interval if watch else None)
+
+    latencies, filled = [], 0
+    requests_before = server.requests
+    for page in pages:
+        driver.load_page(page)
+        time.sleep(args.think_time)
+        start = time.perf_counter()
+        job, _ = scheduler.submit("自动答题", lambda cancel: session.answer(driver, model_id, cancel=cancel),
+                                  key="auto_answer")
+        job.wait()
+        latencies.append((time.perf_counter() - start) * 1000)
+        filled += sum(1 for value in driver.values.values() if value)
+    session.stop()
+    scheduler.shutdown()
+    tracer.close()
+    return {
+        "latency_ms": summarize(latencies),
+        "model_requests": server.requests - requests_before,
+        "filled_inputs": filled,
+        "inputs": sum(len(driver.input_ids(i)) for i in range(len(driver.page.questions))) * len(pages),
+        "watcher": session.watcher.stats_text() if session.watcher is not None else None,
+    }
+
+
+def print_mode(name, result):
+    latency = result["latency_ms"]
+    print(f"{name}: click → filled p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms, "
+          f"max {latency['max']:.1f} ms; model requests {result['model_requests']}, "
+          f"filled {result['filled_inputs']}/{result['inputs']}")
+    if result["watcher"]:
+        print(f"  {result['watcher']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="页面监视预取基准测试")
+    parser.add_argument("--pages", type=int, default=5, help="依次打开的练习页数")
+    parser.add_argument("--questions", type=int, default=10, help="每页题目数")
+    parser.add_argument("--blanks", type=int, default=1, help="每题空格数（>1 为多空题）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--think-time", type=float, default=1.0, help="换页后到点击的等待时间（秒）")
+    parser.add_argument("--interval", type=float, default=0.1, help="页面监视探测间隔（秒）")
+    parser.add_argument("--driver-latency", type=float, default=0.002, help="每条 WebDriver 命令的模拟往返延迟（秒）")
+    parser.add_argument("--model-latency", type=float, default=0.3, help="模型首字节延迟（秒）")
+    parser.add_argument("--verbose", action="store_true", help="打印运行日志")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    server = MockDashScopeServer(latency=args.model_latency, seed=args.seed)
+    with server, tempfile.TemporaryDirectory(prefix="uai-bench-") as workdir:
+        cwd = os.getcwd()
+        config_path = os.path.join(workdir, "config.ini")
+        with open(config_path, "w", encoding="utf-8") as f:
+            f.write(BENCH_CONFIG.format(endpoint=server.url))
+        os.environ["UAI_TOOL_CONFIG"] = config_path
+        os.chdir(workdir)
+        try:
+            results = {"off": run_mode(args, server, workdir, watch=False),
+                       "on": run_mode(args, server, workdir, watch=True)}
+        finally:
+            os.chdir(cwd)
+    print_mode("watcher off", results["off"])
+    print_mode("watcher on ", results["on"])
+    return results
+
+
+if __name__ == "__main__":
+    main()
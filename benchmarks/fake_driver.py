@@ -0,0 +1,286 @@
+"""离线基准测试用的假 WebDriver：在内存中模拟练习页面，并模拟每条命令的往返延迟
+
+所有命令都经过 FakeDriver.execute()，因此 tracing.instrument_driver 的命令计数同样适用。
+"""
+import json
+import random
+import time
+
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+import answer_pipeline
+
+SINGLE_BLANK_INSTRUCTION = (
+    "Fill in the blanks with the words given below. Change the form where necessary. "
+    "Each word can be used only once."
+)
+MULTI_BLANK_INSTRUCTION = (
+    "Fill in the blanks by selecting suitable words from the word bank. "
+    "You may not use any of the words more than once."
+)
+
+DEFAULT_URL = "https://ucloud.unipus.cn/exercise/fake"
+
+_WORDS = (
+    "abandon benefit capture decline emerge foster generate highlight indicate justify "
+    "maintain navigate obtain perceive qualify reinforce sustain transform undergo verify"
+).split()
+
+
+class FakePage:
+    """一道练习页面：指令、题目（文本 + 空格数）和选项
+
+    多部分页面的 questions 为各部分题目依次排成的整页列表，sections 为各部分的
+    {instruction, options, start, count}；单部分页面的 sections 只有一项。
+    """
+
+    def __init__(self, instruction, questions, options, url=DEFAULT_URL, sections=None):
+        self.instruction = instruction
+        self.questions = [(text, blanks) for text, blanks in questions]
+        self.options = list(options)
+        self.url = url
+        self.sections = sections or [{"instruction": instruction, "options": self.options,
+                                      "start": 0, "count": len(self.questions)}]
+
+    @classmethod
+    def combine(cls, pages, url=DEFAULT_URL):
+        """把几道单部分页面合成一个多部分页面（选项各部分分开，整页选项为空）"""
+        questions, sections = [], []
+        for page in pages:
+            sections.append({"instruction": page.instruction, "options": list(page.options),
+                             "start": len(questions), "count": len(page.questions)})
+            questions.extend(page.questions)
+        return cls(pages[0].instruction, questions, [], url, sections=sections)
+
+    @classmethod
+    def synthetic(cls, question_count=10, blanks_per_question=1, seed=0):
+        """生成合成页面；blanks_per_question > 1 时为多空题"""
+        rng = random.Random(seed)
+        instruction = SINGLE_BLANK_INSTRUCTION if blanks_per_question <= 1 else MULTI_BLANK_INSTRUCTION
+        questions = []
+        for i in range(question_count):
+            words = [rng.choice(_WORDS) for _ in range(12)]
+            text = f"{i + 1}. The committee will " + " ____ ".join(
+                " ".join(words[j::blanks_per_question + 1]) for j in range(blanks_per_question + 1)
+            ) + "."
+            questions.append((text, max(blanks_per_question, 1)))
+        options = rng.sample(_WORDS, min(len(_WORDS), question_count * max(blanks_per_question, 1)))
+        return cls(instruction, questions, options)
+
+    @classmethod
+    def load(cls, path):
+        """读取录制的页面（JSON：instruction / questions[{text, blanks}] / options / url）"""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if "sections" in data:
+            # 多部分页面：sections[{instruction, questions, options}]
+            return cls.combine([cls(section["instruction"], [(q["text"], q["blanks"]) for q in section["questions"]],
+                                    section.get("options", [])) for section in data["sections"]],
+                               data.get("url", DEFAULT_URL))
+        questions = [(q["text"], q["blanks"]) for q in data["questions"]]
+        return cls(data["instruction"], questions, data.get("options", []), data.get("url", DEFAULT_URL))
+
+    @classmethod
+    def from_snapshot(cls, snapshot, url=DEFAULT_URL):
+        """按运行录制中的页面快照（PageSnapshot 的字典形式）重建页面"""
+        sections = [{"instruction": s["instruction"], "options": list(s["options"]), "start": s["start"],
+                     "count": s["count"]} for s in snapshot.get("sections", [])]
+        return cls(snapshot["instruction"], zip(snapshot["questions"], snapshot["blank_counts"]),
+                   snapshot["options"], url, sections=sections or None)
+
+
+class FakeElement:
+    """假的页面元素（段落或输入框）"""
+
+    def __init__(self, driver, kind, question_index=None, input_id=None):
+        self._driver = driver
+        self.kind = kind
+        self.question_index = question_index
+        self.input_id = input_id
+
+    @property
+    def text(self):
+        return self._driver.execute("getElementText", {"element": self})["value"]
+
+    def clear(self):
+        self._driver.execute("clearElement", {"element": self})
+
+    def send_keys(self, value):
+        self._driver.execute("sendKeysToElement", {"element": self, "text": value})
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def find_elements(self, by=By.ID, value=None):
+        return self._driver.execute("findChildElements", {"element": self, "using": by, "value": value})["value"]
+
+
+class FakeDriver:
+    """假的 Chrome 驱动：模拟 answer_pipeline.py 使用到的脚本和定位方式"""
+
+    def __init__(self, page, latency=0.0, failing_inputs=()):
+        self.page = page
+        self.latency = latency
+        self.values = {}
+        self.commands = 0
+        # 批量脚本写入失败的输入框（用于覆盖 send_keys 回退路径）
+        self.failing_inputs = set(failing_inputs)
+        self.current_url = page.url
+        self._scripts = {
+            answer_pipeline.SNAPSHOT_SCRIPT: self._run_snapshot,
+            answer_pipeline.BULK_FILL_SCRIPT: self._run_bulk_fill,
+            answer_pipeline.BULK_CLEAR_SCRIPT: self._run_bulk_clear,
+            answer_pipeline.PAGE_READY_SCRIPT: self._run_page_ready,
+            answer_pipeline.PAGE_WATCH_SCRIPT: self._run_page_watch,
+        }
+        # 假页面只有一种布局：匹配第一个定位方案，容器为固定的元素句柄（换页时重建）
+        self.container = FakeElement(self, "container")
+        self.page_loads = 1
+
+    def load_page(self, page):
+        """模拟换到下一道练习：替换题目容器，已填写的内容清空"""
+        self.page = page
+        self.current_url = page.url
+        self.values.clear()
+        self.container = FakeElement(self, "container")
+        self.page_loads += 1
+
+    def input_ids(self, question_index):
+        return [f"{question_index}-{j}" for j in range(self.page.questions[question_index][1])]
+
+    def all_input_ids(self):
+        return [input_id for i in range(len(self.page.questions)) for input_id in self.input_ids(i)]
+
+    # ---------- WebDriver 接口 ----------
+    def execute(self, driver_command, params=None):
+        """所有命令的统一入口：计数并模拟往返延迟"""
+        self.commands += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return {"value": self._dispatch(driver_command, params or {})}
+
+    def execute_script(self, script, *args):
+        return self.execute("executeScript", {"script": script, "args": list(args)})["value"]
+
+    def find_element(self, by=By.ID, value=None):
+        return self.execute("findElement", {"using": by, "value": value})["value"]
+
+    def find_elements(self, by=By.ID, value=None):
+        return self.execute("findElements", {"using": by, "value": value})["value"]
+
+    def get(self, url):
+        self.execute("get", {"url": url})
+
+    def quit(self):
+        pass
+
+    # ---------- 命令实现 ----------
+    def _dispatch(self, command, params):
+        if command == "executeScript":
+            handler = self._scripts.get(params["script"])
+            if handler is None:
+                raise NotImplementedError("FakeDriver 不支持该脚本")
+            return handler(*params["args"])
+        if command == "findElement":
+            found = self._find(params["using"], params["value"])
+            if not found:
+                raise NoSuchElementException(f"{params['using']}={params['value']}")
+            return found[0]
+        if command == "findElements":
+            return self._find(params["using"], params["value"])
+        if command == "findChildElements":
+            element = params["element"]
+            if element.kind != "question":
+                return []
+            return [FakeElement(self, "input", element.question_index, input_id)
+                    for input_id in self.input_ids(element.question_index)]
+        if command == "getElementText":
+            element = params["element"]
+            if element.kind == "question":
+                return self.page.questions[element.question_index][0]
+            return self.values.get(element.input_id, "")
+        if command == "clearElement":
+            self.values[params["element"].input_id] = ""
+            return None
+        if command == "sendKeysToElement":
+            input_id = params["element"].input_id
+            self.values[input_id] = self.values.get(input_id, "") + params["text"]
+            return None
+        if command == "get":
+            self.current_url = params["url"]
+            return None
+        raise NotImplementedError(command)
+
+    def _find(self, by, value):
+        if by == By.CSS_SELECTOR and value.startswith(f"[{answer_pipeline.INPUT_ID_ATTR}="):
+            input_id = value.split('"')[1]
+            question_index = int(input_id.split("-")[0])
+            if input_id not in self.all_input_ids():
+                return []
+            return [FakeElement(self, "input", question_index, input_id)]
+        # 没有快照时的逐题填写路径：QUESTIONS_XPATH[n] 为第 n 题段落，QUESTIONS_XPATH[n]//input 为其输入框
+        if by == By.XPATH and value.startswith(answer_pipeline.QUESTIONS_XPATH + "["):
+            index_text, _, rest = value[len(answer_pipeline.QUESTIONS_XPATH) + 1:].partition("]")
+            question_index = int(index_text) - 1
+            if question_index >= len(self.page.questions):
+                return []
+            if rest == "//input":
+                return [FakeElement(self, "input", question_index, input_id)
+                        for input_id in self.input_ids(question_index)]
+            return [FakeElement(self, "question", question_index)]
+        return []
+
+    def _locate(self, profiles, cached_container, cached_name):
+        """模拟 LOCATE_JS 的 locatedInfo()：缓存的容器句柄有效时直接复用"""
+        if cached_container is self.container and cached_name:
+            return {"profile": cached_name, "container": self.container, "matched": True,
+                    "cached": True, "attempts": []}
+        name = profiles[0]["name"]
+        return {"profile": name, "container": self.container, "matched": True, "cached": False,
+                "attempts": [{"name": name, "ms": 0.0, "container": True, "instruction": True}]}
+
+    def _run_snapshot(self, profiles, cached_container, cached_name, id_attr):
+        return {
+            "ready": True,
+            "instruction": self.page.instruction,
+            "questions": [{"text": text, "inputs": self.input_ids(i)}
+                          for i, (text, _) in enumerate(self.page.questions)],
+            "options": list(self.page.options),
+            "sections": [dict(section) for section in self.page.sections],
+            "located": self._locate(profiles, cached_container, cached_name),
+        }
+
+    def _run_page_ready(self, profiles, cached_container, cached_name):
+        return {"exercise": True, "state": "complete",
+                "located": self._locate(profiles, cached_container, cached_name)}
+
+    def _run_page_watch(self, profiles, cached_container, cached_name):
+        # 题目容器重建即视为新的观察器，假页面加载后内容不再变化
+        return {"url": self.current_url, "exercise": True, "page": f"{self.page_loads}:0",
+                "located": self._locate(profiles, cached_container, cached_name)}
+
+    def _set_value(self, input_id, value):
+        if input_id not in self.all_input_ids():
+            return "missing"
+        if input_id in self.failing_inputs:
+            return "mismatch"
+        self.values[input_id] = value
+        return ""
+
+    def _run_bulk_fill(self, profiles, cached_container, cached_name, id_attr, entries):
+        report = []
+        for input_id, value in entries:
+            reason = self._set_value(input_id, value)
+            report.append({"id": input_id, "ok": reason == "", "reason": reason})
+        return {"report": report, "located": self._locate(profiles, cached_container, cached_name)}
+
+    def _run_bulk_clear(self, profiles, cached_container, cached_name, id_attr):
+        report = []
+        for input_id in self.all_input_ids():
+            reason = self._set_value(input_id, "")
+            report.append({"id": input_id, "ok": reason == "", "reason": reason})
+        return {"report": report, "located": self._locate(profiles, cached_container, cached_name)}
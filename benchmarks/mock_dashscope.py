@@ -0,0 +1,214 @@
+"""本地 DashScope 替身服务器：按 Prompt 生成格式正确的答案，可注入延迟、流式输出、5xx 和 429"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# 紧凑模板的题目行："3.[2] ..."（题号后为空格数）
+_COMPACT_QUESTION_RE = re.compile(r"^(\d+)\.\[(\d+)\]", re.MULTILINE)
+_OPTIONS_RE = re.compile(r"可选单词(?:如下)?：\s*\n?(.*)")
+# 多部分合并 Prompt 的分段标记
+_SECTION_RE = re.compile(r"^=== 第 \d+ 部分 ===$", re.MULTILINE)
+
+
+def answer_slots(prompt):
+    """从 Prompt 中读出 [(题号, 空格数), ...]：优先读末尾的答案模板，没有时读紧凑模板的题目行"""
+    slots = []
+    for line in prompt.rsplit("答案：", 1)[-1].splitlines():
+        number, dot, placeholder = line.strip().partition(". ")
+        if dot and number.isdigit():
+            slots.append((int(number), placeholder.count("|") + 1))
+    if not slots:
+        slots = [(int(number), int(count)) for number, count in _COMPACT_QUESTION_RE.findall(prompt)]
+    return slots
+
+
+def answer_for_prompt(prompt, drop=None):
+    """按 Prompt 中的题号和空格数生成答案文本
+
+    Prompt 中有可选单词时按题号依次选用（与真实模型一样只从选项中作答），否则每个空格填唯一单词；
+    多部分合并 Prompt 的每部分只用该部分的可选单词。
+    drop(题号) 返回 True 的题不输出答案行，用于模拟漏答。
+    """
+    chunks = _SECTION_RE.split(prompt)[1:] if _SECTION_RE.search(prompt) else [prompt]
+    lines = ["答案："]
+    for chunk in chunks:
+        options = []
+        match = _OPTIONS_RE.search(chunk)
+        if match:
+            options = [option.strip() for option in match.group(1).split(",") if option.strip()]
+        for number, blanks in answer_slots(chunk):
+            if drop is not None and drop(number):
+                continue
+            if options:
+                words = [options[(number - 1 + j) % len(options)] for j in range(blanks)]
+            else:
+                words = [f"answer{number}_{j + 1}" for j in range(blanks)]
+            lines.append(f"{number}. " + "|".join(words))
+    return "\n".join(lines)
+
+
+class MockDashScopeServer:
+    """DashScope 文本生成接口替身
+
+    latency: 首字节前的固定延迟（秒），model_latency 可按模型覆盖；chunk_delay: 流式输出时每行之间的延迟；
+    error_rate / rate_limit_rate: 随机返回 500 / 429 的概率；retry_after: 429 响应的 Retry-After；
+    slow_rate / slow_latency: 以一定概率额外延迟（模拟长尾响应）；drop_rate: 每题答案行被漏掉的概率。
+    """
+
+    def __init__(self, latency=0.0, chunk_delay=0.0, error_rate=0.0, rate_limit_rate=0.0,
+                 retry_after=0.05, seed=0, host="127.0.0.1", port=0, model_latency=None,
+                 slow_rate=0.0, slow_latency=0.0, drop_rate=0.0):
+        self.latency = latency
+        self.model_latency = dict(model_latency or {})
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.slow_injected = 0
+        self.drop_rate = drop_rate
+        self.dropped = 0
+        self.requests_by_model = {}
+        self.chunk_delay = chunk_delay
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.requests = 0
+        self.errors_injected = 0
+        self.rate_limited = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/v1/services/aigc/text-generation/generation"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _pick_delay(self, model):
+        """本次请求首字节前的延迟：按模型的固定延迟，按概率叠加长尾延迟"""
+        with self._lock:
+            self.requests_by_model[model] = self.requests_by_model.get(model, 0) + 1
+            delay = self.model_latency.get(model, self.latency)
+            if self.slow_rate and self._rng.random() < self.slow_rate:
+                self.slow_injected += 1
+                delay += self.slow_latency
+        return delay
+
+    def _drop_line(self, number):
+        with self._lock:
+            if self.drop_rate and self._rng.random() < self.drop_rate:
+                self.dropped += 1
+                return True
+            return False
+
+    def _pick_outcome(self):
+        """按注入概率决定本次请求的结果：ok / error / rate_limit"""
+        with self._lock:
+            self.requests += 1
+            roll = self._rng.random()
+            if roll < self.rate_limit_rate:
+                self.rate_limited += 1
+                return "rate_limit"
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.errors_injected += 1
+                return "error"
+            return "ok"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 响应头和响应体分开写出，避免 Nagle + 延迟确认带来的额外 40 ms
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    # 客户端取消请求（如对冲请求的落败方）后关闭了连接
+                    pass
+
+            def do_HEAD(self):
+                # 连接预热请求
+                self.send_response(405)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                outcome = server._pick_outcome()
+                delay = server._pick_delay(body.get("model"))
+                if delay:
+                    time.sleep(delay)
+                if outcome == "rate_limit":
+                    self._send_json(429, {"code": "Throttling.RateQuota", "message": "Requests rate limit exceeded"},
+                                    {"Retry-After": str(server.retry_after)})
+                    return
+                if outcome == "error":
+                    self._send_json(500, {"code": "InternalError", "message": "Injected failure"})
+                    return
+                prompt = body.get("input", {}).get("prompt", "")
+                text = answer_for_prompt(prompt, drop=server._drop_line)
+                # token 数按字符数近似
+                usage = {"input_tokens": len(prompt), "output_tokens": len(text)}
+                if body.get("parameters", {}).get("stream"):
+                    self._send_stream(text, usage)
+                else:
+                    self._send_json(200, {"output": {"text": text, "finish_reason": "stop"},
+                                          "usage": usage, "request_id": "mock"})
+
+            def _send_json(self, status, payload, headers=None):
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, text, usage):
+                # 按行切分成增量事件，以 chunked 编码逐条发送
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                pieces = text.splitlines(keepends=True)
+                for i, piece in enumerate(pieces):
+                    if server.chunk_delay and i:
+                        time.sleep(server.chunk_delay)
+                    last = i == len(pieces) - 1
+                    event = {"output": {"text": piece, "finish_reason": "stop" if last else "null"},
+                             "request_id": "mock"}
+                    if last:
+                        event["usage"] = usage
+                    data = (f"id:{i + 1}\nevent:result\n:HTTP_STATUS/200\n"
+                            f"data:{json.dumps(event, ensure_ascii=False)}\n\n").encode("utf-8")
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+
+        return Handler
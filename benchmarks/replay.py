@@ -0,0 +1,209 @@
+"""回放运行录制：用录制的页面快照和模型响应在假 WebDriver 上重新执行 build_prompt、流式解析、parse_ai_answer 和填写
+
+每个归档都会校验：重建的页面快照与录制时一致、重新构造的 Prompt 与录制时逐字相同、
+流式片段拼接后与原始响应一致、解析出的答案相同、每个输入框填写的值与录制时相同（发现错位填写）。
+流式片段按录制时的时间间隔重放（--speed 为倍速，0 为不等待），并对比录制与回放的各阶段耗时，
+可用同一批归档对比不同版本的性能。
+
+录制：config.ini 中设置 [Recorder] enabled = true，或 python headless_cli.py ... --record DIR
+
+用法（在项目根目录执行）：
+    python -m benchmarks.replay recordings
+    python -m benchmarks.replay recordings/run_20240101_120000_1234_0001.json.gz --speed 1 --verbose
+    python -m benchmarks.replay recordings --speed 0 --repeat 5 --json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_pipeline import summarize
+
+# 回放阶段与录制时的阶段名（PipelineResult.timings）
+STAGES = {"snapshot": "snapshot", "build_prompt": "build_prompt", "parse": "parse_ai_answer",
+          "fill": "fill_answers"}
+
+
+def snapshot_from_archive(data):
+    """把归档中的快照字典还原为 PageSnapshot"""
+    import answer_pipeline
+    fields = dict(data, sections=[answer_pipeline.PageSection(**section) for section in data.get("sections", [])])
+    return answer_pipeline.PageSnapshot(**fields)
+
+
+def replay_stream(chunks, speed):
+    """按录制的时间间隔（speed 倍速，0 为不等待）重放流式片段并增量解析，返回 (首个答案耗时, 总耗时, 拼接后的内容)"""
+    import answer_pipeline
+    parser = answer_pipeline.IncrementalAnswerParser()
+    content = []
+    first_answer = None
+    start = time.perf_counter()
+    for offset, kind, text in chunks:
+        if speed:
+            delay = offset / speed - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+        if kind != "content":
+            continue
+        content.append(text)
+        if parser.feed(text) and first_answer is None:
+            first_answer = time.perf_counter() - start
+    if parser.finish() and first_answer is None:
+        first_answer = time.perf_counter() - start
+    return first_answer, time.perf_counter() - start, "".join(content)
+
+
+def timed(timings, name, func, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        timings[name] = time.perf_counter() - start
+
+
+def replay_archive(data, args):
+    """回放一个归档，返回 {checks, timings, recorded, ...}；checks 中 None 表示该项没有录制数据"""
+    import answer_pipeline
+    from benchmarks.fake_driver import FakeDriver, FakePage
+
+    driver = FakeDriver(FakePage.from_snapshot(data["snapshot"]), latency=args.driver_latency)
+    recorded = snapshot_from_archive(data["snapshot"])
+    timings, checks = {}, {}
+    mismatched = []
+
+    snapshot = timed(timings, "snapshot", answer_pipeline.take_page_snapshot, driver)
+    checks["snapshot"] = (snapshot.content_key() == recorded.content_key()
+                          and snapshot.input_ids == recorded.input_ids)
+
+    checks["prompt"] = None
+    template = data.get("template")
+    if data.get("prompt") and (template == "sections" or template in answer_pipeline.PROMPT_TEMPLATES):
+        stages = {"prompt": answer_pipeline.PROMPT_TEMPLATES[template]} if template in answer_pipeline.PROMPT_TEMPLATES else None
+        pipeline = answer_pipeline.AnswerPipeline(client_provider=lambda: None, stages=stages)
+        prompt = timed(timings, "build_prompt", pipeline.build_question_prompt, snapshot, data.get("asked"))
+        checks["prompt"] = prompt == data["prompt"]
+
+    checks["stream"] = None
+    stream = {}
+    response = data.get("response")
+    if data.get("stream"):
+        first_answer, elapsed, content = replay_stream(data["stream"], args.speed)
+        stream = {"recorded_ms": data["stream"][-1][0] * 1000, "replayed_ms": elapsed * 1000,
+                  "first_answer_ms": first_answer * 1000 if first_answer is not None else None}
+        timings["stream"] = elapsed
+        if response is not None:
+            checks["stream"] = content == answer_pipeline.AIResponse(response).content
+
+    checks["parse"] = None
+    if response is not None:
+        answers = timed(timings, "parse", lambda: answer_pipeline.parse_ai_answer(answer_pipeline.AIResponse(response)))
+        checks["parse"] = answers == data.get("parsed_answers")
+
+    checks["fill"] = None
+    if data.get("fill"):
+        timed(timings, "fill", answer_pipeline.fill_answers_to_webpage, driver, data["answers"],
+              question_type=data["fill_types"], snapshot=snapshot)
+        expected = {input_id: value for input_id, value, ok, _ in data["fill"] if ok}
+        mismatched = [input_id for input_id, value in expected.items() if driver.values.get(input_id, "") != value]
+        checks["fill"] = not mismatched
+
+    return {
+        "status": data.get("status"),
+        "questions": len(recorded.questions),
+        "inputs": len(data.get("fill") or []),
+        "checks": checks,
+        "mismatched_inputs": mismatched,
+        "stream": stream,
+        "timings_ms": {name: seconds * 1000 for name, seconds in timings.items()},
+        "recorded_ms": {name: data["timings"][stage] * 1000 for name, stage in STAGES.items()
+                        if stage in data.get("timings", {})},
+    }
+
+
+def format_checks(checks):
+    return " ".join(f"{name} {'-' if ok is None else ('ok' if ok else 'MISMATCH')}" for name, ok in checks.items())
+
+
+def run(args):
+    from run_recorder import list_archives, load_archive
+
+    results = []
+    for path in list_archives(*args.archives):
+        try:
+            data = load_archive(path)
+        except (OSError, ValueError) as e:
+            print(f"{os.path.basename(path)}: 无法读取（{e}）", file=sys.stderr)
+            continue
+        runs = [replay_archive(data, args) for _ in range(max(args.repeat, 1))]
+        result = dict(runs[0], archive=path)
+        # 多次回放时耗时取各次的中位数
+        result["timings_ms"] = {name: summarize([r["timings_ms"][name] for r in runs])["p50"]
+                                for name in runs[0]["timings_ms"]}
+        results.append(result)
+        if args.verbose and not args.json:
+            line = f"{os.path.basename(path)}: {result['status']}, {result['questions']} questions; {format_checks(result['checks'])}"
+            if result["stream"]:
+                stream = result["stream"]
+                line += f"; stream {stream['recorded_ms']:.0f} → {stream['replayed_ms']:.0f} ms"
+            if result["mismatched_inputs"]:
+                line += f"; misfilled {', '.join(result['mismatched_inputs'])}"
+            print(line)
+    return results
+
+
+def report(results, args):
+    """按阶段汇总录制与回放耗时的 p50，返回不一致的归档数"""
+    failed = [r for r in results if any(ok is False for ok in r["checks"].values())]
+    if args.json:
+        print(json.dumps({"archives": results, "mismatched": len(failed)}, ensure_ascii=False, indent=2))
+        return len(failed)
+    print(f"archives={len(results)} mismatched={len(failed)} speed={args.speed or 'max'} repeat={args.repeat}")
+    for name in ("snapshot", "build_prompt", "stream", "parse", "fill"):
+        replayed = [r["timings_ms"][name] for r in results if name in r["timings_ms"]]
+        if not replayed:
+            continue
+        recorded = [r["recorded_ms"][name] for r in results if name in r.get("recorded_ms", {})]
+        if name == "stream":
+            recorded = [r["stream"]["recorded_ms"] for r in results if r["stream"]]
+        recorded_text = f"recorded p50 {summarize(recorded)['p50']:.2f} ms, " if recorded else ""
+        print(f"{name:<13}{recorded_text}replay p50 {summarize(replayed)['p50']:.2f} ms, "
+              f"p95 {summarize(replayed)['p95']:.2f} ms (n={len(replayed)})")
+    for r in failed:
+        print(f"MISMATCH {os.path.basename(r['archive'])}: {format_checks(r['checks'])}"
+              + (f"; misfilled {', '.join(r['mismatched_inputs'])}" if r["mismatched_inputs"] else ""))
+    return len(failed)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="回放运行录制")
+    parser.add_argument("archives", nargs="+", help="归档文件或包含归档的目录")
+    parser.add_argument("--speed", type=float, default=1.0, help="流式片段的回放倍速（1 为录制速度，0 为不等待）")
+    parser.add_argument("--repeat", type=int, default=1, help="每个归档回放的次数（耗时取中位数）")
+    parser.add_argument("--driver-latency", type=float, default=0.0, help="每条 WebDriver 命令的模拟往返延迟（秒）")
+    parser.add_argument("--config", help="使用的 config.ini（自定义题型和 Prompt 模板配置应与录制时一致）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出每个归档的回放结果")
+    parser.add_argument("--verbose", action="store_true", help="逐个输出归档的回放结果")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.archives = [os.path.abspath(path) for path in args.archives]
+    if args.config:
+        os.environ["UAI_TOOL_CONFIG"] = os.path.abspath(args.config)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    # 日志和追踪文件写在临时目录，不影响程序目录
+    with tempfile.TemporaryDirectory(prefix="uai-replay-") as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            results = run(args)
+        finally:
+            os.chdir(cwd)
+    return report(results, args)
+
+
+if __name__ == "__main__":
+    sys.exit(1 if main() else 0)
@@ -0,0 +1,186 @@
+"""浏览器会话：探测调试端口，已有浏览器则直接连接，否则启动新浏览器；driver 失效时自动重连"""
+import json
+import logging
+import threading
+import time
+
+DEFAULT_PORT = 9222
+DEFAULT_PROFILE_DIR = "./chrome-profile"
+
+# 快速模式下可屏蔽的资源类型对应的 URL 模式（Network.setBlockedURLs 只按 URL 匹配）
+RESOURCE_TYPE_PATTERNS = {
+    "image": ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp"],
+    "font": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "media": ["*.mp3", "*.mp4", "*.m4a", "*.wav", "*.ogg", "*.webm", "*.flv", "*.m3u8"],
+    "analytics": ["*google-analytics.com*", "*googletagmanager.com*", "*hm.baidu.com*", "*cnzz.com*"],
+}
+
+
+def blocked_url_patterns(resource_types=(), url_patterns=()):
+    """资源类型与自定义 URL 模式合并为屏蔽列表（去重，保持顺序）"""
+    patterns = []
+    for resource_type in resource_types:
+        if resource_type not in RESOURCE_TYPE_PATTERNS:
+            logging.warning(f"[WARNING] 未知的屏蔽资源类型: {resource_type}")
+        patterns.extend(RESOURCE_TYPE_PATTERNS.get(resource_type, []))
+    patterns.extend(url_patterns)
+    return list(dict.fromkeys(patterns))
+
+
+def block_urls(driver, patterns):
+    """通过 CDP Network.setBlockedURLs 屏蔽匹配的请求（对 driver 当前连接的标签页生效）"""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+
+
+def probe_debugger(host="127.0.0.1", port=DEFAULT_PORT, timeout=0.5):
+    """检查调试端口上是否有存活的 Chrome，返回 /json/version 信息，没有时返回 None"""
+    import urllib.request
+    # 本机地址不走系统代理
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+    try:
+        with opener.open(f"http://{host}:{port}/json/version", timeout=timeout) as response:
+            info = json.loads(response.read().decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+    return info if isinstance(info, dict) and "webSocketDebuggerUrl" in info else None
+
+
+def attach_chrome(driver_path, debugger_address, page_load_strategy="normal"):
+    """连接已以调试模式运行的 Chrome"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    chrome_options = Options()
+    chrome_options.page_load_strategy = page_load_strategy
+    chrome_options.add_experimental_option("debuggerAddress", debugger_address)
+    return webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+
+
+def launch_chrome(driver_path, port=DEFAULT_PORT, user_data_dir=DEFAULT_PROFILE_DIR, page_load_strategy="normal"):
+    """启动一个新的 Chrome 浏览器实例（开启调试端口，之后可被再次连接）
+
+    page_load_strategy 为 "eager" 时 driver.get 在 DOMContentLoaded 后即返回，不等图片等资源加载完。
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    chrome_options = Options()
+    chrome_options.page_load_strategy = page_load_strategy
+    chrome_options.add_argument(f"--remote-debugging-port={port}")
+    chrome_options.add_argument(f"--user-data-dir={user_data_dir}")  # 可以指定路径
+    chrome_options.add_argument("--disable-gpu")  # 加快启动速度
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    return webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+
+
+def is_driver_alive(driver):
+    """driver 与浏览器是否仍可用（一次轻量命令）"""
+    try:
+        driver.window_handles
+        return True
+    except Exception:
+        return False
+
+
+class BrowserSession:
+    """整个程序生命周期内复用的浏览器会话
+
+    connect() 优先复用现有 driver，其次连接调试端口上已运行的浏览器，最后才启动新浏览器；
+    get_driver() 每次返回前做健康检查，driver 失效时按同样的顺序透明重连。
+    wrap 用于包装每个新建的 driver（如挂上命令计数），on_connect(mode, seconds) 在每次连接后调用。
+    快速模式：page_load_strategy="eager"，并在每次新建连接后用 CDP 屏蔽 blocked_urls。
+    """
+
+    def __init__(self, driver_path, host="127.0.0.1", port=DEFAULT_PORT, user_data_dir=DEFAULT_PROFILE_DIR,
+                 wrap=None, on_connect=None, page_load_strategy="normal", blocked_urls=()):
+        self.driver_path = driver_path
+        self.host = host
+        self.port = port
+        self.user_data_dir = user_data_dir
+        self.page_load_strategy = page_load_strategy
+        self.blocked_urls = list(blocked_urls)
+        self.wrap = wrap
+        self.on_connect = on_connect
+        self.driver = None
+        self.launches = 0
+        self.attaches = 0
+        self.reconnects = 0
+        self.last_connect = None  # (mode, seconds)
+        self._lock = threading.RLock()
+
+    @property
+    def started(self):
+        """是否已经连接过浏览器"""
+        return self.driver is not None
+
+    @property
+    def fast_mode(self):
+        return self.page_load_strategy == "eager" or bool(self.blocked_urls)
+
+    @property
+    def debugger_address(self):
+        return f"{self.host}:{self.port}"
+
+    def connect(self, allow_launch=True):
+        """返回可用的 driver：复用 → 连接已运行的浏览器 → 启动新浏览器（allow_launch 为 False 时不启动）"""
+        with self._lock:
+            if self.driver is not None and is_driver_alive(self.driver):
+                self._connected("reuse", 0.0)
+                return self.driver
+            reconnect = self.driver is not None
+            self._discard()
+            start = time.perf_counter()
+            if probe_debugger(self.host, self.port) is not None:
+                driver = attach_chrome(self.driver_path, self.debugger_address, self.page_load_strategy)
+                mode = "attach"
+                self.attaches += 1
+            elif allow_launch:
+                driver = launch_chrome(self.driver_path, self.port, self.user_data_dir, self.page_load_strategy)
+                mode = "launch"
+                self.launches += 1
+            else:
+                raise RuntimeError(
+                    f"无法连接到已运行的 Chrome 浏览器，请检查：\n"
+                    f"1. 是否已通过 CMD 手动启动 Chrome 调试模式\n"
+                    f"2. 确保使用的是 --remote-debugging-port={self.port} 参数")
+            self.driver = self.wrap(driver) if self.wrap else driver
+            if self.blocked_urls:
+                try:
+                    block_urls(self.driver, self.blocked_urls)
+                except Exception as e:
+                    logging.warning(f"[WARNING] 设置资源屏蔽失败: {e}")
+            if reconnect:
+                self.reconnects += 1
+            self._connected(mode, time.perf_counter() - start)
+            return self.driver
+
+    def get_driver(self):
+        """返回健康的 driver；从未连接时返回 None，driver 失效时自动重连"""
+        with self._lock:
+            if self.driver is None:
+                return None
+            if is_driver_alive(self.driver):
+                return self.driver
+            logging.warning("[WARNING] 浏览器驱动已失效，正在重新连接")
+            return self.connect()
+
+    def _connected(self, mode, seconds):
+        self.last_connect = (mode, seconds)
+        logging.info(f"浏览器会话：{mode}，耗时 {seconds * 1000:.0f} ms（{self.stats_text()}）")
+        if self.on_connect is not None:
+            self.on_connect(mode, seconds)
+
+    def _discard(self):
+        """丢弃失效的 driver（只结束 chromedriver 会话，不关闭浏览器）"""
+        if self.driver is None:
+            return
+        try:
+            self.driver.service.stop()
+        except Exception:
+            pass
+        self.driver = None
+
+    def stats_text(self):
+        return f"启动 {self.launches} 次，连接已运行浏览器 {self.attaches} 次，重连 {self.reconnects} 次"
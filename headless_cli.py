@@ -0,0 +1,158 @@
+"""命令行运行答题流水线（无界面），用于性能分析和批量验证
+
+连接已运行的调试模式 Chrome（--attach），或使用录制的题目页面（--fixture，假 WebDriver）。
+模型调用默认使用 config.ini 中的 DashScope 配置；--mock-model 改用本地替身服务器，无需网络和 API Key。
+
+用法（在项目根目录执行）：
+    python headless_cli.py --attach --model qwen-max
+    python headless_cli.py --fixture benchmarks/fixtures/single_blank_sample.json --mock-model --runs 10
+    python headless_cli.py --fixture benchmarks/fixtures/multi_blank_sample.json --mock-model --profile --json
+    python headless_cli.py --attach --model auto --model-stats
+    python headless_cli.py --attach --record recordings      # 录制每次运行，供 benchmarks/replay.py 回放
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+
+import answer_pipeline
+from answer_cache import AnswerCache
+from browser_session import BrowserSession
+from model_stats import ModelStatsStore
+from run_recorder import RunRecorder
+from tracing import Tracer, instrument_driver, percentile, profile_run
+
+
+def format_timings(result):
+    return ", ".join(f"{stage} {seconds * 1000:.1f} ms" for stage, seconds in result.timings.items())
+
+
+def print_event(kind, payload):
+    """--verbose 时输出流水线事件"""
+    if kind in ("content", "reasoning"):
+        return
+    if kind == "snapshot":
+        payload = f"{len(payload.questions)} 题，往返 {payload.roundtrips} 次"
+    elif kind == "sections":
+        payload = "，".join(f"第 {s.start + 1}-{s.start + s.count} 题 {t}" for s, t in zip(payload["sections"], payload["types"]))
+    elif kind == "prompt":
+        payload = f"{len(payload)} 字符"
+    elif kind == "validated":
+        payload = (f"{payload.valid_count}/{payload.total} 题有效" + (f"（{payload.issue_summary()}）" if payload.issues else "")
+                   + (f"，提示：{payload.warning_summary()}" if payload.warnings else ""))
+    elif kind == "repaired":
+        payload = f"修复 {payload['fixed']} 题"
+    elif kind == "prompt_size":
+        payload = f"{payload['template']}，{payload['chars']} 字符，约 {payload['tokens']} token"
+    elif kind == "route":
+        payload = f"{payload.model}（{payload.reason}）"
+    elif kind == "parsed":
+        payload = payload["answers"]
+    elif kind == "finished":
+        payload = payload.status
+    print(f"  [{kind}] {payload}", file=sys.stderr)
+
+
+def create_driver(args):
+    if args.fixture:
+        from benchmarks.fake_driver import FakeDriver, FakePage
+        return FakeDriver(FakePage.load(args.fixture), latency=args.driver_latency)
+    host, _, port = args.debugger_address.rpartition(":")
+    return BrowserSession(answer_pipeline.SETTINGS.chrome_driver_path, host=host, port=int(port)).connect(allow_launch=False)
+
+
+def run(args, client):
+    driver = instrument_driver(create_driver(args))
+    tracer = Tracer(args.trace)
+    answer_cache = AnswerCache(answer_pipeline.SETTINGS.answer_cache_path) if args.cache else None
+    model_stats = ModelStatsStore(answer_pipeline.SETTINGS.model_stats_path) if args.model_stats else None
+    recorder = RunRecorder(args.record) if args.record else None
+    stages = {"prompt": answer_pipeline.PROMPT_TEMPLATES[args.template]} if args.template else None
+    pipeline = answer_pipeline.AnswerPipeline(client_provider=lambda: client, tracer=tracer, answer_cache=answer_cache,
+                                   stages=stages, on_event=print_event if args.verbose else None,
+                                   model_stats=model_stats, recorder=recorder)
+    results = []
+    for number in range(1, args.runs + 1):
+        run_id = tracer.new_run()
+        profile_prefix = None
+        if args.profile:
+            # 分析结果写在追踪文件所在目录
+            profile_prefix = os.path.join(os.path.dirname(os.path.abspath(args.trace)),
+                                          f"profile_cli_{time.strftime('%Y%m%d_%H%M%S')}_{run_id}")
+        with profile_run(profile_prefix) if profile_prefix else nullcontext():
+            result = pipeline.run(driver, args.model, bypass_cache=not args.cache)
+        results.append(result)
+        if not args.json:
+            print(f"run {number}: {result.status}, 共 {result.total_seconds * 1000:.1f} ms（{format_timings(result)}）")
+            if profile_prefix:
+                print(f"  profile: {profile_prefix}.prof / {profile_prefix}_memory.txt")
+    tracer.close()
+    return results
+
+
+def summarize(results):
+    """各阶段耗时的 p50/p95（毫秒）"""
+    stages = {}
+    for result in results:
+        for stage, seconds in result.timings.items():
+            stages.setdefault(stage, []).append(seconds * 1000)
+    stages["total"] = [result.total_seconds * 1000 for result in results]
+    return {stage: {"p50": percentile(values, 50), "p95": percentile(values, 95)} for stage, values in stages.items()}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="命令行运行答题流水线")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--attach", action="store_true", help="连接已运行的调试模式 Chrome")
+    source.add_argument("--fixture", help="录制的题目页面 JSON（使用假 WebDriver）")
+    parser.add_argument("--debugger-address", default="127.0.0.1:9222", help="Chrome 调试地址")
+    parser.add_argument("--driver-latency", type=float, default=0.0, help="假 WebDriver 每条命令的延迟（秒）")
+    parser.add_argument("--model", default=answer_pipeline.DEFAULT_MODEL, choices=sorted(set(answer_pipeline.MODEL_OPTIONS.values())))
+    parser.add_argument("--mock-model", action="store_true", help="使用本地 DashScope 替身服务器")
+    parser.add_argument("--mock-latency", type=float, default=0.0, help="替身服务器响应延迟（秒）")
+    parser.add_argument("--template", choices=sorted(answer_pipeline.PROMPT_TEMPLATES),
+                        help="Prompt 模板（默认按 config.ini 的 [Prompt] template）")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--cache", action="store_true", help="启用答案缓存（默认每次都调用模型）")
+    parser.add_argument("--model-stats", action="store_true",
+                        help="记录模型调用统计（--model auto 时据此选择模型）")
+    parser.add_argument("--profile", action="store_true", help="每次运行保存 cProfile/tracemalloc 结果")
+    parser.add_argument("--record", metavar="DIR", help="把每次运行录制为回放归档，保存到该目录")
+    parser.add_argument("--trace", default=os.path.join(tempfile.gettempdir(), "uai_headless.trace.jsonl"),
+                        help="阶段追踪输出文件（默认写在系统临时目录，--profile 的分析结果写在同一目录）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出每次运行的结果")
+    parser.add_argument("--verbose", action="store_true", help="输出流水线事件")
+    return parser.parse_args(argv)
+
+
+def cli(argv=None):
+    args = parse_args(argv)
+    server = None
+    if args.mock_model:
+        from benchmarks.mock_dashscope import MockDashScopeServer
+        server = MockDashScopeServer(latency=args.mock_latency).start()
+        client = answer_pipeline.DashScopeClient(answer_pipeline.SETTINGS.dashscope_api_key, endpoint=server.url)
+    else:
+        client = answer_pipeline.create_ai_client()
+    try:
+        results = run(args, client)
+    finally:
+        client.close()
+        if server is not None:
+            server.stop()
+
+    summary = summarize(results)
+    if args.json:
+        print(json.dumps({"runs": [result.to_dict() for result in results], "summary_ms": summary},
+                         ensure_ascii=False, indent=2))
+    else:
+        for stage, values in summary.items():
+            print(f"{stage}: p50 {values['p50']:.1f} ms, p95 {values['p95']:.1f} ms")
+    return 0 if all(result.status == "filled" for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
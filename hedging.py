@@ -0,0 +1,140 @@
+"""对冲请求：主请求在设定时间内没有得到可用结果时，再向备用模型发一次请求，先得到可用结果的一方胜出"""
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+from jobs import CancelToken, JobCancelled
+from tracing import percentile
+
+
+def hedged_call(primary, backup, delay, accept, cancel=None, info=None):
+    """同时跑主请求和（延迟触发的）备用请求，返回 (结果, 信息)
+
+    primary / backup 为 func(cancel_token)，在各自的线程中执行；accept(结果) 判断结果是否可用。
+    主请求 delay 秒内没有可用结果，或提前失败/结果不可用时触发备用请求；
+    先得到可用结果的一方胜出，另一方通过其取消标记中断。两者都失败时返回主请求的结果或抛出主请求的异常。
+    信息为 {"triggered", "reason", "winner", "elapsed", "backup_started_at"}；调用方传入 info 字典时写入该字典，
+    抛出异常时也能从中读到是否触发了备用请求。
+    """
+    start = time.perf_counter()
+    results = queue.SimpleQueue()
+    tokens = {}
+    outcomes = {}
+    info = info if info is not None else {}
+    info.update({"triggered": False, "reason": None, "winner": None, "elapsed": 0.0, "backup_started_at": None})
+
+    def launch(name, func):
+        token = CancelToken()
+        tokens[name] = token
+
+        def target():
+            try:
+                results.put((name, True, func(token)))
+            except BaseException as e:
+                results.put((name, False, e))
+
+        threading.Thread(target=target, name=f"hedge-{name}", daemon=True).start()
+
+    def cancel_all():
+        for token in list(tokens.values()):
+            token.cancel()
+        results.put((None, False, JobCancelled()))
+
+    if cancel is not None:
+        cancel.on_cancel(cancel_all)
+
+    def trigger(reason):
+        info["triggered"] = True
+        info["reason"] = reason
+        info["backup_started_at"] = time.perf_counter() - start
+        launch("backup", backup)
+
+    launch("primary", primary)
+    try:
+        while True:
+            timeout = None if info["triggered"] else max(0.0, start + delay - time.perf_counter())
+            try:
+                name, ok, value = results.get(timeout=timeout)
+            except queue.Empty:
+                trigger("delay")
+                continue
+            if name is None:
+                raise JobCancelled()
+            outcomes[name] = (ok, value)
+            if ok and accept(value):
+                info["winner"] = name
+                return value, info
+            if not info["triggered"]:
+                trigger("primary_failed")
+                continue
+            if len(outcomes) == len(tokens):
+                break
+    finally:
+        info["elapsed"] = time.perf_counter() - start
+        # 结束后取消仍在进行的请求（胜出方已完成，取消无影响）
+        for token in tokens.values():
+            token.cancel()
+
+    # 两个请求都没有可用结果：沿用主请求的结果
+    ok, value = outcomes["primary"]
+    if ok:
+        return value, info
+    raise value
+
+
+class HedgeStats:
+    """对冲统计：触发率、胜出次数和估计节省的时间
+
+    备用模型胜出时主模型已处于长尾，按主模型近期耗时的 p95 估计它本来还需要的时间。
+    """
+
+    def __init__(self, window=50):
+        self.requests = 0
+        self.triggered = 0
+        self.wins = {"primary": 0, "backup": 0}
+        self.failures = 0
+        self.saved_seconds = 0.0
+        self._primary_latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, info):
+        """记录一次对冲请求，返回本次估计节省的时间（秒）"""
+        saved = 0.0
+        with self._lock:
+            self.requests += 1
+            if info["triggered"]:
+                self.triggered += 1
+            winner = info["winner"]
+            if winner is None:
+                self.failures += 1
+            else:
+                self.wins[winner] += 1
+            if winner == "primary":
+                self._primary_latencies.append(info["elapsed"])
+            elif winner == "backup" and self._primary_latencies:
+                saved = max(0.0, percentile(self._primary_latencies, 95) - info["elapsed"])
+                self.saved_seconds += saved
+        return saved
+
+    @property
+    def trigger_rate(self):
+        return self.triggered / self.requests if self.requests else 0.0
+
+    def stats_text(self):
+        with self._lock:
+            return (f"对冲请求 {self.requests} 次，触发备用模型 {self.triggered} 次（{self.trigger_rate:.0%}），"
+                    f"主模型胜出 {self.wins['primary']} 次，备用模型胜出 {self.wins['backup']} 次，"
+                    f"均失败 {self.failures} 次，约节省 {self.saved_seconds:.1f} s")
+
+
+def log_hedge(info, primary_model, backup_model, saved):
+    winner = {"primary": primary_model, "backup": backup_model}.get(info["winner"], "无")
+    if info["triggered"]:
+        reason = "主模型超时" if info["reason"] == "delay" else "主模型失败"
+        outcome = f"{winner} 胜出" if info["winner"] else "均未返回可用答案"
+        logging.info(f"对冲请求：{reason}，{info['backup_started_at']:.2f} s 时触发备用模型 {backup_model}，"
+                     f"{outcome}，耗时 {info['elapsed']:.2f} s，约节省 {saved:.2f} s")
+    else:
+        logging.info(f"对冲请求：未触发，{winner} 耗时 {info['elapsed']:.2f} s")
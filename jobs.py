@@ -0,0 +1,258 @@
+"""任务调度：所有用到浏览器的操作在同一个工作线程中依次执行，支持合并重复请求和取消"""
+import logging
+import threading
+import time
+from collections import deque
+
+
+class JobCancelled(Exception):
+    """任务已被取消"""
+
+
+class CancelToken:
+    """取消标记：任务在各阶段之间检查；取消时依次调用已登记的回调（如关闭进行中的 HTTP 响应）"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logging.warning(f"[WARNING] 取消回调执行失败: {e}")
+
+    def on_cancel(self, callback):
+        """登记取消回调；已取消时立即调用"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise JobCancelled()
+
+    def sleep(self, seconds):
+        """可被取消打断的等待（用于重试退避）"""
+        if self._event.wait(seconds):
+            raise JobCancelled()
+
+
+def check_cancelled(cancel):
+    """cancel 可以为 None（不可取消的调用）"""
+    if cancel is not None:
+        cancel.raise_if_cancelled()
+
+
+def run_abortable(func, cancel, on_abandoned=None):
+    """在辅助线程中执行阻塞调用 func()，取消时立即抛出 JobCancelled
+
+    被放弃的调用结束后，其返回值交给 on_abandoned 处理（如关闭 HTTP 响应、断开连接）。
+    """
+    if cancel is None:
+        return func()
+    wake = threading.Event()
+    lock = threading.Lock()
+    box = {"abandoned": False}
+
+    def target():
+        try:
+            box["result"] = func()
+        except BaseException as e:
+            box["error"] = e
+        with lock:
+            abandoned = box["abandoned"]
+            box["finished"] = True
+        wake.set()
+        if abandoned and "result" in box and on_abandoned is not None:
+            on_abandoned(box["result"])
+
+    threading.Thread(target=target, daemon=True).start()
+    cancel.on_cancel(wake.set)
+    wake.wait()
+    with lock:
+        if not box.get("finished"):
+            box["abandoned"] = True
+            raise JobCancelled()
+    if "error" in box:
+        raise box["error"]
+    return box["result"]
+
+
+class Job:
+    """一次排队执行的任务；func(cancel_token) 在工作线程中运行
+
+    background 为 True 的任务（如页面监视）不触发 on_change，不计入 foreground_depth 和执行统计。
+    """
+
+    def __init__(self, name, func, key=None, background=False):
+        self.name = name
+        self.func = func
+        self.key = key
+        self.background = background
+        self.token = CancelToken()
+        self.state = "pending"  # pending / running / done / failed / cancelled
+        self.merged = 0
+        self.error = None
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.finished_at = None
+        self.finished = threading.Event()
+
+    @property
+    def active(self):
+        return self.state in ("pending", "running")
+
+    def cancel(self):
+        self.token.cancel()
+
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
+
+class JobScheduler:
+    """单工作线程任务调度器
+
+    同一 key 的任务排队中或正在执行时，新的提交直接合并到已有任务（不重复调用模型和填写）；
+    merge_running 为 False 时只合并到排队中的任务（执行中的任务可能已读取了旧的页面，新的提交重新排队）。
+    任务状态变化时在工作线程中调用 on_change()。
+    """
+
+    def __init__(self, on_change=None, name="uai-worker"):
+        self.on_change = on_change
+        self.current = None
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        # 统计：执行、合并、取消、失败的任务数，以及合并避免的重复执行时间估计
+        self.executed = 0
+        self.coalesced = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.saved_seconds = 0.0
+        self._durations = {}
+        self._thread = threading.Thread(target=self._worker, name=name, daemon=True)
+        self._thread.start()
+
+    @property
+    def depth(self):
+        """排队中与执行中的任务数"""
+        with self._cond:
+            return len(self._pending) + (1 if self.current is not None else 0)
+
+    @property
+    def foreground_depth(self):
+        """排队中与执行中的前台任务数"""
+        with self._cond:
+            jobs = ([self.current] if self.current else []) + list(self._pending)
+            return sum(1 for job in jobs if not job.background)
+
+    def submit(self, name, func, key=None, background=False, merge_running=True):
+        """提交任务，返回 (job, merged)；merged 为 True 表示已合并到同 key 的已有任务"""
+        with self._cond:
+            if key is not None:
+                running = [self.current] if self.current and merge_running else []
+                for job in running + list(self._pending):
+                    if job.key == key and job.active and not job.token.cancelled:
+                        job.merged += 1
+                        self.coalesced += 1
+                        self.saved_seconds += self._durations.get(key, 0.0)
+                        logging.info(f"任务 {name} 已合并到{'执行中' if job is self.current else '排队中'}的同类任务"
+                                     f"（累计合并 {job.merged} 次）")
+                        return job, True
+            job = Job(name, func, key, background)
+            self._pending.append(job)
+            self._cond.notify()
+        self._notify(job)
+        return job, False
+
+    def is_busy(self, key):
+        """是否有该 key 的任务排队中或正在执行"""
+        with self._cond:
+            jobs = ([self.current] if self.current else []) + list(self._pending)
+            return any(job.key == key and job.active for job in jobs)
+
+    def cancel_all(self):
+        """取消正在执行的任务并丢弃排队中的任务，返回取消的前台任务数（后台的页面监视和预取任务同样取消，但不计数）"""
+        with self._cond:
+            jobs = ([self.current] if self.current else []) + list(self._pending)
+        for job in jobs:
+            job.cancel()
+        return sum(1 for job in jobs if not job.background)
+
+    def shutdown(self):
+        self.cancel_all()
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def stats_text(self):
+        return (f"已执行 {self.executed} 个任务，合并重复请求 {self.coalesced} 次"
+                f"（约节省 {self.saved_seconds:.1f} s），取消 {self.cancelled} 个，失败 {self.failed} 个")
+
+    def _notify(self, job):
+        if self.on_change is not None and not job.background:
+            try:
+                self.on_change()
+            except Exception as e:
+                logging.warning(f"[WARNING] 任务状态回调失败: {e}")
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                job = self._pending.popleft()
+                self.current = job
+            self._run(job)
+            with self._cond:
+                self.current = None
+            self._notify(job)
+
+    def _run(self, job):
+        if job.token.cancelled:
+            job.state = "cancelled"
+            if not job.background:
+                self.cancelled += 1
+            job.finished.set()
+            return
+        job.state = "running"
+        job.started_at = time.perf_counter()
+        self._notify(job)
+        try:
+            job.func(job.token)
+            job.state = "cancelled" if job.token.cancelled else "done"
+        except JobCancelled:
+            job.state = "cancelled"
+        except Exception as e:
+            job.state = "failed"
+            job.error = e
+            logging.error(f"[ERROR] 任务 {job.name} 执行失败: {e}", exc_info=True)
+        finally:
+            job.finished_at = time.perf_counter()
+            if job.background:
+                pass  # 后台任务不计入统计
+            elif job.state == "cancelled":
+                self.cancelled += 1
+            elif job.state == "failed":
+                self.failed += 1
+            else:
+                self.executed += 1
+                if job.key is not None:
+                    self._durations[job.key] = job.finished_at - job.started_at
+            job.finished.set()
@@ -0,0 +1,192 @@
+"""定位方案：按页面布局命名的一组选择器，先定位题目容器，再在容器内查找指令和题目
+
+页面脚本在同一次调用中完成定位：优先复用上次找到的容器句柄，失效时按顺序尝试各方案，
+并返回每个方案的耗时，便于发现布局变化。同一方案的容器 XPath 匹配到多个含指令和题目的节点时，
+每个节点为一个题目部分（locateSections）。
+"""
+import logging
+from dataclasses import dataclass
+
+# 题目区域容器（内置方案的绝对路径前缀）
+UCLOUD_CONTAINER_XPATH = '/html/body/div[3]/div[1]/div[1]/section/section/main/div/div/div'
+
+
+@dataclass(frozen=True)
+class LocatorProfile:
+    """一种页面布局的选择器：container 为 XPath（从文档根查找），instruction / questions 为相对容器的 XPath，
+    options 为选项的 CSS 选择器（在整个文档中查找）"""
+    name: str
+    container: str
+    instruction: str
+    questions: str
+    options: str = "div.option"
+
+    def to_js(self):
+        return {"name": self.name, "container": self.container, "instruction": self.instruction,
+                "questions": self.questions, "options": self.options}
+
+
+BUILTIN_PROFILES = (
+    # 原来的绝对路径
+    LocatorProfile("ucloud-absolute", UCLOUD_CONTAINER_XPATH, "./div[1]/div/div/p", "./div[3]/div/div[2]/div/div/p"),
+    # 以 <main> 为锚点，外层包装结构变化时仍可用
+    LocatorProfile("ucloud-main", "//main/div/div/div[div[3]]", "./div[1]/div/div/p", "./div[3]/div/div[2]/div/div/p"),
+    # 不依赖层级：含输入框的段落为题目，其前面第一个非空段落为指令
+    LocatorProfile("generic-inputs", "/html/body",
+                   "(.//p[.//input])[1]/preceding::p[normalize-space()][not(.//input)][1]", ".//p[.//input]"),
+)
+
+# 页面脚本共用的定位函数；脚本参数前三个固定为 (方案列表, 缓存的容器句柄, 缓存的方案名)
+LOCATE_JS = """
+function xpathFirst(expr, context) {
+    return document.evaluate(expr, context, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+function xpathAll(expr, context) {
+    const result = document.evaluate(expr, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const nodes = [];
+    for (let i = 0; i < result.snapshotLength; i++) nodes.push(result.snapshotItem(i));
+    return nodes;
+}
+function locate(profiles, cachedContainer, cachedName) {
+    if (cachedContainer && cachedContainer.isConnected) {
+        const profile = profiles.find(p => p.name === cachedName);
+        if (profile) return {profile: profile, container: cachedContainer, matched: true, cached: true, attempts: []};
+    }
+    const attempts = [];
+    let partial = null;
+    for (const profile of profiles) {
+        const start = performance.now();
+        let container = null, instruction = null;
+        try {
+            container = xpathFirst(profile.container, document);
+            if (container) instruction = xpathFirst(profile.instruction, container);
+        } catch (e) {
+            container = null;
+        }
+        attempts.push({name: profile.name, ms: performance.now() - start, container: !!container, instruction: !!instruction});
+        if (instruction) return {profile: profile, container: container, matched: true, cached: false, attempts: attempts};
+        if (container && !partial) partial = {profile: profile, container: container};
+    }
+    // 没有方案找到指令时，用第一个找到容器的方案采集题目（页面可能尚未渲染完）
+    if (partial) return {profile: partial.profile, container: partial.container, matched: false, cached: false, attempts: attempts};
+    return {profile: null, container: null, matched: false, cached: false, attempts: attempts};
+}
+function locateSections(profile, container) {
+    // 与容器同一 XPath 匹配到的其他节点中，有指令和题目的也作为题目部分；按文档顺序返回
+    const roots = [container].concat(xpathAll(profile.container, document).filter(node => node !== container));
+    const sections = [];
+    for (const root of roots) {
+        if (sections.some(s => s.root.contains(root) || root.contains(s.root))) continue;
+        const instruction = xpathFirst(profile.instruction, root);
+        const questions = xpathAll(profile.questions, root);
+        if (root === container || (instruction && questions.length)) sections.push({root: root, instruction: instruction, questions: questions});
+    }
+    sections.sort((a, b) => (a.root.compareDocumentPosition(b.root) & Node.DOCUMENT_POSITION_FOLLOWING) ? -1 : 1);
+    return sections;
+}
+function locatedInfo(located) {
+    return {profile: located.profile ? located.profile.name : null, container: located.matched ? located.container : null,
+            matched: located.matched, cached: located.cached, attempts: located.attempts};
+}
+"""
+
+
+def format_attempts(attempts):
+    """格式化各方案的尝试结果，用于日志输出"""
+    parts = []
+    for attempt in attempts:
+        state = "命中" if attempt.get("instruction") else ("仅容器" if attempt.get("container") else "未找到")
+        parts.append(f"{attempt.get('name')} {state} {attempt.get('ms', 0):.1f} ms")
+    return "，".join(parts)
+
+
+class LocatorResolver:
+    """记录当前页面匹配的定位方案和题目容器句柄，供同一页面后续的快照、填写、清除脚本复用"""
+
+    def __init__(self, profiles):
+        self.profiles = list(profiles)
+        self._profiles_js = [profile.to_js() for profile in self.profiles]
+        self.driver = None
+        self.container = None
+        self.profile_name = None
+        self.last_attempts = []
+        # 统计：重新定位次数、复用缓存句柄次数、句柄失效次数
+        self.resolutions = 0
+        self.cache_hits = 0
+        self.stale = 0
+
+    def invalidate(self):
+        self.container = None
+        self.profile_name = None
+
+    def script_args(self, driver):
+        if driver is not self.driver:
+            self.driver = driver
+            self.invalidate()
+        return [self._profiles_js, self.container, self.profile_name]
+
+    def run(self, driver, script, *args):
+        """执行以 LOCATE_JS 为前缀的脚本；缓存的容器句柄已失效时清除缓存重试一次"""
+        from selenium.common.exceptions import StaleElementReferenceException
+        try:
+            return driver.execute_script(script, *self.script_args(driver), *args)
+        except StaleElementReferenceException:
+            self.stale += 1
+            self.invalidate()
+            return driver.execute_script(script, *self.script_args(driver), *args)
+
+    def update(self, located):
+        """记录脚本返回的定位结果（locatedInfo）"""
+        if not located:
+            return
+        if located.get("cached"):
+            self.cache_hits += 1
+            return
+        self.resolutions += 1
+        self.last_attempts = list(located.get("attempts", []))
+        if located.get("matched"):
+            self.container = located.get("container")
+            self.profile_name = located.get("profile")
+            logging.info(f"定位方案匹配：{self.profile_name}（{format_attempts(self.last_attempts)}）")
+        else:
+            self.invalidate()
+
+    def stats_text(self):
+        return f"定位 {self.resolutions} 次，复用容器句柄 {self.cache_hits} 次，句柄失效 {self.stale} 次"
+
+
+def load_profiles(parser, warnings=None):
+    """从配置读取定位方案
+
+    [Locator 名称] 小节定义或覆盖方案（container / instruction / questions / options，未写的项沿用同名内置方案）；
+    [Locators] order 指定尝试顺序，默认为自定义方案在前、内置方案在后。
+    """
+    builtin = {profile.name: profile for profile in BUILTIN_PROFILES}
+    profiles = dict(builtin)
+    custom = []
+    for section in parser.sections():
+        if not section.startswith("Locator "):
+            continue
+        name = section[len("Locator "):].strip()
+        base = builtin.get(name)
+        values = {key: parser.get(section, key, fallback=getattr(base, key, None))
+                  for key in ("container", "instruction", "questions", "options")}
+        if not values["options"]:
+            values["options"] = "div.option"
+        missing = [key for key, value in values.items() if not value]
+        if missing:
+            if warnings is not None:
+                warnings.append(("定位方案配置", f"定位方案 {name} 缺少配置项：{', '.join(missing)}，已忽略"))
+            continue
+        profiles[name] = LocatorProfile(name, **values)
+        if name not in builtin:
+            custom.append(name)
+
+    order = parser.get("Locators", "order", fallback="")
+    names = [item.strip() for item in order.split(",") if item.strip()] or custom + list(builtin)
+    unknown = [name for name in names if name not in profiles]
+    if unknown and warnings is not None:
+        warnings.append(("定位方案配置", f"未定义的定位方案：{', '.join(unknown)}，已忽略"))
+    resolved = [profiles[name] for name in names if name in profiles]
+    return resolved or list(BUILTIN_PROFILES)
+
@@ -1,112 +1,37 @@
+import time
+_MODULE_LOAD_START = time.perf_counter()
+
 import tkinter as tk
 from tkinter import scrolledtext, ttk
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import WebDriverException
 from tkinter import messagebox
-import requests
-import json
 import threading
-import time
-import re
 import os
-import sys
-import configparser
 import logging
-import winreg
-import subprocess
-from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type
-
-# ================== 配置参数 ==================
-# 获取当前运行路径（适用于开发环境和打包后的exe）
-if getattr(sys, 'frozen', False):
-    current_dir = os.path.dirname(sys.executable)
-else:
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-
-# 读取配置文件
-config_path = os.path.join(current_dir, 'config.ini')
-config = configparser.ConfigParser()
-config.read(config_path, encoding='utf-8')
-
-# 创建默认配置文件（如果不存在）
-def create_default_config():
-    """创建默认配置文件"""
-    default_config = configparser.ConfigParser()
-    default_config['Settings'] = {
-        'chrome_driver_path': 'chromedriver.exe',
-        'dashscope_api_key': 'YOUR_API_KEY_HERE'
-    }
-    with open(config_path, 'w', encoding='utf-8') as f:
-        default_config.write(f)
-    tk.messagebox.showwarning("配置提示", 
-        "已生成默认配置文件！\n请修改以下内容：\n"
-        "1. chromedriver.exe路径需与Chrome版本匹配\n"
-        "2. 替换为自己的DashScope API密钥")
-
-# 验证配置文件完整性
-if not os.path.exists(config_path):
-    create_default_config()
-else:
-    config.read(config_path, encoding='utf-8')
-
-try:
-    # 验证必要配置项存在
-    if not config.has_section('Settings') or not config.has_option('Settings', 'chrome_driver_path'):
-        raise ValueError("缺少必要配置项")
-        
-    # 读取配置项
-    CHROME_DRIVER_PATH = os.path.join(current_dir, config.get('Settings', 'chrome_driver_path'))
-    DASHSCOPE_API_KEY = config.get('Settings', 'dashscope_api_key')
-    
-    # 检查API密钥是否为默认值
-    if DASHSCOPE_API_KEY == 'YOUR_API_KEY_HERE':
-        tk.messagebox.showwarning("API密钥警告", 
-            "检测到未配置API密钥！\n"
-            "请访问 https://platform.dashscope.cn  获取API密钥\n"
-            "修改根目录下的config.ini文件中的dashscope_api_key字段")
-            
-except (configparser.NoSectionError, configparser.NoOptionError, ValueError) as e:
-    tk.messagebox.showerror("配置错误", 
-        f"配置文件异常：{str(e)}\n请检查以下内容：\n"
-        "1. 是否存在chromedriver.exe配置项\n"
-        "2. 是否已设置有效的API密钥")
-    sys.exit(1)
-
-# 支持流式调用的模型列表
-STREAMING_MODELS = [
-    "qwen3-235b-a22b"
-]
-
-# 模型选项（显示名称 → 实际 model name）
-MODEL_OPTIONS = {
-    "推理模型 Qwen3": "qwen3-235b-a22b",
-    "通义千问 Qwen-Max": "qwen-max",
-    "通义千问 Qwen-Plus": "qwen-plus"
-}
-
-# 默认使用第一个模型
-DEFAULT_MODEL = list(MODEL_OPTIONS.values())[0]
-
-# 配置日志系统
-logging.basicConfig(
-    filename='auto_answer.log',
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
-
-# 资源路径处理（打包专用）
-def resource_path(relative_path):
-    """PyInstaller资源路径处理"""
-    try:
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
-    return os.path.join(base_path, relative_path)
+from answer_cache import AnswerCache
+from browser_session import BrowserSession, blocked_url_patterns
+from locators import format_attempts
+from model_stats import ModelStatsStore
+from app_logging import setup_logging
+from jobs import JobScheduler, JobCancelled
+from run_recorder import RunRecorder
+from tracing import Tracer, instrument_driver, profile_run
+from contextlib import nullcontext
+from settings import DEFAULT_CONFIG_NOTICE, create_default_config
+from ui_bus import UIUpdateBus
+from answer_pipeline import (DEFAULT_MODEL, HEDGE_STATS, MODEL_OPTIONS, QUESTION_TYPES, SETTINGS, AnswerPipeline,
+                             AnswerSession, clear_inputs_bulk, create_ai_client, format_fill_report,
+                             wait_for_page_ready)
+
+# selenium / requests / tenacity 导入较慢，均在用到的函数内延迟导入，
+# 窗口显示后由 preload_heavy_modules 在后台线程提前加载
+
+# 配置日志系统（经队列由后台线程写入，按大小轮转；阶段耗时追踪写在日志旁的 JSON Lines 文件中）
+LOG_PATH = 'auto_answer.log'
+TRACE_PATH = 'auto_answer.trace.jsonl'
+setup_logging(LOG_PATH, max_bytes=SETTINGS.log_max_bytes, backup_count=SETTINGS.log_backup_count)
+
+# 界面更新批量处理间隔（毫秒）
+UI_REFRESH_MS = 50
 
 # ================== 创建 GUI 主窗口 ==================
 class AutoAnswerGUI:
@@ -130,12 +55,62 @@ class AutoAnswerGUI:
         self.content_text = self.create_text_box("AI 返回的 content", row=3, height=6)
         self.reasoning_text = self.create_text_box("AI 返回的 reasoning", row=4, height=6)
         
-        # 模型选择下拉框
+        # 工作线程不直接操作控件，界面更新统一经总线在主线程批量应用
+        self.ui = UIUpdateBus(root, self.log_text, SETTINGS.log_view_max_lines, UI_REFRESH_MS).start()
+        
+        # 模型选择下拉框与运行选项
+        option_frame = tk.Frame(root)
+        option_frame.grid(row=5, column=0, columnspan=2, sticky="ew", padx=10, pady=5)
         self.selected_model = tk.StringVar()
-        self.model_dropdown = ttk.Combobox(root, textvariable=self.selected_model)
+        # 工作线程和页面监视只读 self.model_id，不访问 Tk 变量
+        self.model_id = DEFAULT_MODEL
+        self.selected_model.trace_add("write", self.on_model_selected)
+        self.model_dropdown = ttk.Combobox(option_frame, textvariable=self.selected_model)
         self.model_dropdown['values'] = list(MODEL_OPTIONS.keys())
         self.model_dropdown.current(0)
-        self.model_dropdown.grid(row=5, column=0, columnspan=2, sticky="ew", padx=10, pady=5)
+        self.model_dropdown.pack(side="left", fill="x", expand=True)
+        self.bypass_cache = tk.BooleanVar(value=False)
+        self.bypass_cache_check = tk.Checkbutton(option_frame, text="忽略缓存（重新请求并覆盖）", variable=self.bypass_cache)
+        self.bypass_cache_check.pack(side="left", padx=5)
+        self.profile_next_run = tk.BooleanVar(value=False)
+        self.profile_check = tk.Checkbutton(option_frame, text="性能分析（下一次运行）", variable=self.profile_next_run)
+        self.profile_check.pack(side="left", padx=5)
+        
+        # 阶段耗时追踪
+        self.tracer = Tracer(TRACE_PATH, max_bytes=SETTINGS.log_max_bytes, backup_count=SETTINGS.log_backup_count)
+        
+        # 浏览器会话（复用已运行的调试模式浏览器，driver 失效时自动重连）
+        fast_mode = SETTINGS.browser_fast_mode
+        self.browser = BrowserSession(
+            SETTINGS.chrome_driver_path, wrap=instrument_driver, on_connect=self.on_browser_connected,
+            page_load_strategy="eager" if fast_mode else "normal",
+            blocked_urls=blocked_url_patterns(SETTINGS.browser_blocked_types, SETTINGS.browser_blocked_urls) if fast_mode else ())
+        
+        # 浏览器相关操作统一由单个工作线程依次执行，重复点击合并为一次
+        self.jobs = JobScheduler(on_change=self.on_jobs_changed)
+        
+        # AI 接口客户端（整个程序生命周期内复用连接；首次使用或后台预加载时创建）
+        self.ai_client = None
+        self._ai_client_lock = threading.Lock()
+        
+        # 答案缓存
+        self.answer_cache = None
+        if SETTINGS.cache_enabled:
+            self.answer_cache = AnswerCache(SETTINGS.answer_cache_path, SETTINGS.cache_max_entries, SETTINGS.cache_max_age_days)
+        
+        # 模型调用统计（"自动选择"按它选择模型）
+        self.model_stats = ModelStatsStore(SETTINGS.model_stats_path)
+        
+        # 运行录制（每次答题保存回放用的归档，未启用时为 None）
+        self.recorder = None
+        if SETTINGS.recorder_enabled:
+            self.recorder = RunRecorder(SETTINGS.recordings_path, SETTINGS.recorder_max_files)
+        
+        # 答题流水线（界面只订阅其事件）
+        self.pipeline = self.create_pipeline()
+        
+        # 答题会话：点击答题与页面监视（新的练习页面出现时在后台预取答案）共用流水线和任务调度器
+        self.session = self.create_session()
         
         # 按钮布局
         button_frame = tk.Frame(root)
@@ -148,6 +123,8 @@ class AutoAnswerGUI:
         self.auto_answer_button.pack(side="left", padx=5)
         self.clear_button = tk.Button(button_frame, text="清除所有填空", command=self.clear_all_inputs, width=20)
         self.clear_button.pack(side="left", padx=5)
+        self.cancel_button = tk.Button(button_frame, text="取消任务", command=self.cancel_jobs, width=10, state="disabled")
+        self.cancel_button.pack(side="left", padx=5)
         right_spacer = tk.Frame(button_frame, width=100)
         right_spacer.pack(side="left", expand=True)
         
@@ -155,8 +132,8 @@ class AutoAnswerGUI:
         version_label = tk.Label(root, text="v1.0 | By Wuuz", anchor="center")
         version_label.grid(row=7, column=0, columnspan=2, pady=5)
         
-        # 启动检查
-        self.check_startup()
+        # 窗口绘制完成后再做启动检查、记录启动耗时并在后台预加载重量级依赖
+        self.root.after_idle(self.on_first_paint)
 
     def create_text_box(self, label_text, row, height=5):
         """创建带标签的文本框组件"""
@@ -169,32 +146,92 @@ class AutoAnswerGUI:
         return text_box
 
     def log(self, message):
-        """日志输出方法"""
+        """日志输出方法（可在任意线程调用）"""
         timestamp = time.strftime("%H:%M:%S")
         full_message = f"[{timestamp}] {message}"
         
-        # 写入日志文件
+        # 写入日志文件（经队列异步写入）
         logging.info(full_message)
         
         # 更新界面日志
-        self.log_text.insert(tk.END, full_message + '\n')
-        self.log_text.see(tk.END)
+        self.ui.log(full_message)
+
+    def on_model_selected(self, *args):
+        """下拉框选择变化（主线程中调用）：记下选中的模型名称"""
+        self.model_id = MODEL_OPTIONS.get(self.selected_model.get(), self.model_id)
+
+    def ensure_ai_client(self):
+        """返回 AI 接口客户端，尚未创建时创建（会导入 requests）"""
+        with self._ai_client_lock:
+            if self.ai_client is None:
+                self.ai_client = create_ai_client()
+            return self.ai_client
+
+    def on_first_paint(self):
+        """首个窗口显示后：记录启动耗时、提示配置问题、后台预加载依赖"""
+        first_window = time.perf_counter() - _MODULE_LOAD_START
+        self.log(f"启动耗时：导入模块 {MODULE_IMPORT_SECONDS * 1000:.0f} ms，首个窗口 {first_window * 1000:.0f} ms")
+        self.check_startup()
+        threading.Thread(target=self.preload_in_background, daemon=True).start()
+
+    def preload_in_background(self):
+        """后台线程：预加载 selenium/requests/tenacity 并创建 AI 客户端"""
+        elapsed = preload_heavy_modules()
+        self.ensure_ai_client()
+        logging.info(f"后台预加载依赖完成，耗时 {elapsed * 1000:.0f} ms")
+
+    def submit_job(self, name, func, key, merge_running=True):
+        """提交到工作线程执行；同类任务排队中（merge_running 为 True 时包括执行中）时合并为一次"""
+        job, merged = self.jobs.submit(name, func, key=key, merge_running=merge_running)
+        if merged:
+            state = "执行中" if job.state == "running" else "排队中"
+            self.log(f"已有相同任务{state}，本次请求已合并（{self.jobs.stats_text()}）")
+        else:
+            self.log(f"任务已排队：{name}，当前队列深度 {self.jobs.depth}")
+        return job
+
+    def on_jobs_changed(self):
+        """任务状态变化（工作线程中调用）：在主线程刷新按钮状态"""
+        self.ui.call(self.refresh_buttons)
+
+    def refresh_buttons(self):
+        """按任务状态启用/禁用按钮"""
+        busy = {
+            self.start_browser_button: ("connect_browser", "启动程序", "正在启动..."),
+            self.auto_answer_button: ("auto_answer", "自动答题", "答题中..."),
+            self.clear_button: ("clear_inputs", "清除所有填空", "清除中..."),
+        }
+        for button, (key, idle_text, busy_text) in busy.items():
+            running = self.jobs.is_busy(key)
+            button.config(text=busy_text if running else idle_text, state="disabled" if running else "normal")
+        self.cancel_button.config(state="normal" if self.jobs.foreground_depth else "disabled")
 
-    def get_selected_model_name(self):
-        """获取选中的模型名称"""
-        display_name = self.selected_model.get()
-        return MODEL_OPTIONS[display_name]
+    def cancel_jobs(self):
+        """取消正在执行和排队中的任务（进行中的模型请求会被中断）"""
+        count = self.jobs.cancel_all()
+        if count:
+            self.log(f"正在取消 {count} 个任务...（{self.jobs.stats_text()}）")
 
     def start_browser_only(self):
-        """启动浏览器连接线程"""
+        """提交浏览器连接任务"""
         self.log("正在连接或启动浏览器...")
-        threading.Thread(target=self.connect_browser).start()
+        self.ensure_ai_client().warm_async(self.on_ai_client_warmed)
+        self.submit_job("启动程序", self.connect_browser, key="connect_browser")
+
+    def on_ai_client_warmed(self, elapsed):
+        """AI 接口连接预热完成回调"""
+        if elapsed is not None:
+            self.log(f"AI 接口连接已预热，耗时 {elapsed * 1000:.0f} ms")
 
-    def connect_browser(self):
+    def connect_browser(self, cancel=None):
         """浏览器连接核心逻辑"""
+        from selenium.common.exceptions import WebDriverException
+        self.tracer.new_run()
         try:
-            self.driver = start_new_chrome_browser()
-            current_url = self.driver.current_url
+            with self.tracer.span("launch_browser") as span:
+                driver = self.browser.connect()
+                span.set(mode=self.browser.last_connect[0])
+            current_url = driver.current_url
             
             def is_valid_target_url(url, prefixes):
                 for prefix in prefixes:
@@ -210,115 +247,251 @@ class AutoAnswerGUI:
             else:
                 target_url = "https://ucloud.unipus.cn/"   
                 self.log(f"当前页面不是目标网站，正在跳转至 {target_url}")
-                self.driver.get(target_url)
-                time.sleep(2)
-                new_url = self.driver.current_url
+                with self.tracer.span("navigate", driver=driver, url=target_url,
+                                      fast_mode=self.browser.fast_mode) as navigate_span:
+                    driver.get(target_url)
+                # 等到页面可用即继续（原先固定等待 2 秒）
+                with self.tracer.span("page_ready", driver=driver) as ready_span:
+                    ready = wait_for_page_ready(driver, timeout=SETTINGS.page_ready_timeout)
+                    ready_span.set(ready=ready["ready"], exercise=ready["exercise"], polls=ready["polls"])
+                new_url = driver.current_url
                 self.log(f"页面已跳转至：{new_url}")
+                self.log(f"页面加载耗时：跳转 {navigate_span.duration * 1000:.0f} ms，"
+                         f"等待就绪 {ready_span.duration * 1000:.0f} ms（状态 {ready['state'] or '未知'}，"
+                         f"快速模式{'开启' if self.browser.fast_mode else '关闭'}）")
                 
         except WebDriverException as e:
             error_msg = "浏览器驱动异常：\n"
             error_msg += "1. 确保chromedriver与Chrome版本匹配\n"
             error_msg += "2. 检查驱动路径是否正确\n"
-            error_msg += f"3. 当前路径：{CHROME_DRIVER_PATH}\n"
+            error_msg += f"3. 当前路径：{SETTINGS.chrome_driver_path}\n"
             error_msg += f"错误详情：{str(e)}"
             self.log(error_msg)
-            tk.messagebox.showerror("驱动错误", error_msg)
+            self.ui.call(tk.messagebox.showerror, "驱动错误", error_msg)
         except Exception as e:
             self.log(f"连接浏览器失败：{e}")
-            tk.messagebox.showerror("连接失败", str(e))
+            self.ui.call(tk.messagebox.showerror, "连接失败", str(e))
+
+    def on_browser_connected(self, mode, seconds):
+        """浏览器会话连接完成回调：输出连接方式与耗时"""
+        if mode == "reuse":
+            self.log("浏览器已连接，复用现有会话")
+        elif mode == "attach":
+            self.log(f"已连接到运行中的浏览器，耗时 {seconds:.2f} s")
+        else:
+            self.log(f"已启动新浏览器，耗时 {seconds:.2f} s")
+        if self.browser.reconnects:
+            self.log(f"浏览器会话：{self.browser.stats_text()}")
+
+    def current_driver(self):
+        """当前可用的 driver（失效时自动重连），尚未连接浏览器时返回 None"""
+        return self.browser.get_driver()
 
     def start_auto_answer(self):
-        """启动自动答题线程"""
+        """提交自动答题任务"""
         self.log("开始自动答题流程...")
-        if not hasattr(self, 'driver'):
+        if not self.browser.started and not self.jobs.is_busy("connect_browser"):
             self.log("请先点击【启动程序】连接浏览器！")
             return
-        threading.Thread(target=self.run_auto_answer).start()
-
-    def run_auto_answer(self):
-        """自动答题主流程"""
+        # 界面选项在主线程读取后随任务传入，工作线程不访问 Tk 变量
+        model_id, bypass_cache = self.model_id, self.bypass_cache.get()
+        profile = self.profile_next_run.get()
+        if profile:
+            self.profile_next_run.set(False)
+        # 答题中再次点击可能已换到新的页面：不合并到执行中的任务，只合并到还没开始的任务（它开始时才读取页面）
+        self.submit_job("自动答题", lambda cancel: self.run_auto_answer(cancel, model_id, bypass_cache, profile),
+                        key="auto_answer", merge_running=False)
+
+    def run_auto_answer(self, cancel=None, model_id=DEFAULT_MODEL, bypass_cache=False, profile=False):
+        """自动答题主流程（cancel 为取消标记，取消时抛出 JobCancelled；profile 为是否采集本次运行的性能数据）"""
         self.log("开始执行任务...")
-        if not hasattr(self, 'driver'):
+        driver = self.current_driver()
+        if driver is None:
             self.log("请先点击【启动程序】连接浏览器！")
             return
             
-        driver = self.driver
-        
-        # 提取题目数据
-        data = extract_questions_from_page(driver)
-        self.log("提取题目内容完成")
-        
-        # 清洗题目内容
-        cleaned_questions = [re.sub(r"^\d+\.\s*", "", q).strip() for q in data["questions"]]
-        question_display = "\n".join([f"{i+1}. {cleaned_questions[i]}" for i in range(len(cleaned_questions))])
-        
-        # 更新题目显示区域
-        self.question_text.delete(1.0, tk.END)
-        self.question_text.insert(tk.END, question_display)
-        
-        # 判断题型
-        question_type = determine_question_type(data["instruction"])
-        self.log(f"当前题型：{question_type}")
-        
-        if question_type == "unknown":
-            self.log("题型未知，中止post")
-            return
-            
-        # 获取空格数量
-        total_questions = len(data["questions"])
-        blank_counts = extract_blank_counts(driver, total_questions)
-        
-        # 构造Prompt
-        prompt = build_prompt(data["instruction"], cleaned_questions, data["options"], blank_counts=blank_counts)
-        self.prompt_text.delete(1.0, tk.END)
-        self.prompt_text.insert(tk.END, prompt)
+        run_id = self.tracer.new_run()
         
-        # 调用AI模型
-        selected_model_id = self.get_selected_model_name()
-        self.log(f"正在调用模型：{selected_model_id}")
-        ai_response = call_ai_with_retry(prompt, selected_model_id)
+        # 勾选性能分析时，仅对本次运行采集 cProfile/tracemalloc
+        profile_prefix = None
+        if profile:
+            profile_prefix = f"profile_{time.strftime('%Y%m%d_%H%M%S')}_{run_id}"
         
-        # 解析答案
-        answers = parse_ai_answer(ai_response)
-        self.log(f"解析出的答案结构：{answers}")
-        
-        if not answers:
-            self.log("未解析到有效答案，停止填写流程")
-            return
-            
-        # 显示AI返回结果
         try:
-            result_json = json.loads(ai_response) if isinstance(ai_response, str) and ai_response.startswith("{") else {}
-            content = result_json.get('output', {}).get('text', '') 
-            reasoning = "" 
-            self.content_text.delete(1.0, tk.END)
-            self.content_text.insert(tk.END, content)
-            self.reasoning_text.delete(1.0, tk.END)
-            self.reasoning_text.insert(tk.END, reasoning)
-            self.log("AI 返回结果已更新到界面")
-        except Exception as e:
-            self.log(f"解析 AI 返回失败：{e}")
+            with profile_run(profile_prefix) if profile_prefix else nullcontext():
+                with self.tracer.span("run_auto_answer", driver=driver):
+                    self.session.answer(driver, model_id, cancel=cancel, bypass_cache=bypass_cache)
+        except JobCancelled:
+            self.log("自动答题已取消")
+            raise
         
-        # 填写答案到网页
-        self.log("填写答案到网页...")
-        fill_answers_to_webpage(driver, answers, question_type=question_type)
-        self.log("自动答题已完成！")
+        if profile_prefix:
+            self.log(f"性能分析结果已保存：{profile_prefix}.prof / {profile_prefix}_memory.txt")
+        self.log(self.tracer.summary_text())
+        if SETTINGS.hedge_enabled:
+            self.log(HEDGE_STATS.stats_text())
+        logging.info(self.pipeline.prompt_sizes.stats_text())
+        logging.info(QUESTION_TYPES.stats_text())
+        logging.info(f"界面更新：{self.ui.stats_text()}")
+
+    def create_pipeline(self):
+        """创建答题流水线，界面只订阅其事件"""
+        return AnswerPipeline(client_provider=self.ensure_ai_client, tracer=self.tracer,
+                              answer_cache=self.answer_cache, on_event=self.on_pipeline_event,
+                              model_stats=self.model_stats, recorder=self.recorder)
+
+    def create_session(self):
+        """创建答题会话，按 [Watcher] 配置启用页面监视"""
+        interval = SETTINGS.watcher_interval if SETTINGS.watcher_enabled else None
+        return AnswerSession(self.pipeline, self.jobs, self.watched_driver, lambda: self.model_id,
+                             log=self.log, watch_interval=interval)
+
+    def watched_driver(self):
+        """页面监视使用的 driver：不检查存活也不重连，浏览器未连接时返回 None"""
+        return self.browser.driver
+
+    def on_pipeline_event(self, kind, payload):
+        """答题流水线事件回调（工作线程中调用）：输出日志并更新界面"""
+        if kind == "snapshot":
+            snapshot = payload
+            self.log(f"提取题目内容完成：{len(snapshot.questions)} 题，"
+                     f"WebDriver 往返 {snapshot.roundtrips} 次，耗时 {snapshot.elapsed * 1000:.0f} ms，"
+                     f"定位方案 {snapshot.profile or '无'}")
+            if snapshot.locator_attempts:
+                self.log(f"定位方案尝试：{format_attempts(snapshot.locator_attempts)}")
+            cleaned_questions = snapshot.cleaned_questions()
+            self.ui.replace(self.question_text, "\n".join(f"{i}. {q}" for i, q in enumerate(cleaned_questions, 1)))
+        elif kind == "sections":
+            self.log(f"本页共 {len(payload['sections'])} 个题目部分，合并为一次请求：")
+            for number, (section, question_type) in enumerate(zip(payload["sections"], payload["types"]), 1):
+                skipped = "（题型未知，跳过）" if question_type == "unknown" else ""
+                self.log(f"  第 {number} 部分：第 {section.start + 1}-{section.start + section.count} 题，"
+                         f"题型 {question_type}{skipped}")
+        elif kind == "question_type":
+            self.log(f"当前题型：{payload}")
+            if payload == "unknown":
+                self.log("题型未知，中止post（可在 config.ini 的 [QuestionType 名称] 中添加该题型的说明文字）")
+        elif kind == "prompt":
+            self.ui.replace(self.prompt_text, payload)
+        elif kind == "route":
+            self.log(f"自动选择模型：{payload.model}（{payload.reason}）")
+            for summary in payload.summaries:
+                self.log(f"  {summary.describe()}")
+        elif kind == "prompt_size":
+            self.log(f"Prompt：模板 {payload['template']}，{payload['chars']} 字符，"
+                     f"约 {payload['tokens']} token（{payload['model']}）")
+            if payload["over"]:
+                self.log(f"[警告] Prompt 约 {payload['tokens']} token，超出预算 {payload['budget']} token，"
+                         f"可在 config.ini 的 [Prompt] 中改用 compact 模板")
+        elif kind == "cache_invalidated":
+            self.log("已忽略并删除本题的缓存答案")
+        elif kind == "cache":
+            if payload["answers"] is not None:
+                self.log(f"命中答案缓存，跳过模型调用：{payload['answers']}")
+            self.log(f"答案缓存：{payload['stats']}")
+        elif kind == "model_start":
+            self.log(f"正在调用模型：{payload}")
+            self.ui.clear(self.content_text)
+            self.ui.clear(self.reasoning_text)
+        elif kind == "model_error":
+            self.log(f"AI 调用失败（{payload.kind}）：{payload}")
+            if payload.kind == "auth":
+                self.ui.call(tk.messagebox.showerror, "API Key 错误", "API Key 无效，请检查 DashScope 配置")
+        elif kind == "parsed":
+            answers, response = payload["answers"], payload["response"]
+            self.log(f"解析出的答案结构：{answers}")
+            if answers:
+                # 显示AI返回结果
+                self.ui.replace(self.content_text, response.content)
+                self.ui.replace(self.reasoning_text, response.reasoning)
+                self.log("AI 返回结果已更新到界面")
+        elif kind == "validated":
+            validation = payload
+            if validation.valid:
+                self.log(f"答案校验通过：{validation.total} 题")
+            else:
+                self.log(f"答案校验：{validation.valid_count}/{validation.total} 题有效，"
+                         f"{validation.issue_summary()}")
+            if validation.warnings:
+                self.log(f"答案校验提示（不重新询问，可能是词形变化）：{validation.warning_summary()}")
+        elif kind == "reask":
+            self.log(f"重新询问第 {', '.join(map(str, payload['questions']))} 题："
+                     f"Prompt {payload['prompt_chars']} 字符（完整 Prompt {payload['full_prompt_chars']} 字符）")
+        elif kind == "repaired":
+            validation = payload["validation"]
+            tokens_saved = validation.tokens_saved()
+            saved_text = f"{tokens_saved} token" if tokens_saved is not None else f"{validation.chars_saved()} 字符"
+            remaining = f"，仍有问题：{validation.issue_summary()}" if validation.issues else ""
+            self.log(f"重新询问修复 {payload['fixed']} 题，比重发完整 Prompt 节省输入 {saved_text}{remaining}")
+        elif kind == "speculation":
+            if payload["hit"]:
+                self.log(f"页面与预取时相同，沿用预取的答案，跳过模型调用（约节省 {payload['saved']:.2f} s）")
+            else:
+                self.log("页面或所选模型已与预取时不同，丢弃预取结果")
+        elif kind == "fill_start":
+            self.log("填写答案到网页...")
+        elif kind == "recorded":
+            logging.info(f"已录制本次运行：{payload}")
+        elif kind == "finished":
+            result = payload
+            if result.status == "filled":
+                self.log(f"填写结果：{format_fill_report(result.fill_report)}")
+                if result.snapshot.multi_section:
+                    answered = sum(1 for question_type in result.section_types if question_type != "unknown")
+                    self.log(f"多部分页面：{answered} 个部分共调用模型 {result.model_calls} 次，"
+                             f"总耗时 {result.total_seconds:.2f} s（逐部分答题需调用 {answered} 次）")
+                self.log("自动答题已完成！")
+            elif result.status in ("no_answers", "model_error"):
+                self.log("未解析到有效答案，停止填写流程")
+            elif result.status == "failed":
+                self.log(f"自动答题失败：{result.error}")
+        else:
+            self.on_ai_stream_event(kind, payload)
+
+    def on_ai_stream_event(self, kind, payload):
+        """流式响应回调：实时更新 content/reasoning 并输出耗时"""
+        if kind == "content":
+            self.ui.append(self.content_text, payload)
+        elif kind == "reasoning":
+            self.ui.append(self.reasoning_text, payload)
+        elif kind == "answer":
+            self.log(f"收到答案：{payload}")
+        elif kind == "attempt":
+            error = payload["error"]
+            if error is None:
+                self.log(f"第 {payload['attempt']} 次调用成功，耗时 {payload['elapsed']:.2f} s")
+            else:
+                self.log(f"第 {payload['attempt']} 次调用失败（{error.kind}），耗时 {payload['elapsed']:.2f} s：{error}")
+                # 失败的尝试可能留下部分流式输出，重试前清空
+                self.ui.clear(self.content_text)
+                self.ui.clear(self.reasoning_text)
+        elif kind == "hedge":
+            if payload["triggered"]:
+                winner = f"{payload['model']} 胜出" if payload["model"] else "均未返回可用答案"
+                self.log(f"主模型 {payload['backup_started_at']:.2f} s 内未返回可用答案，已同时请求备用模型：{winner}，"
+                         f"约节省 {payload['saved']:.2f} s")
+        elif kind == "done":
+            first_answer = payload["first_answer"]
+            first_answer_text = f"{first_answer:.2f} s" if first_answer is not None else "无"
+            self.log(f"流式响应结束：首个答案 {first_answer_text}，总耗时 {payload['total']:.2f} s")
 
     def clear_all_inputs(self):
+        """提交清除填空任务"""
+        self.submit_job("清除所有填空", self.run_clear_all_inputs, key="clear_inputs")
+
+    def run_clear_all_inputs(self, cancel=None):
         """清除网页中的填空内容"""
         self.log("正在清除网页中的填空内容...")
+        self.tracer.new_run()
         try:
-            driver = self.driver
-            data = extract_questions_from_page(driver)
-            total_questions = len(data["questions"])
-            
-            for index in range(total_questions):
-                input_xpath_base = f'/html/body/div[3]/div[1]/div[1]/section/section/main/div/div/div/div[3]/div/div[2]/div/div/p[{index + 1}]'
-                p_element = driver.find_element(By.XPATH, input_xpath_base)
-                inputs = p_element.find_elements(By.TAG_NAME, 'input')
-                for input_box in inputs:
-                    input_box.clear()
-                    
+            driver = self.current_driver()
+            if driver is None:
+                self.log("请先点击【启动程序】连接浏览器！")
+                return
+            with self.tracer.span("clear_all_inputs", driver=driver) as span:
+                clear_report = clear_inputs_bulk(driver)
+                span.set(inputs=clear_report["total"])
+            self.log(f"清除结果：{format_fill_report(clear_report)}")
             self.log("所有填空内容已清除")
             
         except Exception as e:
@@ -326,296 +499,52 @@ class AutoAnswerGUI:
 
     def check_startup(self):
         """启动检查"""
+        # 首次运行时生成默认配置文件（读取配置时不写文件，命令行工具和基准测试不会在程序目录生成配置）
+        if SETTINGS.config_missing:
+            create_default_config(SETTINGS.config_path)
+            tk.messagebox.showwarning(*DEFAULT_CONFIG_NOTICE)
+        # 配置文件错误无法继续运行
+        for title, message in SETTINGS.errors:
+            tk.messagebox.showerror(title, message)
+        if SETTINGS.errors:
+            self.root.destroy()
+            return
+        for title, message in SETTINGS.warnings:
+            tk.messagebox.showwarning(title, message)
+        
         # 检查驱动文件是否存在
-        if not os.path.exists(CHROME_DRIVER_PATH):
+        if not os.path.exists(SETTINGS.chrome_driver_path):
             tk.messagebox.showerror("驱动缺失", 
-                f"未找到浏览器驱动：{CHROME_DRIVER_PATH}\n"
+                f"未找到浏览器驱动：{SETTINGS.chrome_driver_path}\n"
                 "请确认：\n"
                 "1. 配置文件中的路径是否正确\n"
                 "2. 驱动文件是否实际存在")
 
 
-# ================== Selenium 浏览器连接函数 ==================
-
-#这里是调试用的
-'''
-def start_new_chrome_browser():
-    """仅尝试连接已存在的 Chrome 浏览器"""
-    chrome_options = Options()
-    chrome_options.add_experimental_option("debuggerAddress", "127.0.0.1:9222")
-    service = Service(CHROME_DRIVER_PATH)
-    
-    try:
-        # 仅尝试连接已有浏览器
-        driver = webdriver.Chrome(options=chrome_options)
-        return driver
-    except WebDriverException as e:
-        error_msg = (
-            "无法连接到已运行的 Chrome 浏览器，请检查："
-            "1. 是否已通过 CMD 手动启动 Chrome 调试模式"
-            "2. 确保使用的是 --remote-debugging-port=9222 参数"
-            "3. 错误详情：" + str(e)
-        )
-        raise RuntimeError(error_msg)
-'''
-def start_new_chrome_browser():
-    """启动一个新的 Chrome 浏览器实例"""
-    chrome_options = Options()
-    chrome_options.add_argument("--remote-debugging-port=9222")
-    chrome_options.add_argument("--user-data-dir=./chrome-profile")  # 可以指定路径
-    chrome_options.add_argument("--disable-gpu")  # 加快启动速度
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-
-    # 启动浏览器
-    driver = webdriver.Chrome(service=Service(resource_path(CHROME_DRIVER_PATH)), options=chrome_options)
-    return driver
-
-# ================== 提取题目内容 ==================
-def extract_questions_from_page(driver):
-    """从网页提取题目内容（指令、问题、选项）"""
-    data = {"instruction": "", "questions": [], "options": []}
-    
-    try:
-        instruction_element = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.XPATH,
-                '/html/body/div[3]/div[1]/div[1]/section/section/main/div/div/div/div[1]/div/div/p'))
-        )
-        data["instruction"] = instruction_element.text.strip()
-    except Exception as e:
-        pass
-    
-    try:
-        question_elements = driver.find_elements(By.XPATH,
-            '/html/body/div[3]/div[1]/div[1]/section/section/main/div/div/div/div[3]/div/div[2]/div/div/p')
-        data["questions"] = [q.text.strip() for q in question_elements]
-    except Exception as e:
-        pass
-    
-    try:
-        script = """
-        const options = [];
-        const elements = document.querySelectorAll('div.option');
-        for (const el of elements) {
-            let text = el.textContent.trim();
-            if (!text) text = el.innerText.trim();
-            if (text) options.push(text);
-        }
-        return options;
-        """
-        data["options"] = driver.execute_script(script)
-    except Exception as e:
-        pass
-    
-    return data
-
-# ================== 题型判断与处理 ==================
-def determine_question_type(instruction):
-    """判断题目类型（支持多种题型）"""
-    
-    # 单空题的多个准确关键词（完全匹配）
-    single_blank_keywords = [
-        "Fill in the blanks with the words given below. Change the form where necessary. Each word can be used only once.",
-        "Fill in the blanks with the expressions given below. Change the form where necessary. Each expression can be used only once."
-    ]
-    
-    # 多空题的关键词（完全匹配）
-    multi_blanks_keyword = "Fill in the blanks by selecting suitable words from the word bank. You may not use any of the words more than once."
-
-    # 检查是否匹配单空题
-    if any(keyword == instruction for keyword in single_blank_keywords):
-        return "single_blank_per_question"
-    
-    # 检查是否匹配多空题
-    elif multi_blanks_keyword == instruction:
-        return "multiple_blanks_per_question"
-    
-    # 都不匹配则返回未知
-    else:
-        return "unknown"
-
-def get_blanks_count_for_question(driver, question_index):
-    """获取单个题目的空格数量"""
-    try:
-        p_xpath = f'/html/body/div[3]/div[1]/div[1]/section/section/main/div/div/div/div[3]/div/div[2]/div/div/p[{question_index + 1}]'
-        p_element = driver.find_element(By.XPATH, p_xpath)
-        return len(p_element.find_elements(By.TAG_NAME, 'input'))
-    except Exception as e:
-        return 0
-
-def extract_blank_counts(driver, total_questions):
-    """批量获取所有题目的空格数量"""
-    return [get_blanks_count_for_question(driver, i) for i in range(total_questions)]
-
-# ================== AI 交互处理 ==================
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_fixed(2),
-    retry=retry_if_exception_type((requests.exceptions.ConnectionError, TimeoutError))
+# ================== 依赖预加载 ==================
+HEAVY_MODULES = (
+    "selenium.webdriver",
+    "selenium.webdriver.chrome.options",
+    "selenium.webdriver.chrome.service",
+    "selenium.webdriver.support.ui",
+    "selenium.webdriver.support.expected_conditions",
+    "requests",
+    "tenacity",
 )
-def call_ai_with_retry(prompt, selected_model_id):
-    """带重试的AI调用"""
-    return call_ai(prompt, selected_model_id)
-
-def call_ai(prompt, selected_model_id):
-    """调用AI接口进行推理"""
-    headers = {
-        "Authorization": f"Bearer {DASHSCOPE_API_KEY}",
-        "Content-Type": "application/json",
-        "User-Agent": "AnswerBot/1.0"
-    }
-    
-    payload = {
-        "model": selected_model_id,
-        "input": {"prompt": prompt},
-        "parameters": {"enable_thinking": False, "result_format": "text"}
-    }
-    
-    stream = selected_model_id in STREAMING_MODELS
-    if stream:
-        payload["parameters"]["stream"] = True
-        
-    try:
-        response = requests.post(
-            url="https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation",   
-            headers=headers,
-            data=json.dumps(payload, ensure_ascii=False).encode('utf-8'),
-            timeout=30
-        )
-        return response.text
-    except Exception as e:
-        return f'{{"error": "{str(e)}"}}'
-
-def build_prompt(instruction, questions, options, blank_counts=None):
-    """构建发送给AI的提示词"""
-    cleaned_questions = [re.sub(r"^\d+\.\s*", "", q).strip() for q in questions]
-    questions_block = "\n".join([f"{i+1}. {cleaned_questions[i]}" for i in range(len(cleaned_questions))])
-    options_block = ", ".join(options)
-    prompt = f"""
-你是一个英语填空题解答助手。我会给你一段题目内容，请你根据提供的可选单词，填写每个空格中最合适的词。
-题目内容如下：
-{questions_block}
-可选单词如下：
-{options_block}
-"""
-    if blank_counts:
-        prompt += "\n请根据以下空格数量填写答案：\n"
-        for i, count in enumerate(blank_counts):
-            prompt += f"第 {i+1} 题有 {count} 个空格\n"
-    prompt += """
-请严格按照以下格式输出答案，不要添加任何额外解释或内容：
-答案：
-"""
-    for i in range(len(questions)):
-        if blank_counts and blank_counts[i] > 0:
-            placeholder = "|".join(["word/phrase"] * blank_counts[i])
-            prompt += f"{i+1}. {placeholder}\n"
-        else:
-            prompt += f"{i+1}. word\n"
-    return prompt
-
-def parse_ai_answer(ai_response):
-    """解析AI返回的JSON格式答案"""
-    try:
-        # 统一处理各种响应格式
-        result = None
-        
-        if isinstance(ai_response, dict):
-            result = ai_response  # 已是字典格式，直接使用
-        elif isinstance(ai_response, str):
-            ai_response = ai_response.strip()
-            if ai_response.startswith("{"):
-                try:
-                    result = json.loads(ai_response)  # 尝试解析为 JSON
-                except json.JSONDecodeError:
-                    result = None
-            else:
-                result = None
-        else:
-            result = None
-
-        # 检查是否是 API Key 错误
-        if result and 'code' in result and result['code'] == 'InvalidApiKey':
-            logging.error("[ERROR] API Key 无效，请检查 DashScope 配置")
-            tk.messagebox.showerror("API Key 错误", "API Key 无效，请检查 DashScope 配置")
-            return []
-
-        # 后续正常解析流程
-        answer_text = ""
-        if result:
-            if 'output' in result:
-                answer_text = result['output'].get('text', '').strip()
-            elif 'choices' in result:
-                answer_text = result['choices'][0]['message'].get('content', '').strip()
-
-        if not answer_text:
-            return []
-
-        if "答案：" in answer_text:
-            answer_text = answer_text.split("答案：", 1)[1].strip()
-
-        lines = answer_text.splitlines()
-        answers = []
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            match = re.match(r'^\s*(\d+)\.\s*(.+)$', line)
-            if match:
-                index, content = match.groups()
-                multi_answers = [ans.strip() for ans in content.split("|")]
-                answers.append(multi_answers)
-            else:
-                logging.warning(f"[WARNING] 无法解析行: {line}")
-
-        return answers
 
-    except Exception as e:
-        logging.error(f"[ERROR] 解析 AI 回答失败: {e}", exc_info=True)
-        return []
+def preload_heavy_modules():
+    """导入重量级依赖（在后台线程调用，避免阻塞窗口显示），返回耗时（秒）"""
+    import importlib
+    start = time.perf_counter()
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+    return time.perf_counter() - start
 
-# ================== 答案填写逻辑 ==================
-def fill_answers_to_webpage(driver, answers, question_type="single_blank_per_question"):
-    """将答案填写到网页对应输入框"""
-    if not answers:
-        print("没有可填写的答案")
-        return
-        
-    if question_type == "single_blank_per_question":
-        for index, answer in enumerate(answers):
-            input_xpath = f'/html/body/div[3]/div[1]/div[1]/section/section/main/div/div/div/div[3]/div/div[2]/div/div/p[{index + 1}]//input'
-            try:
-                input_box = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, input_xpath))
-                )
-                input_box.clear()
-                if answer and isinstance(answer, list) and len(answer) > 0:
-                    input_box.send_keys(answer[0])
-            except Exception as e:
-                print(f"第 {index + 1} 题填写失败：{e} | XPath: {input_xpath}")
-                
-    elif question_type == "multiple_blanks_per_question":
-        for index, answer in enumerate(answers):
-            p_xpath = f'/html/body/div[3]/div[1]/div[1]/section/section/main/div/div/div/div[3]/div/div[2]/div/div/p[{index + 1}]'
-            try:
-                p_element = WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.XPATH, p_xpath))
-                )
-                inputs = p_element.find_elements(By.XPATH, './/span//input')
-                
-                if index >= len(answers) or not answers[index]:
-                    continue
-                
-                for i, input_box in enumerate(inputs):
-                    input_box.clear()
-                    if i < len(answers[index]):
-                        input_box.send_keys(answers[index][i])
-            
-            except Exception as e:
-                print(f"第 {index+1} 题填写失败：{e}")
+# 模块导入耗时（不含解释器启动）
+MODULE_IMPORT_SECONDS = time.perf_counter() - _MODULE_LOAD_START
 
 # ================== 程序入口 ==================
 if __name__ == "__main__":
     root = tk.Tk()
     app = AutoAnswerGUI(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
@@ -0,0 +1,184 @@
+"""模型调用统计：每次调用的耗时、成败和 Prompt/响应大小保存在 SQLite 中，供自动选择模型和离线分析
+
+导出统计（在项目根目录执行）：
+    python model_stats.py                       # 打印各模型汇总
+    python model_stats.py --export stats.csv    # 导出全部调用记录（.csv 或 .jsonl）
+"""
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+from tracing import percentile
+
+COLUMNS = ("model", "created", "latency", "ok", "error", "prompt_chars", "response_chars")
+
+
+@dataclass
+class ModelSummary:
+    """某个模型最近若干次调用的汇总（耗时单位秒）"""
+    model: str
+    samples: int = 0
+    success_rate: float = 0.0
+    p50: float = 0.0
+    p95: float = 0.0
+    avg_prompt_chars: float = 0.0
+    avg_response_chars: float = 0.0
+    # 是否按当前 Prompt 长度筛选（同长度区间样本不足时使用全部样本）
+    size_matched: bool = False
+
+    def describe(self):
+        scope = "同长度区间" if self.size_matched else "全部长度"
+        return (f"{self.model}：{scope} {self.samples} 次，成功率 {self.success_rate:.0%}，"
+                f"p50 {self.p50:.2f} s，p95 {self.p95:.2f} s")
+
+
+@dataclass
+class RoutingDecision:
+    """自动选择模型的结果与理由"""
+    model: str
+    reason: str
+    summaries: list = field(default_factory=list)
+
+
+class ModelStatsStore:
+    """持久化的模型调用记录，每个模型只保留最近 max_rows 条"""
+
+    def __init__(self, path, max_rows=1000):
+        self.path = path
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        # sqlite3 在创建统计时才导入，不计入 main 的导入耗时
+        import sqlite3
+        # 答题在工作线程中执行，连接需要跨线程使用
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS calls ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " model TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " latency REAL NOT NULL,"
+                " ok INTEGER NOT NULL,"
+                " error TEXT,"
+                " prompt_chars INTEGER NOT NULL,"
+                " response_chars INTEGER NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS calls_model ON calls (model, id)")
+
+    def record(self, model, latency, ok, prompt_chars, response_chars=0, error=None):
+        """记录一次模型调用；ok 表示得到了可解析的答案，error 为失败类型"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO calls (model, created, latency, ok, error, prompt_chars, response_chars)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (model, time.time(), latency, int(bool(ok)), error, prompt_chars, response_chars),
+            )
+            self._conn.execute(
+                "DELETE FROM calls WHERE model = ? AND id NOT IN"
+                " (SELECT id FROM calls WHERE model = ? ORDER BY id DESC LIMIT ?)",
+                (model, model, self.max_rows),
+            )
+
+    def _recent(self, model, window, prompt_chars=None):
+        query = "SELECT latency, ok, prompt_chars, response_chars FROM calls WHERE model = ?"
+        params = [model]
+        if prompt_chars is not None:
+            # 长度区间：当前 Prompt 长度的一半到两倍
+            query += " AND prompt_chars BETWEEN ? AND ?"
+            params += [prompt_chars // 2, prompt_chars * 2]
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(window)
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+    def summary(self, model, prompt_chars=None, window=50, min_samples=5):
+        """最近 window 次调用的汇总；给出 prompt_chars 时优先使用长度相近的记录"""
+        rows = self._recent(model, window, prompt_chars) if prompt_chars is not None else []
+        size_matched = len(rows) >= min_samples
+        if not size_matched:
+            rows = self._recent(model, window)
+        result = ModelSummary(model, samples=len(rows), size_matched=size_matched)
+        if not rows:
+            return result
+        # 耗时只统计成功的调用（失败的耗时由成功率体现）
+        latencies = [row[0] for row in rows if row[1]]
+        result.success_rate = len(latencies) / len(rows)
+        result.p50 = percentile(latencies, 50)
+        result.p95 = percentile(latencies, 95)
+        result.avg_prompt_chars = sum(row[2] for row in rows) / len(rows)
+        result.avg_response_chars = sum(row[3] for row in rows) / len(rows)
+        return result
+
+    def choose(self, models, prompt_chars, min_success_rate=0.9, min_samples=5, window=50, explore_rate=0.1,
+               rng=random):
+        """选出样本足够且成功率达标的模型中 p50 耗时最短的一个；都不满足时使用第一个模型
+
+        自动选择只会积累所选模型的统计，因此需要探索：有样本不足 min_samples 的模型时先选它（样本最少的优先），
+        每个模型最多多花 min_samples 次调用；之后按 explore_rate 的比例改选其他达标模型，让各模型的统计保持更新。
+        """
+        summaries = [self.summary(model, prompt_chars, window, min_samples) for model in models]
+        eligible = [s for s in summaries if s.samples >= min_samples and s.success_rate >= min_success_rate]
+        undersampled = [s for s in summaries if s.samples < min_samples]
+        if undersampled:
+            pick = min(undersampled, key=lambda s: s.samples)
+            reason = f"探索：{pick.model} 样本不足（{pick.samples}/{min_samples} 次），先积累统计"
+            return RoutingDecision(pick.model, reason, summaries)
+        if len(eligible) > 1 and rng.random() < explore_rate:
+            best = min(eligible, key=lambda s: s.p50)
+            pick = rng.choice([s for s in eligible if s is not best])
+            reason = f"探索：按 {explore_rate:.0%} 的比例改选达标模型 {pick.model}，更新其统计"
+            return RoutingDecision(pick.model, reason, summaries)
+        if eligible:
+            best = min(eligible, key=lambda s: s.p50)
+            reason = (f"成功率不低于 {min_success_rate:.0%} 的模型中 p50 耗时最短"
+                      f"（{best.p50:.2f} s，{len(eligible)}/{len(summaries)} 个模型达标）")
+            return RoutingDecision(best.model, reason, summaries)
+        reason = f"没有模型同时满足 {min_samples} 次以上样本和 {min_success_rate:.0%} 成功率，使用默认模型"
+        return RoutingDecision(models[0], reason, summaries)
+
+    def export(self, path):
+        """导出全部调用记录：.csv 为表格，其他扩展名为 JSON Lines；返回导出的行数"""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(COLUMNS)} FROM calls ORDER BY id").fetchall()
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            if path.lower().endswith(".csv"):
+                import csv
+                writer = csv.writer(f)
+                writer.writerow(COLUMNS)
+                writer.writerows(rows)
+            else:
+                for row in rows:
+                    f.write(json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + "\n")
+        return len(rows)
+
+    def models(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT model FROM calls ORDER BY model")]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def cli(argv=None):
+    import argparse
+    from settings import load_settings
+    settings = load_settings()
+    parser = argparse.ArgumentParser(description="查看或导出模型调用统计")
+    parser.add_argument("--db", default=settings.model_stats_path, help="统计数据库路径")
+    parser.add_argument("--export", help="导出调用记录到文件（.csv 或 .jsonl）")
+    args = parser.parse_args(argv)
+    store = ModelStatsStore(args.db)
+    try:
+        for model in store.models():
+            print(store.summary(model, window=settings.routing_window).describe())
+        if args.export:
+            print(f"已导出 {store.export(args.export)} 条记录到 {args.export}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,115 @@
+"""页面监视：在点击"自动答题"之前发现新的练习页面，提前提取题目并准备好答案
+
+浏览器操作仍全部在任务调度器的工作线程中执行：监视线程只按间隔提交后台探测任务。
+探测脚本在题目容器上挂一个 MutationObserver 记录变化次数，页面变化后等到连续两次探测结果相同
+（内容稳定）再预取；点击时页面内容与预取时相同就只做填写，不同则丢弃预取结果照常答题。
+"""
+import logging
+import threading
+
+WATCH_KEY = "page_watch"
+
+
+class PageWatcher:
+    """按间隔探测页面，页面变化并稳定后预取答案
+
+    probe(cancel) → 页面状态（可比较的值，不是练习页面或浏览器未连接时返回 None）
+    speculate(cancel, previous) → 预取结果（PipelineResult）；previous 为上一次的结果，内容未变时可直接沿用
+    点击答题时用 take() 取出预取结果，答题结束后用 record() 记录是否命中。
+    """
+
+    def __init__(self, scheduler, probe, speculate, interval=1.0):
+        self.scheduler = scheduler
+        self.probe = probe
+        self.speculate = speculate
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._state = None
+        self._settled = False
+        # 当前页面最近一次预取或填写的结果
+        self._result = None
+        # 统计：预取次数、点击命中 / 未命中、因页面变化丢弃的预取、命中时节省的时间
+        self.speculations = 0
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+        self.saved_seconds = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="uai-page-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            # 有排队或执行中的任务时不探测，点击答题优先
+            if self.scheduler.depth == 0:
+                self.scheduler.submit("监视页面", self.check, key=WATCH_KEY, background=True)
+
+    def check(self, cancel=None):
+        """探测一次页面（在工作线程中执行）；页面变化后稳定下来时运行预取"""
+        try:
+            state = self.probe(cancel)
+        except Exception as e:
+            logging.warning(f"[WARNING] 页面监视探测失败: {e}")
+            return
+        if state is None:
+            self._state = None
+            return
+        if state != self._state:
+            self._state = state
+            self._settled = False
+            return
+        if self._settled:
+            return
+        self._settled = True
+        previous = self.peek()
+        result = self.speculate(cancel, previous)
+        with self._lock:
+            if result.speculated:
+                # 页面内容没变，沿用之前的结果
+                return
+            self.speculations += 1
+            if previous is not None and previous.status == "prepared":
+                self.discarded += 1
+            self._result = result if result.status == "prepared" else None
+
+    def peek(self):
+        with self._lock:
+            return self._result
+
+    def take(self):
+        """点击答题时取出预取结果（没有时返回 None）"""
+        with self._lock:
+            result = self._result
+            return result if result is not None and result.status == "prepared" else None
+
+    def record(self, result, speculation):
+        """记录一次点击答题的结果：result.speculated 表示沿用了预取的答案"""
+        with self._lock:
+            if result.speculated:
+                self.hits += 1
+                self.saved_seconds += result.speculation_saved
+            else:
+                self.misses += 1
+                if speculation is not None:
+                    self.discarded += 1
+            # 已填写的页面再次变化但内容不变时，不再重复预取
+            if result.status == "filled":
+                self._result = result
+
+    @property
+    def hit_rate(self):
+        clicks = self.hits + self.misses
+        return self.hits / clicks if clicks else 0.0
+
+    def stats_text(self):
+        with self._lock:
+            return (f"预取 {self.speculations} 次，点击命中 {self.hits}/{self.hits + self.misses}"
+                    f"（{self.hit_rate:.0%}），丢弃过期预取 {self.discarded} 次，累计节省 {self.saved_seconds:.2f} s")
@@ -0,0 +1,237 @@
+"""题型注册表：按题目说明判断题型，每种题型由一个处理器负责决定填写哪些输入框
+
+说明文字先规范化为签名（小写、只保留字母和数字），在预先建好的签名索引中查找；
+查不到时与已知签名做模糊匹配（措辞略有差异的说明），结果按签名缓存，同一说明只比对一次。
+新题型只需增加处理器（或在 config.ini 的 [QuestionType 名称] 小节中声明），不必修改判断和填写流程。
+"""
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+UNKNOWN_TYPE = "unknown"
+
+_SIGNATURE_RE = re.compile(r"[^a-z0-9]+")
+
+
+def instruction_signature(instruction):
+    """说明文字的签名：忽略大小写、标点和空白差异"""
+    return _SIGNATURE_RE.sub(" ", (instruction or "").lower()).strip()
+
+
+class QuestionTypeHandler:
+    """一种题型：instructions 为已知的说明文字，输入框的选择策略决定每题填写哪些空"""
+
+    def __init__(self, name, instructions=()):
+        self.name = name
+        self.instructions = tuple(instructions)
+
+    def select_inputs(self, inputs):
+        """从该题的全部输入框（快照中的标识或页面元素）中选出要填写的，默认全部"""
+        return list(inputs)
+
+    def fill_entries(self, answer, input_ids):
+        """把一题的答案展开为 [(输入框标识, 值), ...]，答案不足的空填空字符串"""
+        return [(input_id, answer[i] if i < len(answer) else "")
+                for i, input_id in enumerate(self.select_inputs(input_ids))]
+
+    def find_inputs(self, driver, question_xpath, timeout=10):
+        """没有快照时按题目段落的 XPath 查找该题的输入框"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+        p_element = WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.XPATH, question_xpath)))
+        return p_element.find_elements(By.XPATH, './/input')
+
+    def derive(self, name, instructions):
+        """同一填写策略的新题型（配置中以 based_on 声明）"""
+        handler = type(self).__new__(type(self))
+        handler.__dict__.update(self.__dict__)
+        handler.name = name
+        handler.instructions = tuple(instructions)
+        return handler
+
+
+class SingleBlankHandler(QuestionTypeHandler):
+    """每题一个空：只填写第一个输入框"""
+
+    def select_inputs(self, inputs):
+        return list(inputs)[:1]
+
+    def find_inputs(self, driver, question_xpath, timeout=10):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+        return [WebDriverWait(driver, timeout).until(EC.element_to_be_clickable((By.XPATH, f'{question_xpath}//input')))]
+
+
+class MultiBlankHandler(QuestionTypeHandler):
+    """每题多个空：依次填写全部输入框"""
+
+    def find_inputs(self, driver, question_xpath, timeout=10):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+        p_element = WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.XPATH, question_xpath)))
+        return p_element.find_elements(By.XPATH, './/span//input')
+
+
+BUILTIN_HANDLERS = (
+    SingleBlankHandler("single_blank_per_question", (
+        "Fill in the blanks with the words given below. Change the form where necessary. Each word can be used only once.",
+        "Fill in the blanks with the expressions given below. Change the form where necessary. Each expression can be used only once.",
+    )),
+    MultiBlankHandler("multiple_blanks_per_question", (
+        "Fill in the blanks by selecting suitable words from the word bank. You may not use any of the words more than once.",
+    )),
+)
+
+# 题型未知时的填写策略（多部分页面中跳过的部分没有答案，不会实际填写）
+FALLBACK_HANDLER = QuestionTypeHandler(UNKNOWN_TYPE)
+
+
+@dataclass(frozen=True)
+class TypeMatch:
+    """一次题型判断的结果：how 为 exact（签名命中）/ fuzzy（模糊匹配）/ none，score 为相似度"""
+    name: str
+    how: str
+    score: float = 1.0
+
+
+class QuestionTypeRegistry:
+    """题型处理器注册表：签名索引 + 模糊匹配（按签名缓存结果），并统计判断次数和耗时"""
+
+    def __init__(self, handlers=BUILTIN_HANDLERS, fuzzy_threshold=0.9, max_cached=1024):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.max_cached = max_cached
+        self._handlers = {}
+        self._index = {}
+        self._fuzzy = {}
+        # 原样说明文字 → 判断结果，同一页面反复判断时省去规范化
+        self._seen = {}
+        self._lock = threading.Lock()
+        # 统计：判断次数、签名命中、模糊匹配（首次比对）、缓存命中、未知、累计耗时
+        self.lookups = 0
+        self.exact = 0
+        self.fuzzy = 0
+        self.cached = 0
+        self.unknown = 0
+        self.seconds = 0.0
+        for handler in handlers:
+            self.register(handler)
+
+    def register(self, handler):
+        """注册（或替换同名）处理器，重建签名索引"""
+        with self._lock:
+            self._handlers[handler.name] = handler
+            self._index = {instruction_signature(instruction): name
+                           for name, registered in self._handlers.items()
+                           for instruction in registered.instructions}
+            self._fuzzy.clear()
+            self._seen.clear()
+        return handler
+
+    @property
+    def names(self):
+        return list(self._handlers)
+
+    def handler(self, name):
+        """题型对应的处理器；未注册的题型使用 FALLBACK_HANDLER"""
+        return self._handlers.get(name, FALLBACK_HANDLER)
+
+    def classify(self, instruction):
+        """判断题型，返回题型名称（无法判断时为 "unknown"）"""
+        return self.match(instruction).name
+
+    def match(self, instruction):
+        start = time.perf_counter()
+        with self._lock:
+            result = self._seen.get(instruction)
+            if result is None:
+                result = self._match_signature(instruction)
+                if len(self._seen) >= self.max_cached:
+                    self._seen.clear()
+                self._seen[instruction] = result
+            elif result.how == "exact":
+                self.exact += 1
+            else:
+                self.cached += 1
+            if result.name == UNKNOWN_TYPE:
+                self.unknown += 1
+            self.lookups += 1
+            self.seconds += time.perf_counter() - start
+        return result
+
+    def _match_signature(self, instruction):
+        signature = instruction_signature(instruction)
+        name = self._index.get(signature)
+        if name is not None:
+            self.exact += 1
+            return TypeMatch(name, "exact")
+        if signature in self._fuzzy:
+            self.cached += 1
+            return self._fuzzy[signature]
+        result = self._fuzzy_match(signature) if signature else TypeMatch(UNKNOWN_TYPE, "none", 0.0)
+        if len(self._fuzzy) >= self.max_cached:
+            self._fuzzy.clear()
+        self._fuzzy[signature] = result
+        if result.how == "fuzzy":
+            self.fuzzy += 1
+            logging.info(f"题型说明近似匹配：{result.name}（相似度 {result.score:.2f}）：{instruction}")
+        return result
+
+    def _fuzzy_match(self, signature):
+        """与全部已知签名比较，取相似度最高且不低于阈值的题型"""
+        # 只有签名查不到时才需要 difflib，启动时不导入
+        import difflib
+        best, best_score = None, 0.0
+        matcher = difflib.SequenceMatcher(autojunk=False)
+        matcher.set_seq2(signature)
+        for known, name in self._index.items():
+            matcher.set_seq1(known)
+            if matcher.real_quick_ratio() < self.fuzzy_threshold or matcher.quick_ratio() < self.fuzzy_threshold:
+                continue
+            score = matcher.ratio()
+            if score > best_score:
+                best, best_score = name, score
+        if best is None or best_score < self.fuzzy_threshold:
+            return TypeMatch(UNKNOWN_TYPE, "none", best_score)
+        return TypeMatch(best, "fuzzy", best_score)
+
+    def stats_text(self):
+        with self._lock:
+            average = self.seconds / self.lookups * 1e6 if self.lookups else 0.0
+            return (f"题型判断 {self.lookups} 次（签名命中 {self.exact}，模糊匹配 {self.fuzzy}，缓存 {self.cached}，"
+                    f"未知 {self.unknown}），平均 {average:.1f} µs")
+
+
+def load_handlers(parser, warnings=None):
+    """从配置读取题型
+
+    [QuestionType 名称] 小节的 instructions 为该题型的说明文字（每行一条），based_on 为沿用其填写策略的内置题型
+    （默认 multiple_blanks_per_question，即填写每题的全部输入框）；与内置题型同名时为其追加说明文字。
+    """
+    builtin = {handler.name: handler for handler in BUILTIN_HANDLERS}
+    handlers = dict(builtin)
+    for section in parser.sections():
+        if not section.startswith("QuestionType "):
+            continue
+        name = section[len("QuestionType "):].strip()
+        instructions = [line.strip() for line in parser.get(section, "instructions", fallback="").splitlines()
+                        if line.strip()]
+        if not instructions:
+            if warnings is not None:
+                warnings.append(("题型配置", f"题型 {name} 缺少 instructions，已忽略"))
+            continue
+        if name in builtin:
+            handlers[name] = builtin[name].derive(name, builtin[name].instructions + tuple(instructions))
+            continue
+        base_name = parser.get(section, "based_on", fallback="multiple_blanks_per_question").strip()
+        base = builtin.get(base_name)
+        if base is None:
+            if warnings is not None:
+                warnings.append(("题型配置", f"题型 {name} 的 based_on 不是内置题型：{base_name}，已忽略"))
+            continue
+        handlers[name] = base.derive(name, instructions)
+    return list(handlers.values())
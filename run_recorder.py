@@ -0,0 +1,75 @@
+"""运行录制：把一次答题的页面快照、Prompt、模型原始响应（含流式片段及其时间）、解析出的答案
+和逐个输入框的填写结果保存为压缩归档（每次运行一个 .json.gz），供离线回放（benchmarks/replay.py）
+
+归档内容由 AnswerPipeline 组装，这里只负责写入、按数量淘汰和读取。
+"""
+import json
+import os
+import threading
+import time
+
+ARCHIVE_VERSION = 1
+ARCHIVE_SUFFIX = ".json.gz"
+
+
+class RunRecorder:
+    """把归档写入 directory，超过 max_files 个时删除最旧的"""
+
+    def __init__(self, directory, max_files=200):
+        self.directory = directory
+        self.max_files = max_files
+        self.saved = 0
+        self._lock = threading.Lock()
+        self._sequence = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def save(self, archive):
+        """写入一次运行的归档，返回文件路径"""
+        with self._lock:
+            self._sequence += 1
+            name = f"run_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{self._sequence:04d}{ARCHIVE_SUFFIX}"
+            path = os.path.join(self.directory, name)
+            data = dict(archive, version=ARCHIVE_VERSION, recorded_at=time.time())
+            raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            import gzip
+            with gzip.open(path, "wb", compresslevel=6) as f:
+                f.write(raw)
+            self.saved += 1
+            self.prune()
+        return path
+
+    def prune(self):
+        """只保留最新的 max_files 个归档"""
+        if not self.max_files:
+            return
+        archives = list_archives(self.directory)
+        for path in archives[:-self.max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats_text(self):
+        return f"本次已录制 {self.saved} 次运行（{self.directory}）"
+
+
+def list_archives(*paths):
+    """展开文件和目录为归档路径列表（目录内按文件名即录制时间排序）"""
+    archives = []
+    for path in paths:
+        if os.path.isdir(path):
+            archives.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                   if name.endswith(ARCHIVE_SUFFIX)))
+        else:
+            archives.append(path)
+    return archives
+
+
+def load_archive(path):
+    """读取归档；版本不符时抛出 ValueError"""
+    import gzip
+    with gzip.open(path, "rb") as f:
+        data = json.loads(f.read().decode("utf-8"))
+    if data.get("version") != ARCHIVE_VERSION:
+        raise ValueError(f"不支持的归档版本：{data.get('version')}（{path}）")
+    return data
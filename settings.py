@@ -0,0 +1,252 @@
+"""程序配置：启动时只读取一次 config.ini，配置问题先记录下来，等窗口创建后再提示"""
+import configparser
+import os
+import sys
+from dataclasses import dataclass, field
+
+from locators import BUILTIN_PROFILES, load_profiles
+from question_types import BUILTIN_HANDLERS, load_handlers
+
+DEFAULT_API_KEY = 'YOUR_API_KEY_HERE'
+DEFAULT_CONFIG = {
+    'Settings': {
+        'chrome_driver_path': 'chromedriver.exe',
+        'dashscope_api_key': DEFAULT_API_KEY
+    }
+}
+# 界面首次运行生成默认配置文件后的提示
+DEFAULT_CONFIG_NOTICE = ("配置提示",
+    "已生成默认配置文件！\n请修改以下内容：\n"
+    "1. chromedriver.exe路径需与Chrome版本匹配\n"
+    "2. 替换为自己的DashScope API密钥")
+DASHSCOPE_URL = "https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation"
+
+
+def get_app_dir():
+    """当前运行路径（适用于开发环境和打包后的exe）"""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def get_config_path():
+    """配置文件路径（可用环境变量 UAI_TOOL_CONFIG 指定其他配置文件，供离线基准测试使用）"""
+    return os.environ.get('UAI_TOOL_CONFIG') or os.path.join(get_app_dir(), 'config.ini')
+
+
+@dataclass
+class AppSettings:
+    """config.ini 中的全部配置项"""
+    config_path: str
+    app_dir: str
+    parser: configparser.ConfigParser = field(repr=False)
+    # 配置文件不存在（此时按默认配置运行，由界面在启动检查时生成配置文件）
+    config_missing: bool = False
+    chrome_driver_path: str = ""
+    dashscope_api_key: str = ""
+    # [AI] 接口连接、重试与熔断
+    ai_endpoint: str = DASHSCOPE_URL
+    ai_connect_timeout: float = 5
+    ai_read_timeout: float = 30
+    ai_pool_size: int = 4
+    ai_max_attempts: int = 3
+    ai_retry_max_wait: float = 20
+    ai_retry_budget: float = 90
+    ai_breaker_threshold: int = 5
+    ai_breaker_cooldown: float = 60
+    # [Hedge] 对冲请求：主模型超过 delay 秒仍无可用答案时，同时请求备用模型
+    hedge_enabled: bool = False
+    hedge_delay: float = 8
+    hedge_backup_model: str = "qwen-plus"
+    # [Routing] 自动选择模型：成功率门槛、最少样本数、参考最近多少次调用、探索其他模型的比例
+    routing_min_success_rate: float = 0.9
+    routing_min_samples: int = 5
+    routing_window: int = 50
+    routing_explore_rate: float = 0.1
+    # [Prompt] Prompt 模板（verbose / compact）与 token 预算（0 为不检查）
+    prompt_template: str = "verbose"
+    prompt_token_budget: int = 0
+    # [Validation] 答案校验：有问题的题是否单独重新询问、最多几轮、是否检查答案来自可选单词
+    validation_reask: bool = True
+    validation_max_reask_rounds: int = 1
+    validation_check_options: bool = True
+    # [Watcher] 页面监视：发现新的练习页面后提前提取题目并预取答案，interval 为探测间隔（秒）
+    watcher_enabled: bool = False
+    watcher_interval: float = 1.0
+    # [Recorder] 运行录制：每次答题保存一个回放用的压缩归档，directory 相对 config.ini 所在目录
+    recorder_enabled: bool = False
+    recorder_directory: str = "recordings"
+    recorder_max_files: int = 200
+    # [Cache] 答案缓存
+    cache_enabled: bool = True
+    cache_max_entries: int = 500
+    cache_max_age_days: int = 30
+    # [Browser] 快速加载模式：eager 加载策略 + 屏蔽无关资源
+    browser_fast_mode: bool = False
+    browser_blocked_types: list = field(default_factory=lambda: ["image", "font", "media"])
+    browser_blocked_urls: list = field(default_factory=list)
+    page_ready_timeout: float = 10
+    # [Locators] / [Locator 名称] 页面定位方案（按顺序尝试）
+    locator_profiles: list = field(default_factory=lambda: list(BUILTIN_PROFILES))
+    # [QuestionTypes] / [QuestionType 名称] 题型及其说明文字，fuzzy_threshold 为近似说明的最低相似度
+    question_types: list = field(default_factory=lambda: list(BUILTIN_HANDLERS))
+    question_type_fuzzy_threshold: float = 0.9
+    # [Log] 日志文件轮转与界面日志行数上限
+    log_max_bytes: int = 1_000_000
+    log_backup_count: int = 3
+    log_view_max_lines: int = 1000
+    # 延后到窗口创建后显示的提示：[(标题, 内容), ...]
+    warnings: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+
+    @property
+    def config_dir(self):
+        return os.path.dirname(os.path.abspath(self.config_path))
+
+    @property
+    def answer_cache_path(self):
+        """答案缓存（与 config.ini 同目录）"""
+        return os.path.join(self.config_dir, 'answer_cache.db')
+
+    @property
+    def recordings_path(self):
+        """运行录制归档目录（相对路径相对 config.ini 所在目录）"""
+        return os.path.join(self.config_dir, self.recorder_directory)
+
+    @property
+    def model_stats_path(self):
+        """模型调用统计（与 config.ini 同目录）"""
+        return os.path.join(self.config_dir, 'model_stats.db')
+
+
+def resolve_driver_path(configured_path, app_dir):
+    """驱动路径只解析一次：绝对路径原样使用，相对路径相对程序目录；
+    打包后程序目录下没有该文件时，再找 PyInstaller 解包目录中随程序打包的驱动"""
+    if os.path.isabs(configured_path):
+        return configured_path
+    path = os.path.join(app_dir, configured_path)
+    bundle_dir = getattr(sys, '_MEIPASS', None)
+    if bundle_dir and not os.path.exists(path):
+        bundled_path = os.path.join(bundle_dir, configured_path)
+        if os.path.exists(bundled_path):
+            return bundled_path
+    return path
+
+
+def split_list(value):
+    """逗号分隔的配置值转为列表"""
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def read_option(getter, section, key, fallback, invalid):
+    """用 getter（parser.getint 等）读取一个配置项；值无法解析时使用默认值，并把该项记入 invalid"""
+    try:
+        return getter(section, key, fallback=fallback)
+    except ValueError:
+        invalid.append(f"[{section}] {key} = {getter.__self__.get(section, key, fallback='')}")
+        return fallback
+
+
+def create_default_config(config_path):
+    """创建默认配置文件"""
+    default_config = configparser.ConfigParser()
+    default_config.read_dict(DEFAULT_CONFIG)
+    with open(config_path, 'w', encoding='utf-8') as f:
+        default_config.write(f)
+
+
+def load_settings(config_path=None):
+    """读取配置文件，只读一次；文件不存在时按默认配置读取，不写文件（由界面生成默认配置文件）"""
+    config_path = config_path or get_config_path()
+    app_dir = get_app_dir()
+    parser = configparser.ConfigParser()
+    settings = AppSettings(config_path=config_path, app_dir=app_dir, parser=parser)
+
+    if os.path.exists(config_path):
+        parser.read(config_path, encoding='utf-8')
+    else:
+        settings.config_missing = True
+        parser.read_dict(DEFAULT_CONFIG)
+
+    try:
+        # 验证必要配置项存在
+        if not parser.has_section('Settings') or not parser.has_option('Settings', 'chrome_driver_path'):
+            raise ValueError("缺少必要配置项")
+
+        settings.chrome_driver_path = resolve_driver_path(parser.get('Settings', 'chrome_driver_path'), app_dir)
+        settings.dashscope_api_key = parser.get('Settings', 'dashscope_api_key')
+
+        # 检查API密钥是否为默认值
+        if settings.dashscope_api_key == DEFAULT_API_KEY:
+            settings.warnings.append(("API密钥警告",
+                "检测到未配置API密钥！\n"
+                "请访问 https://platform.dashscope.cn  获取API密钥\n"
+                "修改根目录下的config.ini文件中的dashscope_api_key字段"))
+    except (configparser.NoSectionError, configparser.NoOptionError, ValueError) as e:
+        settings.errors.append(("配置错误",
+            f"配置文件异常：{str(e)}\n请检查以下内容：\n"
+            "1. 是否存在chromedriver.exe配置项\n"
+            "2. 是否已设置有效的API密钥"))
+
+    # 数值和开关配置项写错时不影响启动：逐项回退为默认值，启动后统一提示
+    invalid = []
+
+    def read(getter, section, key, fallback):
+        return read_option(getter, section, key, fallback, invalid)
+
+    settings.ai_endpoint = parser.get('AI', 'endpoint', fallback=DASHSCOPE_URL)
+    settings.ai_connect_timeout = read(parser.getfloat, 'AI', 'connect_timeout', 5)
+    settings.ai_read_timeout = read(parser.getfloat, 'AI', 'read_timeout', 30)
+    settings.ai_pool_size = read(parser.getint, 'AI', 'pool_size', 4)
+    settings.ai_max_attempts = read(parser.getint, 'AI', 'max_attempts', 3)
+    settings.ai_retry_max_wait = read(parser.getfloat, 'AI', 'retry_max_wait', 20)
+    settings.ai_retry_budget = read(parser.getfloat, 'AI', 'retry_budget', 90)
+    settings.ai_breaker_threshold = read(parser.getint, 'AI', 'breaker_threshold', 5)
+    settings.ai_breaker_cooldown = read(parser.getfloat, 'AI', 'breaker_cooldown', 60)
+
+    settings.hedge_enabled = read(parser.getboolean, 'Hedge', 'enabled', False)
+    settings.hedge_delay = read(parser.getfloat, 'Hedge', 'delay', 8)
+    settings.hedge_backup_model = parser.get('Hedge', 'backup_model', fallback='qwen-plus').strip()
+
+    settings.routing_min_success_rate = read(parser.getfloat, 'Routing', 'min_success_rate', 0.9)
+    settings.routing_min_samples = read(parser.getint, 'Routing', 'min_samples', 5)
+    settings.routing_window = read(parser.getint, 'Routing', 'window', 50)
+    settings.routing_explore_rate = read(parser.getfloat, 'Routing', 'explore_rate', 0.1)
+
+    settings.prompt_template = parser.get('Prompt', 'template', fallback='verbose').strip()
+    settings.prompt_token_budget = read(parser.getint, 'Prompt', 'token_budget', 0)
+
+    settings.validation_reask = read(parser.getboolean, 'Validation', 'reask', True)
+    settings.validation_max_reask_rounds = read(parser.getint, 'Validation', 'max_reask_rounds', 1)
+    settings.validation_check_options = read(parser.getboolean, 'Validation', 'check_options', True)
+
+    settings.watcher_enabled = read(parser.getboolean, 'Watcher', 'enabled', False)
+    settings.watcher_interval = read(parser.getfloat, 'Watcher', 'interval', 1.0)
+
+    settings.recorder_enabled = read(parser.getboolean, 'Recorder', 'enabled', False)
+    settings.recorder_directory = parser.get('Recorder', 'directory', fallback='recordings').strip() or 'recordings'
+    settings.recorder_max_files = read(parser.getint, 'Recorder', 'max_files', 200)
+
+    settings.cache_enabled = read(parser.getboolean, 'Cache', 'enabled', True)
+    settings.cache_max_entries = read(parser.getint, 'Cache', 'max_entries', 500)
+    settings.cache_max_age_days = read(parser.getint, 'Cache', 'max_age_days', 30)
+
+    settings.browser_fast_mode = read(parser.getboolean, 'Browser', 'fast_mode', False)
+    if parser.has_option('Browser', 'blocked_types'):
+        settings.browser_blocked_types = split_list(parser.get('Browser', 'blocked_types'))
+    settings.browser_blocked_urls = split_list(parser.get('Browser', 'blocked_urls', fallback=''))
+    settings.page_ready_timeout = read(parser.getfloat, 'Browser', 'page_ready_timeout', 10)
+
+    settings.locator_profiles = load_profiles(parser, settings.warnings)
+
+    settings.question_types = load_handlers(parser, settings.warnings)
+    settings.question_type_fuzzy_threshold = read(parser.getfloat, 'QuestionTypes', 'fuzzy_threshold', 0.9)
+
+    settings.log_max_bytes = read(parser.getint, 'Log', 'max_bytes', 1_000_000)
+    settings.log_backup_count = read(parser.getint, 'Log', 'backup_count', 3)
+    settings.log_view_max_lines = read(parser.getint, 'Log', 'view_max_lines', 1000)
+
+    if invalid:
+        settings.warnings.append(("配置值无效",
+            "以下配置项的值无法识别，已使用默认值：\n" + "\n".join(invalid)))
+    return settings
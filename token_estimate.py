@@ -0,0 +1,57 @@
+"""本地 token 估算：发送前估计 Prompt 的 token 数，并按接口返回的实际用量逐模型校准"""
+import math
+import re
+import threading
+
+# 中日韩字符（通义千问的分词器中常用汉字基本是一字一 token）
+_CJK_RE = re.compile(r"[　-〿㐀-䶿一-鿿＀-￯]")
+# 其余文本按英文单词、数字串和单个符号切分
+_PIECE_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text):
+    """粗略估计 token 数：汉字和符号各 1 个，英文单词约每 5 个字母 1 个，数字约每 3 位 1 个"""
+    cjk = len(_CJK_RE.findall(text))
+    tokens = cjk
+    for piece in _PIECE_RE.findall(_CJK_RE.sub(" ", text)):
+        if piece[0].isalpha():
+            tokens += max(1, round(len(piece) / 5))
+        elif piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        else:
+            tokens += 1
+    return tokens
+
+
+class PromptSizeStats:
+    """按（模板, 模型）统计 Prompt 大小；有实际用量时累计该模型的 实际 / 估算 比例，用于校准之后的估算"""
+
+    def __init__(self):
+        self._sizes = {}
+        self._calibration = {}
+        self._lock = threading.Lock()
+
+    def calibrate(self, model, tokens):
+        """按该模型已记录的实际用量校准估算值（没有记录时原样返回）"""
+        with self._lock:
+            actual, estimated = self._calibration.get(model, (0, 0))
+        return round(tokens * actual / estimated) if estimated else tokens
+
+    def record(self, template, model, chars, tokens, actual=None):
+        """记录一次发送的 Prompt：tokens 为未校准的估算值，actual 为接口返回的输入 token 数（没有时为 None）"""
+        with self._lock:
+            count, total_chars, total_tokens = self._sizes.get((template, model), (0, 0, 0))
+            self._sizes[(template, model)] = (count + 1, total_chars + chars, total_tokens + tokens)
+            if actual is not None:
+                sum_actual, sum_estimated = self._calibration.get(model, (0, 0))
+                self._calibration[model] = (sum_actual + actual, sum_estimated + tokens)
+
+    def stats_text(self):
+        with self._lock:
+            lines = ["Prompt 大小（按模板 / 模型）："]
+            for (template, model), (count, chars, tokens) in sorted(self._sizes.items()):
+                actual, estimated = self._calibration.get(model, (0, 0))
+                ratio = f"，实际 / 估算 {actual / estimated:.2f}" if estimated else ""
+                lines.append(f"  {template} / {model}: n={count}，平均 {chars / count:.0f} 字符，"
+                             f"估算 {tokens / count:.0f} token{ratio}")
+            return "\n".join(lines)
@@ -0,0 +1,179 @@
+"""运行耗时追踪：按阶段记录耗时、WebDriver 命令数和数据大小，写入按大小轮转的 JSON Lines"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+
+def instrument_driver(driver):
+    """给 driver 挂上命令计数（所有 WebDriver/WebElement 命令都经过 driver.execute）"""
+    if getattr(driver, "_uai_instrumented", False):
+        return driver
+    original_execute = driver.execute
+
+    def execute(driver_command, params=None):
+        driver._uai_command_count += 1
+        return original_execute(driver_command, params)
+
+    driver._uai_command_count = 0
+    driver.execute = execute
+    driver._uai_instrumented = True
+    return driver
+
+
+def driver_command_count(driver):
+    """已执行的 WebDriver 命令数（未挂计数时返回 0）"""
+    return getattr(driver, "_uai_command_count", 0)
+
+
+def percentile(values, pct):
+    """线性插值百分位数，values 为空时返回 0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class Span:
+    """单个阶段的追踪记录，可在阶段内用 set() 补充属性"""
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = dict(attrs)
+        self.duration = 0.0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """阶段追踪器：每个 span 写一行 JSON，并保留最近若干次耗时用于 p50/p95 汇总
+
+    追踪文件只打开一次；超过 max_bytes 时与日志一样轮转为 path.1 … path.<backup_count>（max_bytes 为 0 时不轮转）。
+    """
+
+    def __init__(self, path, window=50, max_bytes=1_000_000, backup_count=3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.run_id = None
+        self._durations = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+
+    def new_run(self):
+        """开始新的一次运行，之后的 span 都归到这个运行 ID 下"""
+        self.run_id = os.urandom(6).hex()
+        return self.run_id
+
+    @contextmanager
+    def span(self, name, driver=None, **attrs):
+        """记录一个阶段的耗时；传入 driver 时同时统计该阶段的 WebDriver 命令数"""
+        span = Span(name, attrs)
+        commands_before = driver_command_count(driver)
+        started_at = time.time()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            record = {
+                "run": self.run_id,
+                "stage": name,
+                "start": round(started_at, 3),
+                "duration_ms": round(span.duration * 1000, 2),
+            }
+            if driver is not None:
+                record["driver_commands"] = driver_command_count(driver) - commands_before
+            if error:
+                record["error"] = error
+            record.update(span.attrs)
+            self._write(record)
+
+    def _write(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        size = len(line.encode("utf-8"))
+        with self._lock:
+            self._durations[record["stage"]].append(record["duration_ms"])
+            try:
+                if self._file is None:
+                    self._file = open(self.path, "a", encoding="utf-8")
+                    self._size = os.path.getsize(self.path)
+                if self.max_bytes and self._size and self._size + size > self.max_bytes:
+                    self._rotate()
+                self._file.write(line)
+                self._file.flush()
+                self._size += size
+            except OSError:
+                pass
+
+    def _rotate(self):
+        """关闭当前文件，path.N 依次后移（最旧的删除），再打开新的追踪文件"""
+        self._file.close()
+        self._file = None
+        if self.backup_count:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = 0
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def summary(self):
+        """各阶段最近耗时的 {阶段: (次数, p50, p95)}，单位毫秒"""
+        with self._lock:
+            return {
+                stage: (len(values), percentile(values, 50), percentile(values, 95))
+                for stage, values in self._durations.items()
+            }
+
+    def summary_text(self):
+        """格式化的阶段耗时汇总，用于日志输出"""
+        lines = ["阶段耗时汇总（最近运行）："]
+        for stage, (count, p50, p95) in self.summary().items():
+            lines.append(f"  {stage}: n={count}, p50={p50:.0f} ms, p95={p95:.0f} ms")
+        return "\n".join(lines)
+
+
+@contextmanager
+def profile_run(path_prefix, top=30):
+    """对一次运行做 cProfile + tracemalloc 采样，结束后写出 .prof 和内存分配报告"""
+    import cProfile
+    import tracemalloc
+    profiler = cProfile.Profile()
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if started_tracemalloc:
+            tracemalloc.stop()
+        profiler.dump_stats(path_prefix + ".prof")
+        with open(path_prefix + "_memory.txt", "w", encoding="utf-8") as f:
+            f.write(f"current={current} bytes, peak={peak} bytes\n")
+            for stat in snapshot.statistics("lineno")[:top]:
+                f.write(f"{stat}\n")
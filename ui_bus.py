@@ -0,0 +1,144 @@
+"""界面更新总线：工作线程只把更新放进队列，由 Tk 主循环定时批量应用到文本框"""
+import logging
+import queue
+import time
+
+
+class LogView:
+    """容量固定的日志视图：只保留最近 max_lines 行，超出部分从文本框顶部删除"""
+
+    def __init__(self, widget, max_lines=1000):
+        self.widget = widget
+        self.max_lines = max_lines
+        self._widget_lines = 0
+
+    def append(self, text):
+        """追加若干行（text 以换行结尾），一次 insert 后再裁剪并滚动到底部"""
+        new_lines = text.splitlines()
+        self.widget.insert("end", text)
+        self._widget_lines += len(new_lines)
+        excess = self._widget_lines - self.max_lines
+        if excess > 0:
+            self.widget.delete("1.0", f"{excess + 1}.0")
+            self._widget_lines = self.max_lines
+        self.widget.see("end")
+
+    def clear(self):
+        self.widget.delete("1.0", "end")
+        self._widget_lines = 0
+
+
+class UIUpdateBus:
+    """线程安全的界面更新队列
+
+    任意线程调用 log/append/replace/clear/call 投递更新；Tk 主线程每 interval_ms 取出全部
+    待处理更新一次性应用：同一文本框的连续追加合并为一次 insert，被后续 replace/clear
+    覆盖的更新直接丢弃。root 为 None 时（无界面运行）立即应用更新。
+    """
+
+    def __init__(self, root, log_widget, max_log_lines=1000, interval_ms=50):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.log_view = LogView(log_widget, max_log_lines)
+        self._queue = queue.SimpleQueue()
+        self._stopped = False
+        # 统计：批次数、投递的更新数、实际应用的操作数、单批最大耗时
+        self.batches = 0
+        self.posted = 0
+        self.applied = 0
+        self.max_batch_seconds = 0.0
+
+    def start(self):
+        """开始在 Tk 主循环中定时处理队列"""
+        if self.root is not None:
+            self.root.after(self.interval_ms, self._tick)
+        return self
+
+    def stop(self):
+        self._stopped = True
+
+    def log(self, line):
+        self._post("log", self.log_view, line + "\n")
+
+    def append(self, widget, text):
+        self._post("append", widget, text)
+
+    def replace(self, widget, text):
+        self._post("replace", widget, text)
+
+    def clear(self, widget):
+        self._post("replace", widget, "")
+
+    def call(self, func, *args, **kwargs):
+        """在主线程中调用 func（如弹出消息框）"""
+        self._post("call", func, (args, kwargs))
+
+    def _post(self, kind, target, value):
+        self.posted += 1
+        if self.root is None:
+            self._apply([[kind, target, [value]]])
+        else:
+            self._queue.put((kind, target, value))
+
+    def _tick(self):
+        if self._stopped:
+            return
+        self.drain()
+        try:
+            self.root.after(self.interval_ms, self._tick)
+        except Exception:
+            # 窗口已关闭
+            self._stopped = True
+
+    def drain(self):
+        """取出当前全部待处理更新并应用，返回应用的操作数"""
+        pending = []
+        while True:
+            try:
+                pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if not pending:
+            return 0
+        start = time.perf_counter()
+        ops = self._coalesce(pending)
+        self._apply(ops)
+        self.batches += 1
+        self.max_batch_seconds = max(self.max_batch_seconds, time.perf_counter() - start)
+        return len(ops)
+
+    @staticmethod
+    def _coalesce(pending):
+        ops = []
+        for kind, target, value in pending:
+            if kind in ("log", "append") and ops and ops[-1][0] == kind and ops[-1][1] is target:
+                ops[-1][2].append(value)
+                continue
+            if kind == "replace":
+                # 整体替换会覆盖该文本框之前的所有更新
+                ops = [op for op in ops if op[1] is not target]
+            ops.append([kind, target, [value]])
+        return ops
+
+    def _apply(self, ops):
+        for kind, target, values in ops:
+            try:
+                if kind == "log":
+                    target.append("".join(values))
+                elif kind == "append":
+                    target.insert("end", "".join(values))
+                    target.see("end")
+                elif kind == "replace":
+                    target.delete("1.0", "end")
+                    if values[-1]:
+                        target.insert("end", values[-1])
+                elif kind == "call":
+                    args, kwargs = values[0]
+                    target(*args, **kwargs)
+            except Exception as e:
+                logging.warning(f"[WARNING] 界面更新失败（{kind}）: {e}")
+            self.applied += 1
+
+    def stats_text(self):
+        return (f"投递 {self.posted} 次，合并后应用 {self.applied} 次，"
+                f"批次 {self.batches}，单批最长 {self.max_batch_seconds * 1000:.1f} ms")